@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la compresión de respuestas (compress.py) sobre cuerpos como los de
+/search (50, 300 y 1000 anuncios) y un /search/stream por fuentes:
+- bytes y razón por codificación y nivel, tiempo de comprimir y descomprimir;
+- latencia estimada en enlaces móviles (comprimir + transferir + descomprimir);
+- streaming: costo en bytes de hacer flush en cada evento frente a comprimir el
+  cuerpo entero;
+- el middleware completo con el TestClient (identity frente a cada codificación).
+zstd y br se miden solo si zstandard / brotli están instalados.
+
+    python benchmarks/bench_compression.py [--sizes 50,300,1000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import zlib
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import compress  # noqa: E402
+from listing import Listing, listing_id  # noqa: E402
+from serialization import FastJSONResponse, dumps  # noqa: E402
+
+# Enlaces móviles (Mbit/s de bajada)
+LINKS = (("3G", 1.6), ("4G", 12.0))
+_DISTRITOS = ["Miraflores", "San Isidro", "Barranco", "Surco", "Jesús María", "Lince", "Magdalena"]
+_FRASES = ["cocina equipada", "áreas comunes", "cochera techada", "vista al parque", "cerca a centros comerciales",
+           "pet friendly", "terraza con parrilla", "piso de madera", "walk-in closet", "lavandería",
+           "seguridad 24 horas", "gimnasio", "piscina", "ascensor directo", "a dos cuadras de la Av. Larco"]
+
+
+def synthetic_listings(n: int, seed: int = 0) -> list:
+    """Anuncios con texto variado (la razón de compresión depende mucho de cuánto se repite)."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        zona = rnd.choice(_DISTRITOS)
+        fuente = rnd.choice(["nestoria", "urbania", "properati", "infocasas", "doomos"])
+        dorm, banos, m2 = rnd.randint(1, 4), rnd.randint(1, 3), rnd.randint(35, 250)
+        link = f"https://{fuente}.test/inmueble/departamento-{zona.lower().replace(' ', '-')}-{rnd.randint(10**6, 10**7)}"
+        out.append(Listing(
+            titulo=f"Departamento en alquiler en {zona}, {dorm} dormitorios",
+            precio=f"S/ {rnd.randint(8, 60) * 100:,}",
+            m2=f"{m2} m²",
+            dormitorios=f"{dorm} dorm.",
+            banos=f"{banos} baños",
+            descripcion=f"Departamento de {m2} m² en {zona}: " + ", ".join(rnd.sample(_FRASES, 5)) + ".",
+            link=link,
+            fuente=fuente,
+            imagen_url=f"https://img.{fuente}.test/{rnd.getrandbits(64):016x}.jpg",
+            scraped_at="2026-01-01T12:00:00",
+            id=listing_id(fuente, link),
+        ))
+    return out
+
+
+def search_body(listings: list) -> bytes:
+    return dumps({"success": True, "count": len(listings), "properties": listings,
+                  "message": f"Se encontraron {len(listings)} propiedades", "total": len(listings),
+                  "offset": 0, "limit": None, "next_offset": None})
+
+
+def stream_events(listings: list) -> list:
+    """Eventos NDJSON como los de /search/stream: uno de propiedades y uno de estado por fuente."""
+    by_source = {}
+    for l in listings:
+        by_source.setdefault(l.fuente, []).append(l)
+    events = [dumps({"event": "start", "fuentes": list(by_source)}) + b"\n"]
+    for fuente, items in by_source.items():
+        events.append(dumps({"event": "properties", "fuente": fuente, "count": len(items), "properties": items}) + b"\n")
+        events.append(dumps({"event": "source", "fuente": fuente, "encontrados": len(items), "segundos": 1.2}) + b"\n")
+    events.append(dumps({"event": "done", "count": len(listings), "cache": False, "segundos": 4.1}) + b"\n")
+    return events
+
+
+def _decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return zlib.decompress(data, 31)
+    if encoding == "br":
+        return compress.brotli.decompress(data)
+    return compress.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def variants() -> list:
+    out = [("gzip", 1), ("gzip", 5), ("gzip", 9)]
+    if compress.HAS_BROTLI:
+        out += [("br", 4), ("br", 11)]
+    if compress.HAS_ZSTD:
+        out += [("zstd", 3), ("zstd", 19)]
+    return out
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_bodies(sizes, repeat: int):
+    print(f"{'anuncios':>8} {'codif.':<8} {'bytes':>9} {'razón':>6} {'comp ms':>8} {'desc ms':>8} "
+          + " ".join(f"{name + ' ms':>9}" for name, _ in LINKS))
+    for n in sizes:
+        body = search_body(synthetic_listings(n))
+        line = f"{n:>8} {'identity':<8} {len(body):>9} {1:>6.2f} {0:>8.2f} {0:>8.2f} "
+        print(line + " ".join(f"{len(body) * 8 / (mbps * 1e6) * 1000:>9.0f}" for _, mbps in LINKS))
+        for encoding, level in variants():
+            c = compress.Compression(encodings=[encoding], levels={encoding: level})
+            out = c.compress(encoding, body)
+            assert _decompress(encoding, out) == body
+            comp = _best(lambda: c.compress(encoding, body), repeat)
+            dec = _best(lambda: _decompress(encoding, out), repeat)
+            latency = [(comp + dec + len(out) * 8 / (mbps * 1e6)) * 1000 for _, mbps in LINKS]
+            print(f"{n:>8} {f'{encoding}-{level}':<8} {len(out):>9} {len(out) / len(body):>6.2f} "
+                  f"{comp * 1000:>8.2f} {dec * 1000:>8.2f} " + " ".join(f"{ms:>9.0f}" for ms in latency))
+
+
+def bench_stream(n: int):
+    events = stream_events(synthetic_listings(n))
+    whole = b"".join(events)
+    print(f"\nStreaming de {n} anuncios en {len(events)} eventos ({len(whole)} bytes sin comprimir)")
+    print(f"{'codif.':<8} {'por evento':>11} {'entero':>9} {'extra':>6}")
+    for encoding, level in variants():
+        c = compress.Compression(encodings=[encoding], levels={encoding: level})
+        stream = c.stream(encoding)
+        chunks = [stream.compress(e) for e in events] + [stream.finish()]
+        assert _decompress(encoding, b"".join(chunks)) == whole
+        entero = len(c.compress(encoding, whole))
+        incremental = sum(len(ch) for ch in chunks)
+        print(f"{f'{encoding}-{level}':<8} {incremental:>11} {entero:>9} {incremental / entero - 1:>6.1%}")
+
+
+def bench_middleware(n: int, repeat: int):
+    listings = synthetic_listings(n)
+    events = stream_events(listings)
+    app = FastAPI()
+    app.add_middleware(compress.CompressionMiddleware,
+                       compression=compress.Compression(encodings=[e for e in compress.ENCODINGS]))
+
+    @app.get("/search")
+    def search():
+        return FastJSONResponse({"success": True, "count": len(listings), "properties": listings})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(events), media_type="application/x-ndjson")
+
+    client = TestClient(app)
+    print(f"\nMiddleware completo con el TestClient ({n} anuncios, mejor de {repeat})")
+    print(f"{'Accept-Encoding':<16} {'/search ms':>11} {'bytes':>9} {'/stream ms':>11}")
+    for accept in ["identity"] + [e for e in compress.ENCODINGS if compress._AVAILABLE[e]]:
+        headers = {"Accept-Encoding": accept}
+        r = client.get("/search", headers=headers)
+        assert r.headers.get("content-encoding") == (None if accept == "identity" else accept)
+        size = int(r.headers.get("content-length", len(r.content)))
+        t_search = _best(lambda: client.get("/search", headers=headers), repeat)
+        t_stream = _best(lambda: client.get("/stream", headers=headers), repeat)
+        print(f"{accept:<16} {t_search * 1000:>11.1f} {size:>9} {t_stream * 1000:>11.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="50,300,1000", help="Cantidades de anuncios separadas por coma")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+
+    available = [e for e in compress.ENCODINGS if compress._AVAILABLE[e]]
+    print(f"Codificaciones disponibles: {', '.join(available)}\n")
+    bench_bodies(sizes, args.repeat)
+    bench_stream(max(sizes))
+    bench_middleware(max(sizes), args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
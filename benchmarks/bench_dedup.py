@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la deduplicación entre fuentes (duplicates.py) sobre listados
+sintéticos: cada inmueble se publica en 1 a 3 fuentes con el título redactado
+distinto (orden, tildes, abreviaturas), el precio con hasta 1% de diferencia y
+los m² con ±1. Una parte de los inmuebles se publica con un título genérico
+("Departamento en alquiler en Miraflores") y solo la descripción los distingue:
+no deben juntarse con otros del mismo distrito, precio y tamaño. Se mide el tiempo por tamaño (debería crecer casi linealmente),
+cuántos duplicados junta frente a la deduplicación exacta por (link, titulo) y
+la calidad contra la verdad conocida (grupos mal unidos y duplicados perdidos).
+Con --naive también corre la comparación de todos contra todos para ver la
+diferencia de escala.
+
+    python benchmarks/bench_dedup.py [--rows 10000,50000,100000] [--naive 3000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from listing import Listing, dedupe  # noqa: E402
+from duplicates import DuplicateIndex, _Group, fingerprint  # noqa: E402
+
+SOURCES = ["urbania", "infocasas", "properati", "nestoria"]
+DISTRITOS = ["Miraflores", "San Isidro", "Barranco", "Surco", "San Borja", "Jesús María", "Magdalena", "Lince"]
+CALLES = ["Av. Larco", "Calle Berlín", "Av. Pardo", "Jr. Independencia", "Av. Benavides", "Calle Schell",
+          "Av. Arequipa", "Malecón Cisneros", "Av. Salaverry", "Calle Los Pinos", "Av. Brasil", "Jr. Huiracocha"]
+EXTRAS = ["con vista al parque", "amoblado", "con terraza", "pet friendly", "estreno", "con cochera", "", ""]
+FRASES = ["cocina equipada", "áreas comunes", "cochera techada", "vista al parque", "cerca a centros comerciales",
+          "terraza con parrilla", "piso de madera", "walk-in closet", "lavandería", "seguridad 24 horas",
+          "gimnasio", "piscina", "ascensor directo", "balcón a la calle", "cuarto de servicio", "depósito"]
+
+
+def _titles(rnd: random.Random, dorms: int, distrito: str, calle: str, numero: int, extra: str) -> list:
+    """Redacciones distintas del mismo aviso, como las publica cada portal."""
+    sin_tildes = distrito.replace("í", "i").replace("ú", "u")
+    return [
+        f"Departamento en alquiler {dorms} dormitorios {extra} {calle} {numero}, {distrito}",
+        f"ALQUILER DEPARTAMENTO {dorms} DORM. {extra.upper()} - {calle.upper()} {numero} {sin_tildes.upper()}",
+        f"Depa {dorms} dorm {extra} en {calle} {numero} {distrito}",
+        f"{calle} {numero}, {sin_tildes}: departamento de {dorms} dormitorios {extra}",
+    ]
+
+
+def synthetic_listings(n: int, seed: int = 0) -> list:
+    """
+    ~n Listing de varios portales; el link lleva el id del inmueble (`.../<apt>-<fuente>`)
+    para saber qué anuncios son realmente el mismo.
+    """
+    rnd = random.Random(seed)
+    out = []
+    apt = 0
+    while len(out) < n:
+        apt += 1
+        dorms = rnd.randint(1, 4)
+        m2 = rnd.randint(35, 220)
+        precio = rnd.randint(12, 90) * 100
+        moneda = "S/" if rnd.random() < 0.8 else "US$"
+        distrito = rnd.choice(DISTRITOS)
+        calle, numero = rnd.choice(CALLES), rnd.randint(100, 4999)
+        titles = _titles(rnd, dorms, distrito, calle, numero, rnd.choice(EXTRAS))
+        if rnd.random() < 0.2:
+            titles = [f"Departamento en alquiler en {distrito}"] * len(titles)
+        descripcion = (f"Departamento en {calle} {numero}, {distrito}. "
+                       + ", ".join(rnd.sample(FRASES, 5)).capitalize() + ".")
+        copies = rnd.choices((1, 2, 3), weights=(5, 3, 2))[0]
+        for k, fuente in enumerate(rnd.sample(SOURCES, copies)):
+            p = precio if k == 0 else int(precio * rnd.uniform(0.99, 1.01))
+            out.append(Listing(
+                titulo=" ".join(titles[SOURCES.index(fuente)].split()),
+                precio=f"{moneda} {p:,}",
+                m2=f"{m2 + (0 if k == 0 else rnd.randint(-1, 1))} m²",
+                dormitorios=str(dorms),
+                banos=str(rnd.randint(1, 3)),
+                # Algunos portales recortan la descripción
+                descripcion=descripcion if k == 0 else descripcion[:rnd.randint(60, len(descripcion))],
+                link=f"https://{fuente}.test/aviso/{apt}-{fuente}",
+                fuente=fuente,
+            ))
+    return out[:n]
+
+
+def _apt(link: str) -> str:
+    return link.rsplit("/", 1)[1].split("-", 1)[0]
+
+
+def quality(listings: list, unique: list) -> dict:
+    """Grupos con inmuebles distintos y duplicados que quedaron sueltos, según el id del link."""
+    copies = {}
+    for l in listings:
+        copies[_apt(l.link)] = copies.get(_apt(l.link), 0) + 1
+    wrong = sum(1 for l in unique for a in l.alternates if _apt(a["link"]) != _apt(l.link))
+    kept = {}
+    for l in unique:
+        kept[_apt(l.link)] = kept.get(_apt(l.link), 0) + 1
+    expected = len(listings) - len(copies)
+    missed = sum(kept[a] - 1 for a in kept)
+    return {"duplicados": expected, "unidos_mal": wrong, "perdidos": missed}
+
+
+def naive_collapse(listings: list) -> list:
+    """Mismo criterio que DuplicateIndex pero comparando contra todos los grupos (referencia n²)."""
+    index = DuplicateIndex()
+    groups = []
+    unique = []
+    for l in listings:
+        fp = fingerprint(l)
+        match = None
+        if fp is not None:
+            for g in groups:
+                if (g.fp.moneda == fp.moneda and g.fp.dormitorios == fp.dormitorios
+                        and index._is_duplicate(fp, l.fuente, g)):
+                    match = g
+                    break
+        if match is not None:
+            match.merge(l)
+            continue
+        group = _Group(l, fp)
+        if fp is not None:
+            groups.append(group)
+        unique.append(group)
+    return [g.canonical for g in unique]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="10000,50000,100000", help="Tamaños separados por coma")
+    ap.add_argument("--naive", type=int, default=3000, help="Tamaño para la referencia cuadrática (0 = no)")
+    args = ap.parse_args()
+
+    print(f"{'listados':>9} {'exacta':>8} {'cercana':>8} {'s':>7} {'µs/listado':>11} "
+          f"{'pico MB':>8} {'duplicados':>11} {'mal':>5} {'perdidos':>9}")
+    for n in (int(x) for x in args.rows.split(",") if x.strip()):
+        listings = synthetic_listings(n)
+        exact = dedupe(listings)
+        start = time.perf_counter()
+        unique = DuplicateIndex().collapse(exact)
+        secs = time.perf_counter() - start
+        # Memoria en otra pasada (tracemalloc hace más lenta la medición de tiempo)
+        fresh = synthetic_listings(n)
+        tracemalloc.start()
+        DuplicateIndex().collapse(fresh)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        q = quality(listings, unique)
+        print(f"{n:>9} {len(exact):>8} {len(unique):>8} {secs:>7.2f} {secs / n * 1e6:>11.1f} "
+              f"{peak / 2**20:>8.1f} {q['duplicados']:>11} {q['unidos_mal']:>5} {q['perdidos']:>9}")
+
+    if args.naive:
+        listings = synthetic_listings(args.naive)
+        start = time.perf_counter()
+        blocked_unique = DuplicateIndex().collapse(listings)
+        blocked = time.perf_counter() - start
+        listings = synthetic_listings(args.naive)
+        start = time.perf_counter()
+        reference = naive_collapse(listings)
+        naive = time.perf_counter() - start
+        print(f"\n{args.naive} listados: bloqueo {blocked:.3f}s ({len(blocked_unique)} quedan), "
+              f"todos contra todos {naive:.3f}s ({len(reference)} quedan; {naive / blocked:.0f}x, crece con n²)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
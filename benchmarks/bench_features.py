@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del extractor de características (features.extract_features)
+frente a la extracción anterior: varios get_text() de la card y un re.search
+sin precompilar por cada característica.
+
+    python benchmarks/bench_features.py [--cards 2000] [--repeat 5]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from features import extract_features, parse_price  # noqa: E402
+from benchmarks.fixtures import synthetic_page  # noqa: E402
+
+
+def legacy_text(text: str, price_text: str):
+    """Como lo hacía scrape_nestoria: tres re.search sobre el texto en minúsculas."""
+    text_content = text.lower()
+    dorm = re.search(r'(\d+)\s*dormitori', text_content, flags=re.I)
+    banos = re.search(r'(\d+)\s*bañ', text_content, flags=re.I)
+    m2 = re.search(r'(\d{1,4})\s*(m²|m2)', text_content, flags=re.I)
+    moneda = "S" if "S/" in price_text else ("USD" if "$" in price_text else None)
+    nums = re.sub(r"[^\d]", "", price_text)
+    return (dorm.group(1) if dorm else "", banos.group(1) if banos else "",
+            m2.group(1) if m2 else "", moneda, int(nums) if nums else None)
+
+
+def new_text(text: str, price_text: str):
+    f = extract_features(text, price_text)
+    return f.dormitorios, f.banos, f.m2, f.moneda, f.precio
+
+
+def legacy_card(card):
+    """Card completa a la manera anterior: get_text para la descripción y otra vez para las características."""
+    price_el = card.select_one(".result__details__price span")
+    price_text = price_el.get_text(" ", strip=True) if price_el else ""
+    card.get_text(" ", strip=True)[:800]
+    return legacy_text(card.get_text(" ", strip=True), price_text)
+
+
+def new_card(card):
+    price_el = card.select_one(".result__details__price span")
+    price_text = price_el.get_text(" ", strip=True) if price_el else ""
+    text = card.get_text(" ", strip=True)
+    text[:800]
+    return new_text(text, price_text)
+
+
+def _time(fn, items, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(*item) if isinstance(item, tuple) else fn(item) for item in items]
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cards", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    soup = BeautifulSoup(synthetic_page("nestoria", args.cards), "html.parser")
+    cards = soup.select("li.rating__new")
+    texts = []
+    for card in cards:
+        price_el = card.select_one(".result__details__price span")
+        texts.append((card.get_text(" ", strip=True), price_el.get_text(" ", strip=True)))
+
+    print(f"{len(cards)} cards de Nestoria sintéticas, mejor de {args.repeat}")
+    print(f"{'caso':<28} {'µs/card':>9} {'x':>6}")
+    t_old, out_old = _time(legacy_text, texts, args.repeat)
+    t_new, out_new = _time(new_text, texts, args.repeat)
+    print(f"{'texto: re.search x3':<28} {t_old / len(texts) * 1e6:>9.2f} {1.0:>6.1f}")
+    print(f"{'texto: extract_features':<28} {t_new / len(texts) * 1e6:>9.2f} {t_old / t_new:>6.1f}")
+    t_old_c, _ = _time(legacy_card, cards, args.repeat)
+    t_new_c, _ = _time(new_card, cards, args.repeat)
+    print(f"{'card: get_text x2 + regex':<28} {t_old_c / len(cards) * 1e6:>9.2f} {1.0:>6.1f}")
+    print(f"{'card: get_text x1 + extract':<28} {t_new_c / len(cards) * 1e6:>9.2f} {t_old_c / t_new_c:>6.1f}")
+    same = out_old == out_new
+    print("Mismos valores que la extracción anterior:", "sí" if same else "NO")
+    # Variantes que la extracción anterior no reconocía
+    for sample in ("3 dorm. 2 baños 120 m2", "2 hab. 1 bano 65 mts2", "1 dormitorio 1 baño 45 metros cuadrados"):
+        print(f"  {sample!r}: {extract_features(sample, '')!r}")
+    assert parse_price("S/ 1,500") == ("S", 1500)
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
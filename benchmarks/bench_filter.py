@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del camino de cada fuente tras el scrape: normalización + filtro estricto
++ conversión a dicts para la respuesta. Compara, sobre listados sintéticos:
+- "por filas": la versión original (.apply con un regex por celda, copias del frame);
+- "DataFrame": la versión vectorizada con pandas (pd.DataFrame -> filtro -> to_dict);
+- "Listing": registros __slots__ filtrados en Python puro (scraper._filter_strict).
+Con los tamaños reales (unos cientos de anuncios por fuente) el costo fijo de armar
+y desarmar el DataFrame domina; también se mide cuánto tarda importar pandas.
+
+    python benchmarks/bench_filter.py [--rows 300,100000] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import numpy as np  # noqa: E402
+import scraper  # noqa: E402
+from listing import Listing, to_dicts  # noqa: E402
+
+FILTERS = [
+    ("sin filtros", ("0", "0", None, None)),
+    ("2 dorm", ("2", "0", None, None)),
+    ("2 dorm, 1 baño, S/1000-3000", ("2", "1", 1000, 3000)),
+    ("solo precio máx S/2500", ("0", "0", None, 2500)),
+]
+COLUMNS = ["titulo", "precio", "m2", "dormitorios", "baños", "descripcion", "link", "fuente", "imagen_url"]
+
+
+def synthetic_records(n: int, seed: int = 0) -> list:
+    """Registros tal como los arma un scraper (algunos campos vacíos o None)."""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        moneda = "S/" if rnd.random() < 0.8 else "US$"
+        rows.append({
+            "titulo": f"  Departamento {i} en alquiler ",
+            "precio": f"{moneda} {rnd.randint(5, 80) * 100:,}" if rnd.random() > 0.03 else None,
+            "m2": str(rnd.randint(30, 250)) if rnd.random() > 0.1 else "",
+            "dormitorios": str(rnd.randint(1, 4)) if rnd.random() > 0.05 else "",
+            "baños": str(rnd.randint(1, 3)) if rnd.random() > 0.05 else None,
+            "descripcion": "Bonito departamento con vista al parque, cerca de todo. " * 2,
+            "link": f"https://example.test/anuncio/{i}",
+            "fuente": "sintetico",
+            "imagen_url": f"https://img.example.test/{i}.jpg",
+        })
+    return rows
+
+
+# ---- versión original por filas (copiada tal cual para comparar) ----
+def _legacy_parse_price_soles(s):
+    s = str(s)
+    moneda = "S" if "S/" in s else ("USD" if "$" in s else None)
+    nums = re.sub(r"[^\d]", "", s)
+    val = int(nums) if nums else None
+    return val if moneda == "S" else None
+
+
+def _legacy_int(s):
+    if s is None:
+        return None
+    text = re.sub(r'\s+', ' ', str(s).strip())
+    m = re.search(r'(\d+)', text)
+    return int(m.group(1)) if m else None
+
+
+def rows_pipeline(records, dormitorios_req, banos_req, price_min, price_max):
+    df = pd.DataFrame(records)
+    df = df.fillna("").astype(object)
+    for col in COLUMNS:
+        df[col] = df[col].astype(str).str.strip().replace({None: "", "None": ""})
+    dfc = df.copy().reset_index(drop=True)
+    dfc["_precio_soles"] = dfc["precio"].apply(_legacy_parse_price_soles)
+    dfc["_dorm_num"] = dfc["dormitorios"].apply(_legacy_int)
+    dfc["_banos_num"] = dfc["baños"].apply(_legacy_int)
+    mask = pd.Series(True, index=dfc.index)
+    if dormitorios_req not in (None, "", "0"):
+        mask &= (dfc["_dorm_num"].notnull()) & (dfc["_dorm_num"] == int(dormitorios_req))
+    if banos_req not in (None, "", "0"):
+        mask &= (dfc["_banos_num"].notnull()) & (dfc["_banos_num"] == int(banos_req))
+    if (price_min is not None) or (price_max is not None):
+        lo = -10**12 if price_min is None else price_min
+        hi = 10**12 if price_max is None else price_max
+        mask &= dfc["_precio_soles"].notnull()
+        mask &= (dfc["_precio_soles"] >= int(lo)) & (dfc["_precio_soles"] <= int(hi))
+    out = dfc.loc[mask].copy().reset_index(drop=True)
+    out.drop(columns=["_precio_soles", "_dorm_num", "_banos_num"], errors="ignore", inplace=True)
+    return out.to_dict("records")
+
+
+# ---- versión vectorizada con pandas (anterior a Listing) ----
+def _first_int_column(col):
+    return pd.to_numeric(col.str.extract(r"(\d+)", expand=False), errors="coerce").astype("Int64")
+
+
+def _price_soles_column(col):
+    soles = col.str.contains("S/", regex=False).to_numpy(dtype=bool, na_value=False)
+    value = pd.Series(pd.NA, index=col.index, dtype="Int64")
+    if soles.any():
+        digits = col[soles].str.replace(r"\D", "", regex=True)
+        lengths = digits.str.len()
+        digits = digits.where((lengths > 0) & (lengths <= 15))
+        value[soles] = pd.to_numeric(digits, errors="coerce").astype("Int64").to_numpy()
+    return value
+
+
+def frame_pipeline(records, dormitorios_req, banos_req, price_min, price_max):
+    df = pd.DataFrame(records)
+    for col in COLUMNS:
+        values = df[col]
+        from_object = values.dtype == object
+        values = values.fillna("").astype(str).str.strip()
+        if from_object:
+            values = values.mask(values == "None", "")
+        df[col] = values
+    checks = []
+    dorm_req = scraper._requested_count(dormitorios_req)
+    if dorm_req is not None:
+        checks.append(("dormitorios", lambda col: _first_int_column(col) == dorm_req))
+    banos_req_int = scraper._requested_count(banos_req)
+    if banos_req_int is not None:
+        checks.append(("baños", lambda col: _first_int_column(col) == banos_req_int))
+    if (price_min is not None) or (price_max is not None):
+        def _price_ok(col):
+            precio = _price_soles_column(col)
+            ok = precio.notna()
+            if price_min is not None:
+                ok &= precio >= int(price_min)
+            if price_max is not None:
+                ok &= precio <= int(price_max)
+            return ok
+        checks.append(("precio", _price_ok))
+    rows = np.arange(len(df))
+    for col, check in checks:
+        if len(rows) == 0:
+            break
+        rows = rows[check(df[col].iloc[rows]).to_numpy(dtype=bool, na_value=False)]
+    return df.iloc[rows].reset_index(drop=True).to_dict("records")
+
+
+# ---- Listing ----
+def listing_pipeline(records, dormitorios_req, banos_req, price_min, price_max):
+    # Los scrapers arman Listing directamente en lugar de dicts
+    listings = [Listing(r["titulo"], r["precio"], r["m2"], r["dormitorios"], r["baños"], r["descripcion"],
+                        r["link"], r["fuente"], r["imagen_url"]) for r in records]
+    return to_dicts(scraper._filter_strict(listings, dormitorios_req, banos_req, price_min, price_max))
+
+
+PIPELINES = [("por filas", rows_pipeline), ("DataFrame", frame_pipeline), ("Listing", listing_pipeline)]
+
+
+def measure(fn, records, args, repeat):
+    best = float("inf")
+    out = None
+    # Con pocos anuncios se repite más para que el tiempo sea medible
+    inner = max(1, 20_000 // max(1, len(records)))
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(inner):
+            out = fn(records, *args)
+        best = min(best, (time.perf_counter() - start) / inner)
+    tracemalloc.start()
+    fn(records, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, out
+
+
+def _key(records):
+    return [tuple(str(r[c]) for c in COLUMNS) for r in records]
+
+
+def _import_time(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="300,100000", help="Tamaños separados por coma")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"pandas {pd.__version__}: import en {_import_time('pandas') * 1000:.0f} ms "
+          f"(listing: {_import_time('listing') * 1000:.0f} ms)")
+    ok = True
+    for n in (int(x) for x in args.rows.split(",") if x.strip()):
+        records = synthetic_records(n)
+        print(f"\n{n} listados sintéticos, mejor de {args.repeat}")
+        print(f"{'filtro':<30} {'versión':<10} {'filas':>7} {'ms':>9} {'filas/s':>11} {'pico MB':>8} {'x':>5}")
+        for label, fargs in FILTERS:
+            base_t = base_out = None
+            for i, (name, fn) in enumerate(PIPELINES):
+                t, peak, out = measure(fn, records, fargs, args.repeat)
+                if base_out is None:
+                    base_t, base_out = t, out
+                same = _key(out) == _key(base_out)
+                ok = ok and same
+                print(f"{label if i == 0 else '':<30} {name:<10} {len(out):>7} {t * 1000:>9.2f} {n / t:>11,.0f} "
+                      f"{peak / 2**20:>8.2f} {base_t / t:>5.1f}{'' if same else '  RESULTADO DISTINTO'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
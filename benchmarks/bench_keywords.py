@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del filtro por palabras clave sobre listados sintéticos: versión anterior
+(columna concatenada + un str.contains y una copia del frame por palabra, sensible
+a tildes) frente a scraper._filter_by_keywords sobre Listing (texto normalizado una
+vez, todos los términos en una pasada). También mide el mismo filtro resuelto en SQLite por el almacén.
+
+    python benchmarks/bench_keywords.py [--rows 100000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import scraper  # noqa: E402
+from listing import from_frame  # noqa: E402
+from store import ListingStore  # noqa: E402
+
+QUERIES = ["piscina", "piscina terraza mascotas", "jardin OR terraza", '"vista al mar" piscina']
+_EXTRAS = ["piscina", "terraza", "mascotas", "jardín", "vista al mar", "cochera", "amoblado", "gimnasio"]
+
+
+def synthetic_listings(n: int, seed: int = 0) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        extras = ", ".join(rnd.sample(_EXTRAS, 3))
+        rows.append({
+            "titulo": f"Departamento {i} en alquiler en Miraflores",
+            "descripcion": f"Departamento luminoso con {extras}. Cerca a parques y centros comerciales.",
+            "m2": str(rnd.randint(30, 250)),
+            "dormitorios": str(rnd.randint(1, 4)),
+            "baños": str(rnd.randint(1, 3)),
+            "precio": f"S/ {rnd.randint(8, 60) * 100}",
+            "link": f"https://example.test/{i}",
+            "fuente": "sintetico",
+            "imagen_url": "",
+        })
+    return pd.DataFrame(rows)
+
+
+def legacy_filter(df, palabras_clave):
+    palabras = palabras_clave.lower().split()
+    dfc = df.copy()
+    dfc["texto_completo"] = (dfc["titulo"].astype(str) + " " + dfc["descripcion"].astype(str) + " " +
+                             dfc["m2"].astype(str) + " " + dfc["dormitorios"].astype(str) + " " +
+                             dfc["baños"].astype(str)).str.lower()
+    for p in palabras:
+        dfc = dfc[dfc["texto_completo"].str.contains(re.escape(p), na=False, case=False)]
+    dfc.drop(columns=["texto_completo"], errors="ignore", inplace=True)
+    return dfc
+
+
+def _best(fn, setup=lambda: None, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    df = synthetic_listings(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ListingStore(os.path.join(tmp, "bench.db"), batch_size=5000)
+        start = time.perf_counter()
+        store.upsert(from_frame(df), "miraflores")
+        print(f"{args.rows} listados; carga del almacén (normaliza texto una vez): {time.perf_counter() - start:.2f}s")
+        print(f"{'consulta':<28} {'anterior':>9} {'nuevo':>9} {'x':>5} {'sqlite':>9} {'filas':>7}")
+        for q in QUERIES:
+            # Listings nuevos en cada repetición: el texto normalizado se calcula dentro de la medición
+            new_t, new_out = _best(lambda listings: scraper._filter_by_keywords(listings, q), lambda: from_frame(df))
+            new_links = [l.link for l in new_out]
+            sql_t, sql_out = _best(lambda _: store.query("miraflores", palabras_clave=q))
+            if " OR " in q or '"' in q:
+                old = "-"  # la versión anterior no soportaba OR ni frases
+                ratio = "-"
+            else:
+                old_t, old_out = _best(lambda _: legacy_filter(df, q))
+                assert list(old_out["link"]) == new_links
+                old, ratio = f"{old_t:.3f}", f"{old_t / new_t:.1f}"
+            assert sorted(l.link for l in sql_out) == sorted(new_links)
+            print(f"{q:<28} {old:>9} {new_t:>9.3f} {ratio:>5} {sql_t:>9.3f} {len(new_out):>7}")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de backends de parser HTML: cards/seg por fuente sobre páginas guardadas.
+Comprueba además que todos los backends extraen exactamente los mismos campos, y
+que dormitorios, baños y m² de InfoCasas y Urbania salen igual que con la extracción
+por tag anterior a features.extract_tag_features (número en cualquier lugar del tag).
+
+    python benchmarks/bench_parsers.py [--fixtures DIR] [--cards 40] [--repeat 20]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
+
+import scraper  # noqa: E402
+from parsing import BACKENDS, resolve_backend, parse_html  # noqa: E402
+from benchmarks.fixtures import SOURCES, FIXTURES_DIR, load_page  # noqa: E402
+
+PARSERS = {
+    "nestoria": lambda soup: scraper._parse_nestoria_cards(soup),
+    "infocasas": scraper._parse_infocasas_cards,
+    "urbania": lambda soup: scraper._parse_urbania_cards(soup, set()),
+    "properati": scraper._parse_properati_cards,
+    "doomos": scraper._parse_doomos_cards,
+}
+VOLATILE = ("scraped_at", "id")
+
+
+def _legacy_tags(tags, units):
+    """Criterio anterior: cada tag por la unidad que contiene y su primer número (gana el último tag)."""
+    found = ["", "", ""]
+    for text in tags:
+        for kind, unit in enumerate(units):
+            if unit in text:
+                m = re.search(r"(\d+)", text)
+                if m:
+                    found[kind] = m.group(1)
+                break
+    return tuple(found)
+
+
+# Dormitorios, baños y m² por card como los sacaban los parsers antes de extract_tag_features
+LEGACY_TAGS = {
+    "infocasas": lambda soup: [
+        _legacy_tags((t.get_text().strip() for t in n.select(".lc-typologyTag__item strong")), ("Dorm", "Baño", "m²"))
+        for n in (soup.select("div.listingCard") or soup.select("article")) if n.select_one("a[href]")
+    ],
+    "urbania": lambda soup: [
+        _legacy_tags((s.get_text(" ", strip=True)
+                      for s in c.select(".postingMainFeatures-module__posting-main-features-span")),
+                     ("dorm.", "baño", "m²"))
+        for c in soup.select("div[data-qa='posting PROPERTY']")
+    ],
+}
+
+
+def _fields(records):
+    return [{k: v for k, v in r.to_dict().items() if k not in VOLATILE} for r in records]
+
+
+def bench(source: str, html: str, backend: str, repeat: int):
+    parse = PARSERS[source]
+    records = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        records = parse(parse_html(html, backend))
+    elapsed = time.perf_counter() - start
+    return records, elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fixtures", default=FIXTURES_DIR, help="carpeta con <fuente>.html")
+    ap.add_argument("--cards", type=int, default=40, help="cards por página sintética (si no hay fixture)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--sources", default=",".join(SOURCES))
+    args = ap.parse_args()
+
+    backends = [b for b in BACKENDS if resolve_backend(b) == b]
+    print(f"Backends disponibles: {', '.join(backends)}")
+    print(f"{'fuente':<10} {'KB':>6} {'backend':<12} {'cards':>5} {'ms/pág':>8} {'cards/s':>9} {'x':>5}  campos")
+    ok = True
+    for source in args.sources.split(","):
+        html = load_page(source, args.fixtures, args.cards)
+        base_records, base_time = None, None
+        for backend in backends:
+            records, elapsed = bench(source, html, backend, args.repeat)
+            per_page = elapsed / args.repeat
+            if base_records is None:
+                base_records, base_time = _fields(records), per_page
+                same = "referencia"
+            else:
+                same = "idénticos" if _fields(records) == base_records else "DISTINTOS"
+                ok = ok and same == "idénticos"
+            cps = len(records) / per_page if per_page else 0.0
+            print(f"{source:<10} {len(html) // 1024:>6} {backend:<12} {len(records):>5} {per_page * 1000:>8.2f} "
+                  f"{cps:>9.0f} {base_time / per_page:>5.1f}  {same}")
+        if source in LEGACY_TAGS:
+            legacy = LEGACY_TAGS[source](parse_html(html))
+            current = [(r.dormitorios, r.banos, r.m2) for r in PARSERS[source](parse_html(html))]
+            same = legacy == current
+            ok = ok and same
+            print(f"{source:<10} dormitorios/baños/m² por tag: {'iguales' if same else 'DISTINTOS'} a la extracción anterior")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de punta a punta de los scrapers contra el servidor de reproducción
+local (benchmarks/replay.py), sin red: cada fuente corre scrape_source() entero
+(descarga HTTP o navegador, esperas, parseo, extracción de cards, imágenes de
+Nestoria, filtro) y se informan los tiempos por etapa, cards por segundo y el
+pico de memoria (RSS) del proceso.
+
+Cada fuente corre en un subproceso propio para que el RSS sea solo suyo; dentro
+se repite --repeat veces y se informa la primera corrida (en frío) y la mejor.
+Sin grabaciones en benchmarks/fixtures/replay se usan páginas sintéticas
+(Urbania paginado en --pages páginas). --browser fuerza el camino con Chrome
+(FETCH_HTTP_FIRST=0; necesita Chrome instalado).
+
+    python benchmarks/bench_replay.py [--sources urbania,nestoria] [--repeat 3] [--latency 0.05]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import SOURCES  # noqa: E402
+from benchmarks.replay import REPLAY_DIR, base_url_env, start_servers  # noqa: E402
+
+# Etapas que se muestran (las esperas "wait:<nombre>" se suman en "wait")
+STAGES = ("page_load", "wait", "http_fetch", "parse", "extract", "filter", "images")
+
+
+def _stage_totals(timings: dict) -> dict:
+    out = {stage: 0.0 for stage in STAGES}
+    for stage, seconds in timings.items():
+        key = "wait" if stage.startswith("wait:") else stage
+        if key in out:
+            out[key] += seconds
+    return out
+
+
+def child(source: str, zona: str, repeat: int) -> int:
+    """Corre dentro del subproceso: scrape de una fuente y resultado en JSON por stdout."""
+    import resource
+
+    import scraper
+    from fetch import FETCHER
+    from images import IMAGE_CACHE
+
+    runs = []
+    for _ in range(max(1, repeat)):
+        # Cada corrida vuelve a pedir las páginas de detalle de Nestoria
+        IMAGE_CACHE.clear()
+        start = time.perf_counter()
+        _, info = scraper.scrape_source(source, zona)
+        runs.append({"segundos": time.perf_counter() - start, "encontrados": info["encontrados"],
+                     "filtrados": info["filtrados"], "tiempos": _stage_totals(info.get("tiempos") or {})})
+    best = min(runs, key=lambda r: r["segundos"])
+    print(json.dumps({
+        "fuente": source,
+        # Las fuentes que no pasan por FETCHER (Properati) solo descargan por HTTP
+        "modo": FETCHER.mode(source) or "http",
+        "primera": runs[0]["segundos"],
+        **best,
+        # ru_maxrss está en KB en Linux
+        "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+    return 0
+
+
+def run_source(source: str, server, zona: str, repeat: int, browser: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        base_url_env(source): server.url,
+        "STORE_ENABLED": "0",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+        "FETCH_HTTP_FIRST": "0" if browser else "1",
+        # Las páginas reproducidas traen todas las cards en el HTML: todas las fuentes pueden ir por HTTP
+        "FETCH_HTTP_SOURCES": ",".join(SOURCES),
+        "NESTORIA_IMAGE_MODE": "deadline",
+    })
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", source, "--zona", zona, "--repeat", str(repeat)],
+        env=env, capture_output=True, text=True,
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"{source}: el subproceso falló ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sources", default=",".join(SOURCES), help="Fuentes separadas por coma")
+    ap.add_argument("--zona", default=None, help="Zona a buscar (por defecto la de la grabación o 'miraflores')")
+    ap.add_argument("--cards", type=int, default=40, help="Cards por página sintética")
+    ap.add_argument("--pages", type=int, default=3, help="Páginas del listado sintético de Urbania")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.0, help="Espera por pedido en el servidor (segundos)")
+    ap.add_argument("--browser", action="store_true", help="Usar Chrome en vez de la descarga HTTP")
+    ap.add_argument("--fixtures", default=REPLAY_DIR, help="Directorio de grabaciones")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        logging.disable(logging.WARNING)
+        return child(args.child, args.zona or "miraflores", args.repeat)
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    servers = start_servers(sources, cards=args.cards, pages=args.pages, latency=args.latency,
+                            recordings=args.fixtures)
+    print(f"{'fuente':<10} {'páginas':<10} {'modo':<8} {'cards':>6} {'filtr.':>6} {'1ª s':>6} {'s':>6} "
+          f"{'cards/s':>8} " + " ".join(f"{stage:>10}" for stage in STAGES) + f" {'RSS MB':>7}")
+    try:
+        for source, server in servers.items():
+            zona = args.zona or server.recording.meta.get("zona") or "miraflores"
+            try:
+                r = run_source(source, server, zona, args.repeat, args.browser)
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                continue
+            rate = r["encontrados"] / r["segundos"] if r["segundos"] else 0.0
+            print(f"{source:<10} {server.mode:<10} {r['modo']:<8} {r['encontrados']:>6} {r['filtrados']:>6} "
+                  f"{r['primera']:>6.2f} {r['segundos']:>6.2f} {rate:>8.0f} "
+                  + " ".join(f"{r['tiempos'][stage] * 1000:>8.1f}ms" for stage in STAGES)
+                  + f" {r['rss_kb'] / 1024:>7.1f}")
+    finally:
+        for server in servers.values():
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de serialización de la respuesta de /search con 1k y 10k anuncios:
+- "pydantic": camino anterior (to_dicts -> SearchResponse -> response_model de
+  FastAPI, que vuelve a validar cada Property, y JSONResponse con json);
+- "rápido/<encoder>": FastJSONResponse con los Listing tal cual, con cada encoder
+  disponible (orjson, pydantic_core, json).
+Se mide la petición completa con el TestClient de FastAPI (mismo overhead de
+transporte en los tres casos) y se verifica que el JSON decodificado sea idéntico.
+
+    python benchmarks/bench_serialization.py [--sizes 1000,10000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+logging.disable(logging.WARNING)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import serialization  # noqa: E402
+from listing import Listing, to_dicts  # noqa: E402
+from main import SearchResponse  # noqa: E402
+
+
+def synthetic_listings(n: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    return [Listing(
+        titulo=f"Departamento {i} en alquiler en Miraflores, con vista al parque",
+        precio=f"S/ {rnd.randint(8, 60) * 100:,}",
+        m2=str(rnd.randint(30, 250)),
+        dormitorios=str(rnd.randint(1, 4)),
+        banos=str(rnd.randint(1, 3)),
+        descripcion="Departamento luminoso, cocina equipada, áreas comunes y cochera. " * 3,
+        link=f"https://example.test/anuncio/{i}",
+        fuente=rnd.choice(["nestoria", "urbania", "properati"]),
+        imagen_url=f"https://img.example.test/{i}.jpg",
+        scraped_at="2026-01-01T12:00:00",
+        id=f"{i:032x}",
+    ) for i in range(n)]
+
+
+def build_app(listings: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/pydantic", response_model=SearchResponse)
+    def old_path():
+        properties = to_dicts(listings)
+        return SearchResponse(success=True, count=len(properties), properties=properties,
+                              message=f"Se encontraron {len(properties)} propiedades")
+
+    @app.get("/rapido/{encoder}")
+    def fast_path(encoder: str):
+        serialization._ENCODER = encoder
+        return serialization.FastJSONResponse({"success": True, "count": len(listings), "properties": listings,
+                                               "message": f"Se encontraron {len(listings)} propiedades"})
+
+    return app
+
+
+def _best(client, path, repeat):
+    best, body = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get(path)
+        best = min(best, time.perf_counter() - start)
+        body = r.content
+    return best, body
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    available = {"orjson": serialization.HAS_ORJSON, "pydantic": serialization.HAS_PYDANTIC_CORE, "json": True}
+    paths = [("pydantic", "/pydantic")] + [(f"rápido/{e}", f"/rapido/{e}")
+                                            for e in serialization.ENCODERS if available[e]]
+    ok = True
+    print(f"{'anuncios':>8} {'camino':<16} {'ms':>9} {'KB':>8} {'x':>6}")
+    for n in (int(x) for x in args.sizes.split(",") if x.strip()):
+        client = TestClient(build_app(synthetic_listings(n)))
+        base_t = base_json = None
+        for label, path in paths:
+            t, body = _best(client, path, args.repeat)
+            decoded = json.loads(body)
+            if base_json is None:
+                base_t, base_json = t, decoded
+            same = decoded == base_json
+            ok = ok and same
+            print(f"{n:>8} {label:<16} {t * 1000:>9.1f} {len(body) / 1024:>8.0f} {base_t / t:>6.1f}"
+                  f"{'' if same else '  RESPUESTA DISTINTA'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
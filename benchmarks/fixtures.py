@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Páginas de listado para los benchmarks.
+Si existe <dir>/<fuente>.html (p. ej. guardada de driver.page_source) se usa esa;
+si no, se genera una página sintética con el mismo marcado de cards que esperan
+los scrapers, más relleno (scripts, navegación) para acercarse al tamaño real.
+"""
+import os
+import random
+
+SOURCES = ("nestoria", "infocasas", "urbania", "properati", "doomos")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+_DISTRITOS = ["Miraflores", "San Isidro", "Barranco", "Surco", "Jesús María", "Lince", "Magdalena"]
+_FILLER = "<script>window.__STATE__ = {" + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(400)) + "};</script>"
+
+
+def _nav():
+    return "<nav>" + "".join(f'<a href="/menu/{i}">Menú {i}</a>' for i in range(60)) + "</nav>"
+
+
+def _card(source: str, i: int, rnd: random.Random) -> str:
+    dorm, banos, m2 = rnd.randint(1, 4), rnd.randint(1, 3), rnd.randint(35, 250)
+    precio = rnd.randint(8, 60) * 100
+    moneda = "S/" if rnd.random() < 0.8 else "US$"
+    zona = rnd.choice(_DISTRITOS)
+    titulo = f"Departamento en alquiler en {zona} con vista {i}"
+    desc = f"Bonito departamento de {dorm} dormitorios, {banos} baños y {m2} m² en {zona}. " * 3
+    if source == "nestoria":
+        return (f'<li class="rating__new"><a class="results__link" data-href="/detalle/{i}" href="/detalle/{i}">'
+                f'<div class="listing__title"><span class="listing__title__text">{titulo}</span></div></a>'
+                f'<div class="result__details__price"><span>{moneda} {precio:,}</span></div>'
+                f'<ul><li>{dorm} dormitorios</li><li>{banos} baños</li><li>{m2} m²</li></ul>'
+                f'<p class="listing__description">{desc}</p></li>')
+    if source == "infocasas":
+        # Algunas cards traen el número después de la unidad (se clasifican por tag, no por "número unidad")
+        dorm_tag = f"Dorms.: {dorm}" if i % 4 == 0 else f"{dorm} Dorms."
+        return (f'<div class="listingCard"><a href="/propiedad/{i}"><h2 class="lc-title">{titulo}</h2></a>'
+                f'<div class="lc-price"><p class="main-price">{moneda} {precio:,}</p></div>'
+                f'<strong class="lc-location">{zona}, Lima</strong>'
+                f'<div class="lc-typologyTag"><span class="lc-typologyTag__item"><strong>{dorm_tag}</strong></span>'
+                f'<span class="lc-typologyTag__item"><strong>{banos} Baños</strong></span>'
+                f'<span class="lc-typologyTag__item"><strong>{m2} m²</strong></span></div>'
+                f'<p class="lc-description">{desc}</p>'
+                f'<div class="cardImageGallery"><div class="gallery-image"><img src="//cdn.infocasas.test/{i}.jpg"></div></div></div>')
+    if source == "urbania":
+        span = "postingMainFeatures-module__posting-main-features-span"
+        m2_tag = f"m² tot. {m2}" if i % 4 == 0 else f"{m2} m² tot."
+        return (f'<div data-qa="posting PROPERTY"><h2><a href="/inmueble/{i}">{titulo}</a></h2>'
+                f'<div class="postingPrices-module__price">{moneda} {precio:,}</div>'
+                f'<span class="{span}">{m2_tag}</span><span class="{span}">{dorm} dorm.</span>'
+                f'<span class="{span}">{banos} baños</span><p>{desc}</p>'
+                f'<img src="https://img.urbania.test/{i}.jpg"></div>')
+    if source == "properati":
+        return (f'<article><a class="title" href="/detalle/{i}">{titulo}</a>'
+                f'<div class="price">{moneda} {precio:,}</div>'
+                f'<span class="properties__bedrooms">{dorm} dormitorios</span>'
+                f'<span class="properties__bathrooms">{banos} baños</span>'
+                f'<span class="properties__area">{m2} m²</span>'
+                f'<img src="https://img.properati.test/{i}.jpg"></article>')
+    if source == "doomos":
+        return (f'<div class="content_result"><div class="content_result_titulo"><a href="/anuncio/{i}">{titulo}</a></div>'
+                f'<div class="content_result_precio">{moneda} {precio:,}</div>'
+                f'<div class="content_result_descripcion">{desc}</div>'
+                f'<img class="content_result_image" src="//img.doomos.test/{i}.jpg"></div>')
+    raise ValueError(source)
+
+
+def synthetic_page(source: str, n_cards: int = 40, seed: int = 0, page: int = 1, pages: int = 1) -> str:
+    """
+    Página de resultados. Con pages > 1 es la página `page` de un listado paginado:
+    cards con otros links y un link "siguiente" (como Urbania) salvo en la última.
+    """
+    rnd = random.Random(f"{source}-{seed}" if page == 1 else f"{source}-{seed}-{page}")
+    offset = (page - 1) * n_cards
+    cards = "".join(_card(source, offset + i, rnd) for i in range(n_cards))
+    if source == "nestoria":
+        cards = f'<ul id="main__listing_res">{cards}</ul>'
+    pager = f'<a rel="next" href="?page={page + 1}">Siguiente</a>' if page < pages else ""
+    return (f"<html><head><title>{source}</title>{_FILLER}</head><body>{_nav()}<main>{cards}</main>"
+            f"{pager}{_FILLER}</body></html>")
+
+
+def synthetic_detail(source: str, i: int) -> str:
+    """Página de detalle de un anuncio (Nestoria: la imagen principal solo está aquí)."""
+    return (f"<html><head><title>{source} {i}</title>{_FILLER}</head><body>{_nav()}"
+            f'<div class="photos"><div class="swiper-slide">'
+            f'<img data-element="main-swiper-slide" src="//img.{source}.test/detalle/{i}.jpg"></div></div>'
+            f"<p>Detalle del anuncio {i}.</p>{_FILLER}</body></html>")
+
+
+def load_page(source: str, fixtures_dir: str = FIXTURES_DIR, n_cards: int = 40) -> str:
+    path = os.path.join(fixtures_dir, f"{source}.html")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return synthetic_page(source, n_cards)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local que reproduce las páginas de cada fuente, para medir los
+scrapers sin tocar los sitios reales (y sin red).
+
+Cada fuente tiene su propio servidor en 127.0.0.1 (un puerto por fuente, así los
+links relativos a la raíz y la paginación resuelven igual que en el sitio) y los
+scrapers se apuntan a él con SOURCE_BASE_URLS (<FUENTE>_BASE_URL).
+
+Qué sirve para cada pedido:
+1. la página grabada para esa ruta exacta (fixtures/replay/<fuente>/index.json);
+2. si la fuente no tiene grabación, una página sintética de benchmarks/fixtures:
+   listado (Urbania paginado con ?page=N), o detalle para /detalle/<n> de Nestoria.
+
+Grabar (necesita red): el servidor hace de proxy hacia el sitio real, guarda cada
+respuesta y quita el dominio real de los links para que la reproducción no salga
+del servidor local:
+
+    python benchmarks/replay.py --record --zona miraflores
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from benchmarks.fixtures import FIXTURES_DIR, SOURCES, synthetic_detail, synthetic_page  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+REPLAY_DIR = os.path.join(FIXTURES_DIR, "replay")
+# Fuentes cuyo listado sintético se sirve en varias páginas
+PAGINATED = ("urbania",)
+_DETAIL_RE = re.compile(r"/detalle/(\d+)")
+
+
+def base_url_env(source: str) -> str:
+    """Variable de entorno que fija la URL base de la fuente (ver config.SOURCE_BASE_URLS)."""
+    return f"{source.upper()}_BASE_URL"
+
+
+class Recording:
+    """Páginas grabadas de una fuente: ruta pedida (path?query) -> archivo HTML."""
+
+    def __init__(self, source: str, root: str = REPLAY_DIR):
+        self.source = source
+        self.dir = os.path.join(root, source)
+        self.index_path = os.path.join(self.dir, "index.json")
+        self._lock = threading.Lock()
+        self.meta = {"source": source, "pages": {}}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+
+    def __bool__(self) -> bool:
+        return bool(self.meta["pages"])
+
+    def get(self, key: str) -> Optional[bytes]:
+        name = self.meta["pages"].get(key)
+        if name is None:
+            return None
+        with open(os.path.join(self.dir, name), "rb") as f:
+            return f.read()
+
+    def save(self, key: str, body: bytes, **meta):
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".html"
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            with open(os.path.join(self.dir, name), "wb") as f:
+                f.write(body)
+            self.meta["pages"][key] = name
+            self.meta.update(meta)
+            self._write_index()
+
+    def set_meta(self, **meta):
+        """Datos de la grabación (zona buscada, sitio de origen) que lee el benchmark."""
+        with self._lock:
+            self.meta.update(meta)
+            if self.meta["pages"]:
+                self._write_index()
+
+    def _write_index(self):
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+class ReplayServer:
+    """
+    Servidor de una fuente en un hilo aparte. `latency` agrega una espera por pedido
+    (segundos) para simular la red; `upstream` activa la grabación contra el sitio real.
+    """
+
+    def __init__(self, source: str, cards: int = 40, pages: int = 3, latency: float = 0.0,
+                 recordings: str = REPLAY_DIR, upstream: Optional[str] = None):
+        self.source = source
+        self.cards = cards
+        self.pages = pages if source in PAGINATED else 1
+        self.latency = latency
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recording = Recording(source, recordings)
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def mode(self) -> str:
+        if self.upstream:
+            return "grabando"
+        return "grabado" if self.recording else "sintético"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True,
+                                        name=f"replay-{self.source}")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _synthetic(self, path: str, query: str) -> bytes:
+        m = _DETAIL_RE.search(path)
+        if m and self.source == "nestoria":
+            return synthetic_detail(self.source, int(m.group(1))).encode("utf-8")
+        page = parse_qs(query).get("page", ["1"])[0]
+        page = int(page) if page.isdigit() else 1
+        if page > self.pages:
+            return synthetic_page(self.source, 0).encode("utf-8")
+        return synthetic_page(self.source, self.cards, page=page, pages=self.pages).encode("utf-8")
+
+    def _record(self, key: str) -> Optional[bytes]:
+        import requests
+
+        r = requests.get(self.upstream + key, headers={"User-Agent": config.COMMON_UA}, timeout=30)
+        if r.status_code != 200:
+            logger.warning(f"{self.source}: {key} respondió {r.status_code}, no se graba")
+            return None
+        # Links absolutos al sitio real -> relativos a la raíz (se resuelven contra el servidor local)
+        body = r.text.replace(self.upstream, "").encode("utf-8")
+        self.recording.save(key, body, upstream=self.upstream)
+        return body
+
+    def respond(self, raw_path: str) -> Optional[bytes]:
+        """Cuerpo para un pedido (None = 404)."""
+        parts = urlsplit(raw_path)
+        key = parts.path + (f"?{parts.query}" if parts.query else "")
+        body = self.recording.get(key)
+        if body is None and self.upstream:
+            body = self._record(key)
+        if body is None and not self.recording:
+            body = self._synthetic(parts.path, parts.query)
+        return body
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                try:
+                    body = server.respond(self.path)
+                except Exception as e:
+                    logger.error(f"replay {server.source}: {self.path}: {e}")
+                    body = None
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def start_servers(sources=SOURCES, **kwargs) -> Dict[str, ReplayServer]:
+    return {source: ReplayServer(source, **kwargs).start() for source in sources}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("sources", nargs="*", default=list(SOURCES))
+    ap.add_argument("--record", action="store_true", help="Grabar desde los sitios reales (necesita red)")
+    ap.add_argument("--zona", default="miraflores", help="Zona a buscar al grabar")
+    ap.add_argument("--dir", default=REPLAY_DIR, help="Directorio de grabaciones")
+    args = ap.parse_args()
+
+    if not args.record:
+        servers = start_servers(args.sources, recordings=args.dir)
+        for source, server in servers.items():
+            print(f"{base_url_env(source)}={server.url}  # {server.mode}")
+        print("Ctrl+C para terminar")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return 0
+
+    # Grabación: cada scraper corre contra su servidor, que pide al sitio real y guarda
+    servers = {s: ReplayServer(s, recordings=args.dir, upstream=config.SOURCE_BASE_URLS[s]).start()
+               for s in args.sources}
+    for source, server in servers.items():
+        config.SOURCE_BASE_URLS[source] = server.url
+    import scraper
+
+    for source, server in servers.items():
+        listings, info = scraper.scrape_source(source, args.zona)
+        server.recording.set_meta(zona=args.zona)
+        print(f"{source}: {len(server.recording.meta['pages'])} páginas grabadas, {info['encontrados']} anuncios")
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
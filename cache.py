@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de resultados de búsqueda (TTL + LRU) delante de /search.
+- La clave son los parámetros de SearchRequest normalizados.
+- Las entradas vencidas se siguen sirviendo durante `stale_ttl` segundos
+  mientras se refrescan en segundo plano (stale-while-revalidate).
+- Límite por número de entradas y por memoria aproximada.
+"""
+import sys
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import config
+from keywords import parse_keywords
+from listing import Listing
+
+logger = logging.getLogger(__name__)
+
+
+def _norm_text(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower()).encode("ASCII", "ignore").decode("utf-8")
+    return " ".join(text.split())
+
+
+def _norm_count(value) -> str:
+    s = str(value if value is not None else "").strip()
+    return str(int(s)) if s.isdigit() else "0"
+
+
+def _norm_price(value) -> Optional[int]:
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def search_cache_key(zona="", dormitorios="0", banos="0", price_min=None, price_max=None, palabras_clave="") -> tuple:
+    """Clave canónica: misma búsqueda escrita distinto -> misma entrada."""
+    zona_key = _norm_text(zona) or "lima"  # run_scrapers usa "Lima" si no hay zona
+    palabras = parse_keywords(palabras_clave).canonical()
+    return (zona_key, _norm_count(dormitorios), _norm_count(banos),
+            _norm_price(price_min), _norm_price(price_max), palabras)
+
+
+def _estimate_size(value) -> int:
+    """Tamaño aproximado en bytes de una lista de propiedades (Listing o dicts de strings)."""
+    if isinstance(value, list):
+        size = sys.getsizeof(value)
+        for item in value:
+            if isinstance(item, Listing):
+                size += sys.getsizeof(item)
+                for attr in Listing.__slots__:
+                    size += sys.getsizeof(getattr(item, attr))
+            elif isinstance(item, dict):
+                size += sys.getsizeof(item)
+                for k, v in item.items():
+                    size += sys.getsizeof(k) + sys.getsizeof(v)
+            else:
+                size += sys.getsizeof(item)
+        return size
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "size")
+
+    def __init__(self, value, size: int):
+        self.value = value
+        self.stored_at = time.monotonic()
+        self.size = size
+
+
+class SearchCache:
+    def __init__(self, ttl: float = 600, stale_ttl: float = 1800, max_entries: int = 256,
+                 max_bytes: int = 64 * 1024 * 1024, enabled: bool = True):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+                       "refresh_errors": 0, "evictions": 0}
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get(self, key):
+        """Devuelve (valor, estado) con estado "fresh", "stale" o None si no hay entrada usable."""
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None, None
+            age = time.monotonic() - entry.stored_at
+            if age > self.ttl + self.stale_ttl:
+                self._remove(key)
+                return None, None
+            self._data.move_to_end(key)
+            return entry.value, ("fresh" if age <= self.ttl else "stale")
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        size = _estimate_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # no cabe ni sola: no se guarda
+        with self._lock:
+            self._remove(key)
+            self._data[key] = _Entry(value, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries
+                                  or (self.max_bytes and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def _refresh(self, key, compute: Callable):
+        try:
+            self.set(key, compute())
+            self._stats["refreshes"] += 1
+        except Exception as e:
+            self._stats["refresh_errors"] += 1
+            logger.error(f"Error refrescando caché para {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def refresh_in_background(self, key, compute: Callable) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, compute), daemon=True,
+                         name="search-cache-refresh").start()
+        return True
+
+    def lookup(self, key, compute: Optional[Callable] = None):
+        """
+        Como get() pero contabiliza hit/miss; si la entrada está vencida y se pasa
+        `compute`, la devuelve igual y la refresca en segundo plano.
+        """
+        value, state = self.get(key)
+        if state == "fresh":
+            self._stats["hits"] += 1
+        elif state == "stale":
+            self._stats["stale_hits"] += 1
+            if compute is not None:
+                self.refresh_in_background(key, compute)
+        else:
+            self._stats["misses"] += 1
+        return value, state
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "refreshing": len(self._refreshing),
+                "hit_ratio": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+                **self._stats,
+            }
+
+
+SEARCH_CACHE = SearchCache(
+    ttl=config.SEARCH_CACHE_TTL,
+    stale_ttl=config.SEARCH_CACHE_STALE_TTL,
+    max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=int(config.SEARCH_CACHE_MAX_MB * 1024 * 1024),
+    enabled=config.SEARCH_CACHE_ENABLED,
+)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Compresión de respuestas negociada con Accept-Encoding (zstd, br o gzip).
+Los resultados son arreglos JSON grandes de texto repetitivo en español: se
+comprimen muy bien y en conexiones móviles lentas la transferencia pesa más que
+el CPU de comprimir.
+
+- Respuestas completas (/search, /listings, jobs): se comprimen de una vez si
+  superan COMPRESSION_MIN_SIZE; las chicas salen tal cual.
+- Respuestas en streaming (/search/stream): se comprimen por partes, con un
+  flush en cada evento para que el cliente reciba cada línea NDJSON apenas sale.
+- Solo tipos de texto (JSON, NDJSON, text/*); nada que ya venga comprimido.
+
+zstd (paquete zstandard) y br (brotli) son opcionales: si no están instalados no
+se ofrecen y se usa gzip (zlib, siempre disponible). COMPRESSION_ENCODINGS fija
+el orden de preferencia del servidor cuando el cliente acepta varias.
+"""
+import time
+import zlib
+import logging
+import threading
+from typing import List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    brotli = None
+    HAS_BROTLI = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+ENCODINGS = ("zstd", "br", "gzip")
+_AVAILABLE = {"zstd": HAS_ZSTD, "br": HAS_BROTLI, "gzip": True}
+_COMPRESSIBLE = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = cabecera gzip
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH: lo comprimido hasta acá se puede descomprimir sin esperar al resto
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+_STREAMS = {"gzip": _GzipStream, "br": _BrotliStream, "zstd": _ZstdStream}
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict:
+    """{"gzip": 1.0, "br": 0.9, ...} desde Accept-Encoding (q=0 = no aceptada)."""
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+class Compression:
+    """Negociación, compresores y contadores (para /compression/stats)."""
+
+    def __init__(self, enabled: bool = True, min_size: int = 1024, encodings: Optional[List[str]] = None,
+                 levels: Optional[dict] = None):
+        self.enabled = enabled
+        self.min_size = max(0, min_size)
+        wanted = [e for e in (encodings or ENCODINGS) if e in ENCODINGS]
+        for name in wanted:
+            if not _AVAILABLE[name]:
+                logger.info(f"Compresión '{name}' no disponible (falta el paquete), no se ofrece")
+        self.encodings = [e for e in wanted if _AVAILABLE[e]]
+        self.levels = {"gzip": 5, "br": 4, "zstd": 3, **(levels or {})}
+        self._lock = threading.Lock()
+        self._stats = {"compressed": 0, "streams": 0, "skipped_small": 0, "bytes_in": 0, "bytes_out": 0,
+                       "seconds": 0.0, "by_encoding": {e: 0 for e in self.encodings}}
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Mejor codificación aceptada por el cliente (mayor q; a igual q, la preferida del servidor)."""
+        if not self.enabled or not self.encodings:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        star = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for name in self.encodings:
+            q = accepted.get(name, star)
+            if q > best_q:
+                best, best_q = name, q
+        return best
+
+    def compressible(self, content_type: str) -> bool:
+        return content_type.lower().startswith(_COMPRESSIBLE)
+
+    def stream(self, encoding: str):
+        return _STREAMS[encoding](self.levels[encoding])
+
+    def compress(self, encoding: str, data: bytes) -> bytes:
+        """Cuerpo completo comprimido de una vez."""
+        start = time.perf_counter()
+        level = self.levels[encoding]
+        if encoding == "gzip":
+            obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            out = obj.compress(data) + obj.flush()
+        elif encoding == "br":
+            out = brotli.compress(data, quality=level)
+        else:
+            out = zstandard.ZstdCompressor(level=level).compress(data)
+        self.record(encoding, len(data), len(out), time.perf_counter() - start)
+        return out
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float, stream: bool = False):
+        with self._lock:
+            self._stats["streams" if stream else "compressed"] += 1
+            self._stats["by_encoding"][encoding] += 1
+            self._stats["bytes_in"] += bytes_in
+            self._stats["bytes_out"] += bytes_out
+            self._stats["seconds"] += seconds
+
+    def skipped_small(self):
+        with self._lock:
+            self._stats["skipped_small"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats, by_encoding=dict(self._stats["by_encoding"]))
+        return {
+            "enabled": self.enabled,
+            "encodings": self.encodings,
+            "levels": {e: self.levels[e] for e in self.encodings},
+            "min_size": self.min_size,
+            **{k: v for k, v in s.items() if k != "seconds"},
+            "ratio": round(s["bytes_out"] / s["bytes_in"], 4) if s["bytes_in"] else None,
+            "ms_total": round(s["seconds"] * 1000, 1),
+        }
+
+
+COMPRESSION = Compression(
+    enabled=config.COMPRESSION_ENABLED,
+    min_size=config.COMPRESSION_MIN_SIZE,
+    encodings=config.COMPRESSION_ENCODINGS,
+    levels={"gzip": config.COMPRESSION_GZIP_LEVEL, "br": config.COMPRESSION_BROTLI_LEVEL,
+            "zstd": config.COMPRESSION_ZSTD_LEVEL},
+)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI: decide al ver la cabecera y el primer trozo del cuerpo. Si el
+    cuerpo llega entero se comprime de una vez (o se deja si es chico); si viene
+    en partes (more_body) se comprime cada parte a medida que sale.
+    """
+
+    def __init__(self, app, compression: Optional[Compression] = None):
+        self.app = app
+        self.compression = compression or COMPRESSION
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = self.compression.negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, self.compression, encoding)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app, compression: Compression, encoding: str):
+        self.app = app
+        self.compression = compression
+        self.encoding = encoding
+        self.start_message = None
+        self.active = None  # None = aún no se decidió; False = sin comprimir
+        self.stream = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.on_send)
+
+    async def on_send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = {k.lower(): v for k, v in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            if (message["status"] < 200 or message["status"] in (204, 304)
+                    or b"content-encoding" in headers or not self.compression.compressible(content_type)):
+                self.active = False
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.active is False:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.active is None:
+            if not more_body:
+                # Respuesta completa en un solo mensaje
+                if len(body) < self.compression.min_size:
+                    self.compression.skipped_small()
+                    await self.send(self._start(None, encoded=False))
+                    await self.send(message)
+                    return
+                compressed = self.compression.compress(self.encoding, body)
+                await self.send(self._start(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.active = True
+            self.stream = self.compression.stream(self.encoding)
+            await self.send(self._start(None))
+
+        start = time.perf_counter()
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        self.seconds += time.perf_counter() - start
+        self.bytes_in += len(body)
+        self.bytes_out += len(chunk)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if not more_body:
+            self.compression.record(self.encoding, self.bytes_in, self.bytes_out, self.seconds, stream=True)
+
+    def _start(self, length: Optional[int], encoded: bool = True) -> dict:
+        """
+        Cabecera original con Vary: Accept-Encoding y, si se comprime, Content-Encoding y
+        el nuevo largo (sin largo en streaming).
+        """
+        headers = list(self.start_message.get("headers", []))
+        vary = b", ".join(v for k, v in headers if k.lower() == b"vary")
+        if b"accept-encoding" not in vary.lower():
+            headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+            headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if encoded:
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-encoding")]
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+            if length is not None:
+                headers.append((b"content-length", str(length).encode("latin-1")))
+        return {**self.start_message, "headers": headers}
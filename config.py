@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Configuración del scraper leída desde variables de entorno (o un archivo .env).
+Todos los valores tienen un valor por defecto razonable para desarrollo local.
+"""
+import os
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "si", "sí", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    try:
+        return int(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return value.strip() if value and value.strip() else default
+
+
+COMMON_UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
+
+# -------------------- Ejecución de scrapers --------------------
+# Ejecutar las fuentes en paralelo dentro de run_scrapers
+SCRAPER_PARALLEL = _env_bool("SCRAPER_PARALLEL", True)
+# "thread" o "process"
+SCRAPER_EXECUTOR = _env_str("SCRAPER_EXECUTOR", "thread").lower()
+# Número máximo de fuentes ejecutándose a la vez (0 = una por fuente)
+SCRAPER_MAX_WORKERS = _env_int("SCRAPER_MAX_WORKERS", 0)
+
+# -------------------- Pool de Chrome --------------------
+DRIVER_POOL_ENABLED = _env_bool("DRIVER_POOL_ENABLED", True)
+DRIVER_POOL_MIN = _env_int("DRIVER_POOL_MIN", 0)
+DRIVER_POOL_MAX = _env_int("DRIVER_POOL_MAX", 4)
+# Reciclar un navegador tras N préstamos o si supera este RSS (MB, 0 = sin límite)
+DRIVER_MAX_USES = _env_int("DRIVER_MAX_USES", 50)
+DRIVER_MAX_RSS_MB = _env_float("DRIVER_MAX_RSS_MB", 1500)
+DRIVER_ACQUIRE_TIMEOUT = _env_float("DRIVER_ACQUIRE_TIMEOUT", 120)
+
+# -------------------- Imágenes de detalle (Nestoria) --------------------
+# "deadline": se resuelven en paralelo y se espera como máximo IMAGE_DEADLINE segundos
+# "lazy": no se resuelven en la búsqueda; el frontend las pide a GET /image?link=...
+# "off": no se buscan imágenes de detalle
+NESTORIA_IMAGE_MODE = _env_str("NESTORIA_IMAGE_MODE", "deadline").lower()
+IMAGE_DEADLINE = _env_float("IMAGE_DEADLINE", 8)
+IMAGE_MAX_CONNECTIONS = _env_int("IMAGE_MAX_CONNECTIONS", 16)
+IMAGE_FETCH_TIMEOUT = _env_float("IMAGE_FETCH_TIMEOUT", 10)
+IMAGE_CACHE_SIZE = _env_int("IMAGE_CACHE_SIZE", 5000)
+IMAGE_CACHE_TTL = _env_float("IMAGE_CACHE_TTL", 6 * 3600)
+
+# -------------------- Caché de búsquedas --------------------
+SEARCH_CACHE_ENABLED = _env_bool("SEARCH_CACHE_ENABLED", True)
+# Segundos que un resultado se considera fresco
+SEARCH_CACHE_TTL = _env_float("SEARCH_CACHE_TTL", 600)
+# Segundos extra durante los que se sirve vencido mientras se refresca en segundo plano
+SEARCH_CACHE_STALE_TTL = _env_float("SEARCH_CACHE_STALE_TTL", 1800)
+SEARCH_CACHE_MAX_ENTRIES = _env_int("SEARCH_CACHE_MAX_ENTRIES", 256)
+SEARCH_CACHE_MAX_MB = _env_float("SEARCH_CACHE_MAX_MB", 64)
+
+# -------------------- Ejecutor de búsquedas --------------------
+# Scrapes simultáneos (cada uno abre varios navegadores)
+SEARCH_MAX_CONCURRENCY = _env_int("SEARCH_MAX_CONCURRENCY", 2)
+# Scrapes distintos que pueden esperar en cola antes de responder 503
+SEARCH_MAX_QUEUE = _env_int("SEARCH_MAX_QUEUE", 8)
+# Retry-After (segundos) cuando aún no hay tiempos medidos
+SEARCH_RETRY_AFTER = _env_int("SEARCH_RETRY_AFTER", 30)
+
+# -------------------- Búsquedas asíncronas (jobs) --------------------
+JOBS_WORKERS = _env_int("JOBS_WORKERS", 1)
+# Jobs en cola antes de responder 503
+JOBS_MAX_QUEUE = _env_int("JOBS_MAX_QUEUE", 50)
+# Jobs terminados que se conservan (y cuánto tiempo, en segundos) para consultar resultados
+JOBS_MAX_RETAINED = _env_int("JOBS_MAX_RETAINED", 200)
+JOBS_TTL = _env_float("JOBS_TTL", 3600)
+
+# -------------------- Almacén de anuncios (SQLite) --------------------
+STORE_ENABLED = _env_bool("STORE_ENABLED", True)
+STORE_PATH = _env_str("STORE_PATH", "listings.db")
+# Filas por transacción en los upserts
+STORE_BATCH_SIZE = _env_int("STORE_BATCH_SIZE", 500)
+
+# -------------------- URLs base de cada fuente --------------------
+# Se pueden apuntar a un servidor local de fixtures para pruebas y benchmarks
+SOURCE_BASE_URLS = {
+    "nestoria": _env_str("NESTORIA_BASE_URL", "https://www.nestoria.pe").rstrip("/"),
+    "infocasas": _env_str("INFOCASAS_BASE_URL", "https://www.infocasas.com.pe").rstrip("/"),
+    "urbania": _env_str("URBANIA_BASE_URL", "https://urbania.pe").rstrip("/"),
+    "properati": _env_str("PROPERATI_BASE_URL", "https://www.properati.com.pe").rstrip("/"),
+    "doomos": _env_str("DOOMOS_BASE_URL", "http://www.doomos.com.pe").rstrip("/"),
+}
+
+# -------------------- Pre-crawler de distritos --------------------
+CRAWLER_ENABLED = _env_bool("CRAWLER_ENABLED", False)
+# Segundos entre corridas completas
+CRAWLER_INTERVAL = _env_float("CRAWLER_INTERVAL", 6 * 3600)
+# Pares (fuente, distrito) scrapeándose a la vez
+CRAWLER_CONCURRENCY = _env_int("CRAWLER_CONCURRENCY", 2)
+# Fuentes a recorrer, separadas por coma (vacío = todas)
+CRAWLER_SOURCES = [s.strip() for s in _env_str("CRAWLER_SOURCES", "").split(",") if s.strip()]
+# /search responde desde el almacén si la zona se recorrió hace menos de estas horas (0 = nunca)
+CRAWLER_FRESHNESS_HOURS = _env_float("CRAWLER_FRESHNESS_HOURS", 12)
+# Modo incremental: detener paginación/scroll cuando una página trae casi solo anuncios ya vistos
+CRAWLER_INCREMENTAL = _env_bool("CRAWLER_INCREMENTAL", True)
+INCREMENTAL_STOP_RATIO = _env_float("INCREMENTAL_STOP_RATIO", 0.8)
+# Horas tras las que el modo incremental vuelve a recorrer todo (fuente, distrito): el
+# incremental no llega a los anuncios viejos, y solo un recorrido completo les renueva last_seen
+CRAWLER_FULL_EVERY_HOURS = _env_float("CRAWLER_FULL_EVERY_HOURS", 24)
+# /search desde el almacén: solo anuncios vistos en las últimas N horas (los que se despublicaron
+# dejan de aparecer). Por defecto cubre la frescura de la zona más, en modo incremental, el
+# tiempo entre recorridos completos (los únicos que renuevan last_seen de todos)
+CRAWLER_LISTING_MAX_AGE_HOURS = _env_float(
+    "CRAWLER_LISTING_MAX_AGE_HOURS",
+    CRAWLER_FRESHNESS_HOURS + (CRAWLER_FULL_EVERY_HOURS if CRAWLER_INCREMENTAL else 0),
+)
+
+# -------------------- Descarga de listados (HTTP primero) --------------------
+# Intentar primero un GET simple y abrir Chrome solo si el HTML no trae las cards
+FETCH_HTTP_FIRST = _env_bool("FETCH_HTTP_FIRST", True)
+# Segundos tras los que una fuente marcada "navegador" vuelve a probarse por HTTP
+FETCH_REPROBE_INTERVAL = _env_float("FETCH_REPROBE_INTERVAL", 3600)
+FETCH_HTTP_TIMEOUT = _env_float("FETCH_HTTP_TIMEOUT", 15)
+# Fuentes que prueban HTTP: las que traen el listado completo en el HTML y paginan con links.
+# Nestoria, InfoCasas y Doomos completan el listado con scroll: por HTTP traerían menos cards
+FETCH_HTTP_SOURCES = [s.strip() for s in _env_str("FETCH_HTTP_SOURCES", "urbania").split(",") if s.strip()]
+
+# -------------------- Cliente HTTP compartido --------------------
+# Hosts con pool propio que se mantienen abiertos y conexiones keep-alive por host
+HTTP_POOL_HOSTS = _env_int("HTTP_POOL_HOSTS", 16)
+HTTP_POOL_MAXSIZE = _env_int("HTTP_POOL_MAXSIZE", 16)
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 15)
+# Reintentos ante errores de conexión y respuestas 429/5xx (con backoff exponencial y jitter)
+HTTP_RETRIES = _env_int("HTTP_RETRIES", 3)
+HTTP_BACKOFF = _env_float("HTTP_BACKOFF", 0.5)
+HTTP_BACKOFF_JITTER = _env_float("HTTP_BACKOFF_JITTER", 0.3)
+HTTP_BACKOFF_MAX = _env_float("HTTP_BACKOFF_MAX", 10)
+
+# -------------------- Parser HTML --------------------
+# "html.parser" (puro Python, siempre disponible), "lxml" o "selectolax" (más rápidos,
+# requieren el paquete instalado; si falta se usa html.parser)
+HTML_PARSER = _env_str("HTML_PARSER", "html.parser").lower()
+
+# -------------------- Arranque (warm-up) --------------------
+# Precalentar al arrancar la API (importar scrapers, resolver chromedriver, levantar Chrome);
+# mientras dura, /health responde 503 "starting"
+STARTUP_WARMUP = _env_bool("STARTUP_WARMUP", False)
+STARTUP_RESOLVE_DRIVER = _env_bool("STARTUP_RESOLVE_DRIVER", True)
+# Navegadores que se dejan levantados en el pool durante el warm-up
+STARTUP_WARM_BROWSERS = _env_int("STARTUP_WARM_BROWSERS", DRIVER_POOL_MIN)
+# Tope del warm-up en segundos: al vencer, /health pasa a listo aunque no haya terminado
+STARTUP_WARMUP_TIMEOUT = _env_float("STARTUP_WARMUP_TIMEOUT", 120)
+
+# -------------------- Duplicados entre fuentes --------------------
+# Junta el mismo inmueble publicado en varias fuentes (precio, m², dormitorios y título parecidos)
+DEDUP_NEAR = _env_bool("DEDUP_NEAR", True)
+# Diferencia de precio admitida (fracción) y de m² (absoluta)
+DEDUP_PRICE_TOLERANCE = _env_float("DEDUP_PRICE_TOLERANCE", 0.03)
+DEDUP_M2_TOLERANCE = _env_int("DEDUP_M2_TOLERANCE", 3)
+# Parecido mínimo de títulos (Jaccard de palabras informativas, 0-1; además deben compartir 2 o más)
+DEDUP_MIN_SIMILARITY = _env_float("DEDUP_MIN_SIMILARITY", 0.5)
+# Con títulos genéricos se comparan las descripciones: fracción de la más corta contenida en la otra
+DEDUP_MIN_DESCRIPTION_SIMILARITY = _env_float("DEDUP_MIN_DESCRIPTION_SIMILARITY", 0.6)
+DEDUP_MAX_CANDIDATES = _env_int("DEDUP_MAX_CANDIDATES", 32)
+
+# -------------------- Compresión de respuestas --------------------
+COMPRESSION_ENABLED = _env_bool("COMPRESSION_ENABLED", True)
+# Respuestas más chicas que esto (bytes) salen sin comprimir; el streaming siempre se comprime
+COMPRESSION_MIN_SIZE = _env_int("COMPRESSION_MIN_SIZE", 1024)
+# Preferencia del servidor cuando el cliente acepta varias (zstd y br solo si están instalados)
+COMPRESSION_ENCODINGS = [e.strip().lower() for e in _env_str("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+                         if e.strip()]
+# Niveles: bajos a propósito, la latencia de comprimir cuenta tanto como los bytes
+COMPRESSION_GZIP_LEVEL = _env_int("COMPRESSION_GZIP_LEVEL", 5)
+COMPRESSION_BROTLI_LEVEL = _env_int("COMPRESSION_BROTLI_LEVEL", 4)
+COMPRESSION_ZSTD_LEVEL = _env_int("COMPRESSION_ZSTD_LEVEL", 3)
+
+# -------------------- Respuestas JSON --------------------
+# "orjson" (más rápido, requiere el paquete), "pydantic" (pydantic_core) o "json";
+# si el elegido no está instalado se usa el siguiente
+JSON_ENCODER = _env_str("JSON_ENCODER", "orjson").lower()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-crawler: recorre todos los distritos conocidos en cada fuente con una
+cadencia configurable y guarda los anuncios en el almacén local, para que las
+búsquedas de los usuarios lean datos ya recolectados en vez de scrapear en frío.
+
+Uso como CLI:
+    python crawler.py --once
+    python crawler.py --sources urbania,properati --districts miraflores,barranco
+    python crawler.py --interval 3600 --concurrency 2
+    python crawler.py --once --full   # ignora la marca de agua incremental
+
+El modo incremental corta en los anuncios ya conocidos, así que no renueva el
+last_seen de los que siguen publicados más abajo: cada CRAWLER_FULL_EVERY_HOURS
+el par (fuente, distrito) se recorre completo.
+"""
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+import config
+from store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+class Crawler:
+    def __init__(self, sources: Optional[List[str]] = None, districts: Optional[List[str]] = None,
+                 concurrency: int = 2, interval: float = 6 * 3600, incremental: bool = True,
+                 full_every_hours: float = 24):
+        self.sources = sources or []
+        self.incremental = incremental
+        self.full_every_hours = full_every_hours
+        self.districts = districts or []
+        self.concurrency = max(1, concurrency)
+        self.interval = interval
+        self.last_run = None
+        self.next_run_at = None
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _targets(self):
+        # 👇 Import perezoso: selenium solo cuando realmente se recorre
+        from scraper import SCRAPERS, KNOWN_DISTRICTS
+
+        names = [name for name, _ in SCRAPERS]
+        sources = [s for s in self.sources if s in names] if self.sources else names
+        districts = self.districts or KNOWN_DISTRICTS
+        return [(source, district) for district in districts for source in sources]
+
+    def _crawl_one(self, source: str, district: str) -> dict:
+        from scraper import scrape_source
+
+        store = get_store()
+        options = {}
+        if self.incremental and store is not None and self._full_is_recent(store, source, district):
+            # Solo se trae el delta: el scraper se detiene al llegar a anuncios ya vistos
+            options["known_links"] = store.known_links(source, district)
+        listings, info = scrape_source(source, district, **options)
+        full = "known_links" not in options
+        if store is not None:
+            store.upsert(listings, district)
+            store.mark_seen(source, district, (l.link for l in listings))
+            # Una fuente que falló (bloqueada, timeout, Chrome caído) no deja la zona como fresca
+            store.record_crawl(source, district, info["encontrados"], ok=info["error"] is None, full=full)
+        info["conocidos"] = len(options.get("known_links") or ())
+        info["completo"] = full
+        return info
+
+    def _full_is_recent(self, store, source: str, district: str) -> bool:
+        """True si hubo un recorrido completo hace menos de full_every_hours (si no, toca uno)."""
+        full_at = store.full_crawled_at(source, district)
+        return full_at is not None and datetime.now() - full_at < timedelta(hours=self.full_every_hours)
+
+    def run_once(self) -> dict:
+        """Una corrida completa sobre todas las combinaciones fuente × distrito."""
+        if not self._running.acquire(blocking=False):
+            logger.warning("Ya hay una corrida del pre-crawler en curso")
+            return {}
+        try:
+            targets = self._targets()
+            started_at = datetime.now().isoformat()
+            start = time.perf_counter()
+            fuentes = {}
+            errores = anuncios = 0
+            logger.info(f"🕷️ Pre-crawler: {len(targets)} tareas con concurrencia {self.concurrency}")
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawler") as executor:
+                futures = {executor.submit(self._crawl_one, source, district): (source, district)
+                           for source, district in targets}
+                for future in as_completed(futures):
+                    source, district = futures[future]
+                    stats = fuentes.setdefault(source, {"distritos": 0, "completos": 0, "anuncios": 0, "errores": 0,
+                                                        "segundos": 0.0})
+                    try:
+                        info = future.result()
+                        stats["distritos"] += 1
+                        stats["completos"] += int(info["completo"])
+                        stats["anuncios"] += info["encontrados"]
+                        stats["segundos"] = round(stats["segundos"] + info["segundos"], 2)
+                        anuncios += info["encontrados"]
+                        if info["error"] is not None:
+                            logger.error(f"❌ Pre-crawler {source}/{district}: {info['error']}")
+                            stats["errores"] += 1
+                            errores += 1
+                    except Exception as e:
+                        logger.error(f"❌ Pre-crawler {source}/{district}: {e}")
+                        stats["errores"] += 1
+                        errores += 1
+                        store = get_store()
+                        if store is not None:
+                            store.record_crawl(source, district, 0, ok=False)
+                    if self._stop.is_set():
+                        for f in futures:
+                            f.cancel()
+            run = {
+                "started_at": started_at,
+                "finished_at": datetime.now().isoformat(),
+                "tareas": len(targets),
+                "errores": errores,
+                "anuncios": anuncios,
+                "segundos": round(time.perf_counter() - start, 2),
+                "fuentes": fuentes,
+            }
+            store = get_store()
+            if store is not None:
+                store.record_run(run)
+            self.last_run = run
+            logger.info(f"🕷️ Pre-crawler terminado: {anuncios} anuncios, {errores} errores en {run['segundos']}s")
+            return run
+        finally:
+            self._running.release()
+
+    # -------------------- Planificador en proceso --------------------
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Error en corrida del pre-crawler")
+            self.next_run_at = time.time() + self.interval
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="crawler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        store = get_store()
+        return {
+            "running": self._running.locked(),
+            "scheduled": bool(self._thread and self._thread.is_alive()),
+            "interval": self.interval,
+            "next_run_at": datetime.fromtimestamp(self.next_run_at).isoformat() if self.next_run_at else None,
+            "last_run": self.last_run,
+            "recent_runs": store.recent_runs() if store is not None else [],
+        }
+
+
+CRAWLER = Crawler(
+    sources=config.CRAWLER_SOURCES,
+    concurrency=config.CRAWLER_CONCURRENCY,
+    interval=config.CRAWLER_INTERVAL,
+    incremental=config.CRAWLER_INCREMENTAL,
+    full_every_hours=config.CRAWLER_FULL_EVERY_HOURS,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-crawler de anuncios por distrito")
+    parser.add_argument("--once", action="store_true", help="Hacer una sola corrida y salir")
+    parser.add_argument("--sources", default="", help="Fuentes separadas por coma (por defecto todas)")
+    parser.add_argument("--districts", default="", help="Distritos separados por coma (por defecto todos)")
+    parser.add_argument("--concurrency", type=int, default=config.CRAWLER_CONCURRENCY)
+    parser.add_argument("--interval", type=float, default=config.CRAWLER_INTERVAL,
+                        help="Segundos entre corridas")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignorar la marca de agua y recorrer todas las páginas")
+    args = parser.parse_args()
+
+    crawler = Crawler(
+        sources=[s.strip() for s in args.sources.split(",") if s.strip()] or config.CRAWLER_SOURCES,
+        districts=[d.strip() for d in args.districts.split(",") if d.strip()],
+        concurrency=args.concurrency,
+        interval=args.interval,
+        incremental=config.CRAWLER_INCREMENTAL and not args.full,
+        full_every_hours=config.CRAWLER_FULL_EVERY_HOURS,
+    )
+    if args.once:
+        crawler.run_once()
+        return
+    crawler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        crawler.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
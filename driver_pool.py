@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de instancias de Chrome (Selenium) reutilizables entre búsquedas.
+Cada scraper pide un driver con acquire()/lease() y lo devuelve con release();
+el pool limpia cookies y storage entre préstamos y recicla los navegadores
+que superan N usos o un límite de memoria (RSS).
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: sin él se lee /proc (solo Linux)
+    psutil = None
+
+
+def _proc_children(pid: int):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def _proc_rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """RSS total (MB) de un proceso y todos sus descendientes, o None si no se puede medir."""
+    if not pid:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for p in procs:
+                try:
+                    total += p.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+    total, stack, seen = 0, [pid], set()
+    while stack:
+        p = stack.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        total += _proc_rss_bytes(p)
+        stack.extend(_proc_children(p))
+    return total / (1024 * 1024)
+
+
+def driver_rss_mb(driver) -> Optional[float]:
+    """Memoria usada por chromedriver + Chrome asociados a un driver."""
+    try:
+        pid = driver.service.process.pid
+    except Exception:
+        return None
+    return process_tree_rss_mb(pid)
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "uses", "created_at", "last_used")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class DriverPool:
+    """
+    Pool acotado de drivers.
+    - min_size: drivers que warm() deja levantados de antemano.
+    - max_size: máximo de drivers vivos (prestados + libres); acquire() espera si se alcanza.
+    - max_uses: préstamos tras los cuales un driver se recicla.
+    - max_rss_mb: límite de memoria por navegador; si se supera se recicla.
+    - enabled=False: sin reutilización (cada release cierra el driver), como antes.
+    """
+
+    def __init__(self, factory: Callable, min_size: int = 0, max_size: int = 4, max_uses: int = 50,
+                 max_rss_mb: float = 0, acquire_timeout: float = 120, enabled: bool = True):
+        self.factory = factory
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.max_uses = max(1, max_uses)
+        self.max_rss_mb = max_rss_mb
+        self.acquire_timeout = acquire_timeout
+        self.enabled = enabled
+        self._idle = deque()
+        self._leased = {}
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "recycled": 0, "unhealthy": 0}
+
+    # -------------------- ciclo de vida --------------------
+    def _create(self) -> _PooledDriver:
+        start = time.perf_counter()
+        driver = self.factory()
+        self._stats["created"] += 1
+        logger.info(f"🧭 Nuevo Chrome en el pool ({time.perf_counter() - start:.1f}s)")
+        return _PooledDriver(driver)
+
+    def _destroy(self, entry: _PooledDriver):
+        try:
+            entry.driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, entry: _PooledDriver) -> bool:
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, entry: _PooledDriver) -> bool:
+        """Deja el navegador como nuevo: sin cookies, sin storage, una sola pestaña en about:blank."""
+        driver = entry.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            except Exception:
+                pass
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"No se pudo limpiar el driver, se descarta: {e}")
+            return False
+
+    def _should_recycle(self, entry: _PooledDriver) -> bool:
+        if entry.uses >= self.max_uses:
+            return True
+        if self.max_rss_mb:
+            rss = driver_rss_mb(entry.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"♻️ Chrome supera {self.max_rss_mb:.0f} MB ({rss:.0f} MB), se recicla")
+                return True
+        return False
+
+    # -------------------- API --------------------
+    def acquire(self, timeout: Optional[float] = None):
+        """Presta un driver sano; crea uno nuevo si hay cupo o espera a que se libere alguno."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = None
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("El pool de drivers está cerrado")
+                while not self._idle and self._total >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No hay drivers libres tras {timeout:g}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.popleft()
+                else:
+                    self._total += 1
+            if entry is not None:
+                # Health check fuera del lock: un driver colgado no bloquea al resto
+                if self._is_healthy(entry):
+                    self._stats["reused"] += 1
+                    break
+                self._stats["unhealthy"] += 1
+                self._discard(entry)
+                continue
+            try:
+                entry = self._create()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+            break
+        entry.last_used = time.time()
+        with self._cond:
+            self._leased[id(entry.driver)] = entry
+        return entry.driver
+
+    def release(self, driver, discard: bool = False):
+        """Devuelve un driver al pool (o lo cierra si hay que reciclarlo)."""
+        if driver is None:
+            return
+        with self._cond:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            # No pertenece al pool (p. ej. creado con create_driver directamente)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        entry.uses += 1
+        entry.last_used = time.time()
+        if discard or not self.enabled or self._closed or self._should_recycle(entry) or not self._reset(entry):
+            if self.enabled and not discard:
+                self._stats["recycled"] += 1
+            self._discard(entry)
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def _discard(self, entry: _PooledDriver):
+        self._destroy(entry)
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def warm(self, n: Optional[int] = None) -> int:
+        """Levanta drivers hasta tener al menos n (por defecto min_size) libres o prestados."""
+        target = min(self.max_size, self.min_size if n is None else n)
+        created = 0
+        while True:
+            with self._cond:
+                if self._closed or self._total >= target:
+                    break
+                self._total += 1
+            try:
+                entry = self._create()
+            except Exception as e:
+                with self._cond:
+                    self._total -= 1
+                logger.error(f"No se pudo precalentar un driver: {e}")
+                break
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+            created += 1
+        return created
+
+    def drain(self) -> int:
+        """Cierra los drivers libres (el pool sigue usable); devuelve cuántos cerró."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._destroy(entry)
+        return len(idle)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+        self.drain()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "total": self._total,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+            }
+
+
+def make_pool(factory: Callable, **kwargs) -> DriverPool:
+    pool = DriverPool(factory, **kwargs)
+    atexit.register(pool.close)
+    return pool
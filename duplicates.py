@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicados entre fuentes: el mismo departamento publicado en Urbania, InfoCasas y
+Properati llega con links (y a veces títulos) distintos, así que la deduplicación
+exacta por (link, titulo) no lo junta.
+
+Cada anuncio se resume en una huella: moneda, precio, m², dormitorios y las
+palabras informativas de su título normalizado (sin tildes ni mayúsculas, sin
+las palabras que comparten casi todos los avisos: "departamento", "alquiler",
+"en", "dormitorios", números cortos). Los candidatos se
+buscan por claves de bloqueo (moneda, dormitorios, tramo de precio, tramo de m²):
+los tramos tienen el ancho de la tolerancia, así que basta mirar el tramo propio
+y los vecinos (9 consultas a un dict por anuncio) y el costo total crece casi
+linealmente con la cantidad de anuncios. Un candidato es duplicado si viene de
+otra fuente, el precio y los m² están dentro de la tolerancia, los números largos
+del título (calle, edificio) no se contradicen y los títulos comparten al menos
+dos palabras informativas y se parecen lo suficiente (Jaccard). Un título genérico
+("Departamento en alquiler en Miraflores") no alcanza: en ese caso una descripción
+tiene que estar casi contenida en la otra (los portales a veces la recortan) y
+sus números largos no pueden contradecirse.
+
+El primer anuncio de cada grupo (en el orden del registro SCRAPERS) queda como
+canónico y guarda los links de los demás en `alternates`: el grupo lleva una copia
+(Listing.with_alternate), así los anuncios ya entregados no cambian. Anuncios sin precio o
+sin m² no se comparan: sin esos datos el título solo no alcanza para asegurar
+que es el mismo inmueble.
+"""
+import re
+import math
+import functools
+import time
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+import config
+from features import parse_price
+from keywords import searchable_text
+from listing import Listing
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Palabras de relleno de los avisos: no distinguen un inmueble de otro
+_GENERIC_WORDS = frozenset("""
+a al con de del el en la las los o para por se sin u un una y
+alquiler alquilo alquila arriendo renta venta vendo precio oportunidad
+departamento departamentos depa depas dpto dptos apartamento apto flat inmueble vivienda propiedad
+dormitorio dormitorios dorm dorms habitacion habitaciones hab banos bano m2 mt2 metros
+lima peru distrito
+""".split())
+# Palabras informativas en común (sin contar el distrito) que hacen falta para juntar por título o por descripción
+_MIN_SHARED_TITLE = 2
+_MIN_SHARED_DESCRIPTION = 5
+
+
+def title_tokens(title: str) -> frozenset:
+    """
+    Palabras informativas del título normalizado, sin puntuación ni relleno
+    ("Depa en Av. Larco 1234, 2 dorm." -> av, larco, 1234).
+    """
+    return frozenset(t for t in _WORD_RE.findall(searchable_text(title))
+                     if t not in _GENERIC_WORDS and not (t.isdigit() and len(t) < 3))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Jaccard entre dos conjuntos de palabras."""
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def containment(a: frozenset, b: frozenset) -> float:
+    """Fracción del conjunto menor contenida en el otro (una descripción recortada sigue contenida en la completa)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+@functools.lru_cache(maxsize=1)
+def _district_words() -> frozenset:
+    """Palabras de los nombres de distrito: todos los avisos de una búsqueda las comparten."""
+    # 👇 Import perezoso: scraper importa este módulo
+    from scraper import KNOWN_DISTRICTS
+
+    return frozenset(w for d in KNOWN_DISTRICTS for w in _WORD_RE.findall(searchable_text(d))) | {"lima"}
+
+
+def _shared(a: frozenset, b: frozenset) -> int:
+    """Palabras en común que no son parte de un nombre de distrito."""
+    return len((a & b) - _district_words())
+
+
+class Fingerprint:
+    __slots__ = ("moneda", "precio", "m2", "dormitorios", "tokens", "numbers", "descripcion", "_description_tokens")
+
+    def __init__(self, moneda: str, precio: int, m2: int, dormitorios: Optional[int], tokens: frozenset,
+                 descripcion: str = ""):
+        self.moneda = moneda
+        self.precio = precio
+        self.m2 = m2
+        self.dormitorios = dormitorios
+        self.tokens = tokens
+        # Números de 3 o más cifras (calle, edificio): si ambos títulos los tienen, deben compartir alguno
+        self.numbers = frozenset(t for t in tokens if t.isdigit())
+        self.descripcion = descripcion
+        self._description_tokens = None
+
+    def description_tokens(self) -> frozenset:
+        """Palabras informativas de la descripción (se calculan solo si el título no alcanza)."""
+        if self._description_tokens is None:
+            self._description_tokens = title_tokens(self.descripcion)
+        return self._description_tokens
+
+
+def fingerprint(listing: Listing) -> Optional[Fingerprint]:
+    """Huella del anuncio, o None si le falta precio o m² (no se compara)."""
+    moneda, precio = parse_price(listing.precio)
+    m2 = listing.m2_num
+    if not precio or not m2:
+        return None
+    return Fingerprint(moneda or "", precio, m2, listing.dorm_num, title_tokens(listing.titulo),
+                       listing.descripcion or "")
+
+
+class _Group:
+    """Grupo de duplicados: el anuncio canónico, su huella y las fuentes que ya tiene."""
+
+    __slots__ = ("canonical", "fp", "sources")
+
+    def __init__(self, canonical: Listing, fp: Optional[Fingerprint]):
+        self.canonical = canonical
+        self.fp = fp
+        self.sources = {canonical.fuente}
+
+    def merge(self, listing: Listing):
+        # Copia al agregar el alternativo: el canónico original puede estar ya enviado
+        self.canonical = self.canonical.with_alternate(listing)
+        self.sources.add(listing.fuente)
+
+
+class DuplicateIndex:
+    """
+    Índice incremental de anuncios ya vistos. add() devuelve True si el anuncio es
+    nuevo y False si se agregó como alternativo de uno anterior; sirve tanto para
+    una lista completa (collapse) como para resultados que llegan por fuente (jobs,
+    streaming). Los anuncios recibidos nunca se modifican: los alternativos quedan
+    en copias que guarda el índice.
+    """
+
+    def __init__(self, price_tolerance: float = 0.03, m2_tolerance: int = 3,
+                 min_similarity: float = 0.5, max_candidates: int = 32,
+                 min_description_similarity: float = 0.6):
+        self.price_tolerance = min(0.5, max(1e-6, price_tolerance))
+        self.m2_tolerance = max(1, m2_tolerance)
+        self.min_similarity = min_similarity
+        self.min_description_similarity = min_description_similarity
+        # Tope de comparaciones por tramo: acota el peor caso (muchos anuncios idénticos en números)
+        self.max_candidates = max(1, max_candidates)
+        # Tramos de precio en escala logarítmica: dos precios dentro de la tolerancia
+        # (relativa al mayor) quedan en el mismo tramo o en uno vecino
+        self._log_step = -math.log1p(-self.price_tolerance)
+        self._blocks = {}
+        self.compared = 0
+        self.merged = 0
+
+    @classmethod
+    def from_config(cls) -> "DuplicateIndex":
+        return cls(price_tolerance=config.DEDUP_PRICE_TOLERANCE, m2_tolerance=config.DEDUP_M2_TOLERANCE,
+                   min_similarity=config.DEDUP_MIN_SIMILARITY, max_candidates=config.DEDUP_MAX_CANDIDATES,
+                   min_description_similarity=config.DEDUP_MIN_DESCRIPTION_SIMILARITY)
+
+    def _block(self, fp: Fingerprint) -> tuple:
+        return (fp.moneda, fp.dormitorios, int(math.log(fp.precio) / self._log_step), fp.m2 // self.m2_tolerance)
+
+    def _is_duplicate(self, fp: Fingerprint, fuente: str, group: _Group) -> bool:
+        other = group.fp
+        if fuente in group.sources:
+            # Dos anuncios de la misma fuente son dos publicaciones distintas
+            return False
+        if abs(fp.precio - other.precio) > self.price_tolerance * max(fp.precio, other.precio):
+            return False
+        if abs(fp.m2 - other.m2) > self.m2_tolerance:
+            return False
+        if fp.numbers and other.numbers and fp.numbers.isdisjoint(other.numbers):
+            return False
+        self.compared += 1
+        if _shared(fp.tokens, other.tokens) >= _MIN_SHARED_TITLE:
+            return similarity(fp.tokens, other.tokens) >= self.min_similarity
+        # Títulos genéricos o sin palabras en común: solo si las descripciones son casi la misma
+        a, b = fp.description_tokens(), other.description_tokens()
+        if _shared(a, b) < _MIN_SHARED_DESCRIPTION:
+            return False
+        numbers_a = {t for t in a if t.isdigit()}
+        numbers_b = {t for t in b if t.isdigit()}
+        if numbers_a and numbers_b and numbers_a.isdisjoint(numbers_b):
+            return False
+        return containment(a, b) >= self.min_description_similarity
+
+    def find(self, listing: Listing, fp: Optional[Fingerprint] = None) -> Optional[Listing]:
+        """Anuncio canónico del que `listing` es duplicado (None si no hay)."""
+        group = self._find(listing, fp or fingerprint(listing))
+        return group.canonical if group is not None else None
+
+    def _find(self, listing: Listing, fp: Optional[Fingerprint]) -> Optional[_Group]:
+        if fp is None:
+            return None
+        moneda, dorm, price_block, m2_block = self._block(fp)
+        for p in (price_block, price_block - 1, price_block + 1):
+            for m in (m2_block, m2_block - 1, m2_block + 1):
+                groups = self._blocks.get((moneda, dorm, p, m))
+                if not groups:
+                    continue
+                for group in groups[-self.max_candidates:]:
+                    if self._is_duplicate(fp, listing.fuente, group):
+                        return group
+        return None
+
+    def _add(self, listing: Listing) -> Tuple[_Group, bool]:
+        """Grupo del anuncio y si es nuevo (False: se juntó con uno anterior)."""
+        fp = fingerprint(listing)
+        group = self._find(listing, fp)
+        if group is not None:
+            group.merge(listing)
+            self.merged += 1
+            return group, False
+        group = _Group(listing, fp)
+        if fp is not None:
+            self._blocks.setdefault(self._block(fp), []).append(group)
+        return group, True
+
+    def add(self, listing: Listing) -> bool:
+        return self._add(listing)[1]
+
+    def collapse(self, listings: Iterable[Listing]) -> List[Listing]:
+        """
+        Los anuncios que no son duplicados de uno anterior, en el mismo orden; los que
+        juntaron duplicados de esta misma lista vuelven como copias con sus alternativos.
+        """
+        groups = [group for group, new in map(self._add, listings) if new]
+        return [group.canonical for group in groups]
+
+
+class DedupStats:
+    """Contadores acumulados de la deduplicación entre fuentes (para /dedup/stats)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.listings = 0
+        self.merged = 0
+        self.seconds = 0.0
+
+    def record(self, listings: int, merged: int, seconds: float):
+        with self._lock:
+            self.runs += 1
+            self.listings += listings
+            self.merged += merged
+            self.seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": config.DEDUP_NEAR,
+                "price_tolerance": config.DEDUP_PRICE_TOLERANCE,
+                "m2_tolerance": config.DEDUP_M2_TOLERANCE,
+                "min_similarity": config.DEDUP_MIN_SIMILARITY,
+                "min_description_similarity": config.DEDUP_MIN_DESCRIPTION_SIMILARITY,
+                "runs": self.runs,
+                "listings": self.listings,
+                "merged": self.merged,
+                "merge_ratio": round(self.merged / self.listings, 4) if self.listings else 0.0,
+                "ms_total": round(self.seconds * 1000, 1),
+            }
+
+
+DEDUP_STATS = DedupStats()
+
+
+def collapse_duplicates(listings: List[Listing]) -> List[Listing]:
+    """Junta los duplicados entre fuentes de una lista completa (si DEDUP_NEAR está activo)."""
+    if not config.DEDUP_NEAR or len(listings) < 2:
+        return listings
+    start = time.perf_counter()
+    index = DuplicateIndex.from_config()
+    unique = index.collapse(listings)
+    DEDUP_STATS.record(len(listings), index.merged, time.perf_counter() - start)
+    return unique
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Extracción de características numéricas del texto de una card.
+Un único regex precompilado recorre el texto una sola vez (y corta en cuanto
+tiene las tres) para dormitorios, baños y m²; moneda y precio salen del elemento
+de precio de la card o, si no lo hay, del primer importe del texto. Todo se
+devuelve junto en un CardFeatures. Acepta las variantes que usan los portales:
+"2 dormitorios", "1 dorm.", "3 hab.", "2 baños", "1 bano", "80 m²", "80 m2",
+"80 mts2", "S/ 1,500", "US$ 800", "USD 800", "$ 800".
+Las cards que traen cada característica en su propio tag (InfoCasas, Urbania) usan
+extract_tag_features: el tag se clasifica por su unidad y aporta su primer número,
+aunque no esté justo antes de la unidad ("Dorms.: 2").
+"""
+import re
+from typing import Iterable, Optional, Tuple
+
+# Número seguido de la unidad. Cada rama empieza con un literal (rápido para el motor
+# de regex); el tipo se decide por la primera letra de la unidad.
+_FEATURES_RE = re.compile(
+    r"(\d{1,4})(?:[.,]\d+)?\s*(dorm|hab|rec[aá]m|ba[ñn]o|m²|m2|mts?\.?\s?2|mts?\.?\s?cuad|metros\s?cuad)",
+    re.IGNORECASE,
+)
+_KIND = {"d": 0, "h": 0, "r": 0, "b": 1, "m": 2}
+# Importe con moneda, para cuando la card no tiene un elemento de precio propio
+_PRICE_RE = re.compile(r"(s/\.?|us\$|u\$s|usd|\$)\s*(\d[\d.,]*)", re.IGNORECASE)
+_INT_RE = re.compile(r"\d+")
+_NON_DIGITS_RE = re.compile(r"[^\d]")
+
+
+class CardFeatures:
+    """Características de una card. Los conteos van como texto ("" si no aparecen), igual que en los registros."""
+
+    __slots__ = ("dormitorios", "banos", "m2", "moneda", "precio")
+
+    def __init__(self, dormitorios: str = "", banos: str = "", m2: str = "",
+                 moneda: Optional[str] = None, precio: Optional[int] = None):
+        self.dormitorios = dormitorios
+        self.banos = banos
+        self.m2 = m2
+        self.moneda = moneda
+        self.precio = precio
+
+    def __repr__(self):
+        return (f"CardFeatures(dormitorios={self.dormitorios!r}, banos={self.banos!r}, m2={self.m2!r}, "
+                f"moneda={self.moneda!r}, precio={self.precio!r})")
+
+
+def parse_price(text) -> Tuple[Optional[str], Optional[int]]:
+    """
+    (moneda, valor) de un texto de precio: "S" si trae "S/", "USD" si trae "$".
+    El valor son todos los dígitos del texto (criterio histórico de parse_precio_con_moneda).
+    """
+    if not text:
+        return (None, None)
+    s = str(text)
+    moneda = "S" if "S/" in s else ("USD" if "$" in s else None)
+    nums = _NON_DIGITS_RE.sub("", s)
+    return (moneda, int(nums)) if nums else (moneda, None)
+
+
+def first_int(text) -> Optional[int]:
+    """Primer entero del texto (None si no hay)."""
+    if text is None:
+        return None
+    m = _INT_RE.search(str(text))
+    return int(m.group()) if m else None
+
+
+def extract_features(text: str, price_text: Optional[str] = None) -> CardFeatures:
+    """
+    Recorre `text` una vez y toma la primera aparición de cada característica.
+    Si se pasa `price_text` (el elemento de precio de la card) moneda y precio salen
+    de ahí; si no, del primer importe con moneda que aparezca en el texto.
+    """
+    text = text or ""
+    found = ["", "", ""]
+    pending = 3
+    for m in _FEATURES_RE.finditer(text):
+        kind = _KIND[m.group(2)[0].lower()]
+        if not found[kind]:
+            found[kind] = m.group(1)
+            pending -= 1
+            if pending == 0:
+                break
+    if price_text is None:
+        m = _PRICE_RE.search(text)
+        moneda = ("S" if m.group(1)[0] in "sS" else "USD") if m else None
+        precio = int(_NON_DIGITS_RE.sub("", m.group(2))) if m else None
+    else:
+        moneda, precio = parse_price(price_text)
+    return CardFeatures(found[0], found[1], found[2], moneda, precio)
+
+
+def extract_tag_features(tags: Iterable[str], units: Tuple[str, str, str],
+                         price_text: Optional[str] = None) -> CardFeatures:
+    """
+    Características de una card con un tag por característica ("2 Dorms.", "Baños: 1").
+    `units` son los textos (sensibles a mayúsculas) que identifican el tag de
+    dormitorios, baños y m², en ese orden; cada tag aporta su primer entero y gana
+    el primer tag de cada tipo. Moneda y precio salen de `price_text`.
+    """
+    found = ["", "", ""]
+    for tag in tags:
+        for kind, unit in enumerate(units):
+            if unit in tag:
+                if not found[kind]:
+                    m = _INT_RE.search(tag)
+                    if m:
+                        found[kind] = m.group()
+                break
+    moneda, precio = parse_price(price_text)
+    return CardFeatures(found[0], found[1], found[2], moneda, precio)
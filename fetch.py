@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Descarga de listados: HTTP primero, Chrome solo si hace falta.
+Parte del HTML de los portales ya viene renderizado desde el servidor. Para las
+fuentes de FETCH_HTTP_SOURCES (las que traen el listado completo en el HTML y
+paginan con links) se intenta un GET con el cliente HTTP compartido y se
+comprueba que el HTML traiga las cards esperadas; si no, se cae al navegador y
+se recuerda por fuente (se vuelve a probar por HTTP cada FETCH_REPROBE_INTERVAL
+segundos). Las fuentes que completan el listado con scroll o "cargar más" van
+siempre al navegador: por HTTP devolverían menos cards sin avisar.
+
+Un error pasajero (timeout, conexión, 5xx o 429) no cambia el modo recordado:
+esa búsqueda usa el navegador y la siguiente vuelve a probar por HTTP.
+"""
+import time
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+
+import config
+from http_client import HTTP_CLIENT
+from parsing import parse_html
+from timings import timed
+
+logger = logging.getLogger(__name__)
+
+HTTP, BROWSER = "http", "browser"
+
+
+# Status que indican un problema pasajero del servidor, no que la página necesite navegador
+_TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _SourceState:
+    __slots__ = ("mode", "probed_at", "http", "browser", "fallbacks", "transient")
+
+    def __init__(self):
+        self.mode = None  # None = aún sin probar
+        self.probed_at = 0.0
+        self.http = 0
+        self.browser = 0
+        self.fallbacks = 0
+        self.transient = 0
+
+
+class PageFetcher:
+    def __init__(self, http_first: bool = True, reprobe_interval: float = 3600, timeout: float = 15,
+                 http_sources: Optional[Iterable[str]] = None):
+        self.http_first = http_first
+        # None = todas las fuentes pueden probar HTTP
+        self.http_sources = set(http_sources) if http_sources is not None else None
+        self.reprobe_interval = reprobe_interval
+        self.timeout = timeout
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _state(self, source: str) -> _SourceState:
+        with self._lock:
+            state = self._states.get(source)
+            if state is None:
+                state = self._states[source] = _SourceState()
+            return state
+
+    def mode(self, source: str) -> Optional[str]:
+        return self._state(source).mode
+
+    def should_try_http(self, source: str) -> bool:
+        if not self.http_first or (self.http_sources is not None and source not in self.http_sources):
+            return False
+        state = self._state(source)
+        if state.mode != BROWSER:
+            return True
+        # Re-probar de vez en cuando: el portal pudo volver a renderizar en el servidor
+        return time.monotonic() - state.probed_at >= self.reprobe_interval
+
+    def _remember(self, source: str, mode: str):
+        state = self._state(source)
+        with self._lock:
+            if state.mode != mode:
+                logger.info(f"Descarga de {source}: modo {state.mode or 'sin probar'} -> {mode}")
+            state.mode = mode
+            state.probed_at = time.monotonic()
+
+    def try_http(self, source: str, url: str, ready_selector: str):
+        """
+        Devuelve el listado parseado si se pudo obtener por HTTP con las cards
+        esperadas; None si hay que usar navegador. Solo se recuerda "navegador" si la
+        página llegó pero sin cards (o el portal la rechazó con 4xx); un error pasajero
+        cae al navegador esta vez sin cambiar el modo.
+        """
+        if not self.should_try_http(source):
+            return None
+        state = self._state(source)
+        try:
+            with timed("http_fetch"):
+                r = HTTP_CLIENT.get(url, timeout=self.timeout, raise_for_status=False)
+        except Exception as e:
+            r = None
+            reason = str(e)
+        else:
+            reason = f"status {r.status_code}"
+        if r is None or r.status_code in _TRANSIENT_STATUSES:
+            logger.warning(f"{source}: fallo pasajero de la descarga HTTP ({reason}), esta vez se usa navegador")
+            with self._lock:
+                state.transient += 1
+            return None
+        soup = None
+        if r.status_code >= 400:
+            logger.info(f"{source}: el portal rechazó la descarga HTTP ({reason}), se usa navegador")
+        else:
+            with timed("parse"):
+                soup = parse_html(r.text)
+            if soup.select_one(ready_selector) is None:
+                logger.info(f"{source}: el HTML servido no trae cards ({ready_selector}), se usa navegador")
+                soup = None
+        if soup is None:
+            self._remember(source, BROWSER)
+            state.fallbacks += 1
+            return None
+        self._remember(source, HTTP)
+        state.http += 1
+        return soup
+
+    def get_soup(self, url: str):
+        """GET simple de una página más (p. ej. la siguiente), sin tocar el modo recordado."""
+        try:
+            with timed("http_fetch"):
+                r = HTTP_CLIENT.get(url, timeout=self.timeout)
+        except Exception as e:
+            logger.warning(f"Fallo la descarga HTTP de {url}: {e}")
+            return None
+        with timed("parse"):
+            return parse_html(r.text)
+
+    def fetch(self, source: str, url: str, ready_selector: str,
+              browser_fetch: Callable[[], str]):
+        """Listado parseado por HTTP si alcanza; si no, con `browser_fetch()` (devuelve el HTML)."""
+        soup = self.try_http(source, url, ready_selector)
+        if soup is not None:
+            return soup
+        html = browser_fetch()
+        self._state(source).browser += 1
+        with timed("parse"):
+            return parse_html(html)
+
+    def count_browser(self, source: str):
+        """Para fuentes que manejan el navegador por su cuenta (p. ej. paginación de Urbania)."""
+        self._state(source).browser += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            sources = {
+                name: {
+                    "modo": s.mode,
+                    "http": s.http,
+                    "navegador": s.browser,
+                    "fallbacks": s.fallbacks,
+                    "errores_pasajeros": s.transient,
+                    "reprobe_en": (round(max(0.0, self.reprobe_interval - (now - s.probed_at)), 1)
+                                   if s.mode == BROWSER else None),
+                }
+                for name, s in self._states.items()
+            }
+        return {"http_first": self.http_first,
+                "http_sources": sorted(self.http_sources) if self.http_sources is not None else None,
+                "reprobe_interval": self.reprobe_interval, "fuentes": sources}
+
+
+FETCHER = PageFetcher(
+    http_first=config.FETCH_HTTP_FIRST,
+    reprobe_interval=config.FETCH_REPROBE_INTERVAL,
+    timeout=config.FETCH_HTTP_TIMEOUT,
+    http_sources=config.FETCH_HTTP_SOURCES,
+)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente HTTP compartido por las fuentes que no necesitan navegador.
+- Una sesión de requests con un pool de conexiones keep-alive por host: las
+  búsquedas repetidas reutilizan las conexiones TCP/TLS ya abiertas.
+- gzip/deflate (y br si está instalado brotli) negociados con Accept-Encoding.
+- Reintentos configurables con backoff exponencial y jitter ante errores de
+  conexión y respuestas 429/5xx (respetando Retry-After).
+- Métricas por host y del pool para GET /http/stats.
+"""
+import time
+import logging
+import threading
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+
+import config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _make_retry(retries: int, backoff: float, jitter: float, backoff_max: float) -> Retry:
+    kwargs = dict(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True, raise_on_status=False,
+    )
+    try:
+        return Retry(backoff_jitter=jitter, backoff_max=backoff_max, **kwargs)
+    except TypeError:
+        # urllib3 1.x: sin jitter ni backoff_max configurables
+        return Retry(**kwargs)
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "retries", "bytes", "seconds", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.statuses = {}
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "avg_ms": round(self.seconds / self.requests * 1000, 1) if self.requests else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+class HttpClient:
+    def __init__(self, pool_hosts: int = 16, pool_maxsize: int = 16, timeout: float = 15,
+                 retries: int = 3, backoff: float = 0.5, backoff_jitter: float = 0.3,
+                 backoff_max: float = 10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": config.COMMON_UA,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "es-PE,es;q=0.9",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        })
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_hosts, pool_maxsize=pool_maxsize, pool_block=False,
+            max_retries=_make_retry(retries, backoff, backoff_jitter, backoff_max),
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_stats(self, url: str) -> _HostStats:
+        host = urlparse(url).netloc or "?"
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                stats = self._hosts[host] = _HostStats()
+            return stats
+
+    def get(self, url: str, timeout: Optional[float] = None, raise_for_status: bool = True,
+            **kwargs) -> requests.Response:
+        """GET con reintentos; lanza requests.RequestException si falla (o si el status es de error)."""
+        stats = self._host_stats(url)
+        start = time.perf_counter()
+        try:
+            r = self.session.get(url, timeout=self.timeout if timeout is None else timeout, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                stats.requests += 1
+                stats.errors += 1
+                stats.seconds += time.perf_counter() - start
+            raise
+        retries = getattr(getattr(r.raw, "retries", None), "history", None) or ()
+        with self._lock:
+            stats.requests += 1
+            stats.retries += len(retries)
+            stats.bytes += len(r.content)
+            stats.seconds += time.perf_counter() - start
+            stats.statuses[r.status_code] = stats.statuses.get(r.status_code, 0) + 1
+            if r.status_code >= 400:
+                stats.errors += 1
+        if raise_for_status:
+            r.raise_for_status()
+        return r
+
+    def pool_stats(self) -> dict:
+        """Conexiones por host: abiertas en total, libres en el pool y requests servidos."""
+        pools = {}
+        manager = self.adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle": pool.pool.qsize() if pool.pool is not None else 0,
+            }
+        return pools
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts = {host: s.to_dict() for host, s in self._hosts.items()}
+        return {"timeout": self.timeout, "hosts": hosts, "pools": self.pool_stats()}
+
+
+HTTP_CLIENT = HttpClient(
+    pool_hosts=config.HTTP_POOL_HOSTS,
+    pool_maxsize=config.HTTP_POOL_MAXSIZE,
+    timeout=config.HTTP_TIMEOUT,
+    retries=config.HTTP_RETRIES,
+    backoff=config.HTTP_BACKOFF,
+    backoff_jitter=config.HTTP_BACKOFF_JITTER,
+    backoff_max=config.HTTP_BACKOFF_MAX,
+)
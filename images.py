@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Resolución de imágenes desde las páginas de detalle (Nestoria).
+Las páginas se descargan en paralelo con el cliente HTTP compartido (keep-alive),
+en vez de abrir cada detalle en Chrome de forma secuencial. Los resultados se
+guardan en una caché por link para poder servirlos después (modo perezoso).
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+
+import config
+from http_client import HTTP_CLIENT
+from parsing import parse_html
+
+logger = logging.getLogger(__name__)
+
+NESTORIA_HOSTS = ("nestoria.pe", "www.nestoria.pe")
+
+
+class ImageCache:
+    """Caché LRU con TTL: link -> imagen_url."""
+
+    def __init__(self, max_items: int = 5000, ttl: float = 6 * 3600):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, link: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(link)
+            if item is None:
+                return None
+            value, stored_at = item
+            if time.time() - stored_at > self.ttl:
+                del self._data[link]
+                return None
+            self._data.move_to_end(link)
+            return value
+
+    def set(self, link: str, value: str):
+        with self._lock:
+            self._data[link] = (value, time.time())
+            self._data.move_to_end(link)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+IMAGE_CACHE = ImageCache(max_items=config.IMAGE_CACHE_SIZE, ttl=config.IMAGE_CACHE_TTL)
+
+_executor = ThreadPoolExecutor(max_workers=config.IMAGE_MAX_CONNECTIONS, thread_name_prefix="images")
+# Links que ya se están descargando (para no pedir dos veces el mismo detalle)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _clean_img_url(img_url: str) -> str:
+    if img_url and img_url.startswith("//"):
+        img_url = "https:" + img_url
+    return (img_url or "").strip()
+
+
+def extract_nestoria_image(html: str) -> str:
+    """Imagen principal de una página de detalle de Nestoria ("" si no hay)."""
+    detail_soup = parse_html(html)
+    main_img = detail_soup.select_one("img[data-element='main-swiper-slide']")
+    if not main_img:
+        # Fallback: buscar cualquier img dentro de .photos .swiper-slide
+        main_img = detail_soup.select_one(".photos .swiper-slide img")
+    if not main_img:
+        return ""
+    return _clean_img_url(main_img.get("src") or main_img.get("data-src") or "")
+
+
+def is_nestoria_link(link: str) -> bool:
+    try:
+        parsed = urlparse(link)
+    except ValueError:
+        return False
+    allowed = NESTORIA_HOSTS + (urlparse(config.SOURCE_BASE_URLS["nestoria"]).hostname or "",)
+    return parsed.scheme in ("http", "https") and (parsed.hostname or "") in allowed
+
+
+def fetch_nestoria_image(link: str) -> str:
+    """Descarga el detalle y devuelve la imagen principal, usando la caché por link."""
+    cached = IMAGE_CACHE.get(link)
+    if cached is not None:
+        return cached
+    try:
+        r = HTTP_CLIENT.get(link, timeout=config.IMAGE_FETCH_TIMEOUT)
+        img_url = extract_nestoria_image(r.text)
+    except Exception as e:
+        logger.error(f"Error al obtener imagen de detalle en Nestoria para {link}: {e}")
+        return ""
+    IMAGE_CACHE.set(link, img_url)
+    return img_url
+
+
+def _submit(link: str):
+    with _inflight_lock:
+        future = _inflight.get(link)
+        if future is not None:
+            return future
+        future = _executor.submit(fetch_nestoria_image, link)
+        _inflight[link] = future
+    # Fuera del lock: si ya terminó, el callback se ejecuta aquí mismo
+    future.add_done_callback(lambda _f, _link=link: _forget(_link))
+    return future
+
+
+def _forget(link: str):
+    with _inflight_lock:
+        _inflight.pop(link, None)
+
+
+def resolve_images(links: Iterable[str], deadline: Optional[float] = None) -> Dict[str, str]:
+    """
+    Resuelve en paralelo las imágenes de los links dados y espera como máximo `deadline`
+    segundos. Los que no terminan a tiempo siguen en segundo plano y quedan en la caché
+    para el endpoint de imágenes; aquí se devuelven solo los que ya están listos.
+    """
+    deadline = config.IMAGE_DEADLINE if deadline is None else deadline
+    resolved = {}
+    pending = {}
+    for link in dict.fromkeys(l for l in links if l):
+        cached = IMAGE_CACHE.get(link)
+        if cached is not None:
+            resolved[link] = cached
+        else:
+            pending[_submit(link)] = link
+    if pending:
+        start = time.perf_counter()
+        done, not_done = wait(pending, timeout=max(0.0, deadline))
+        for future in done:
+            try:
+                resolved[pending[future]] = future.result()
+            except Exception:
+                resolved[pending[future]] = ""
+        logger.info(f"Imágenes de Nestoria: {len(done)}/{len(pending)} resueltas en "
+                    f"{time.perf_counter() - start:.1f}s ({len(not_done)} siguen en segundo plano)")
+    return resolved
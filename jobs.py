@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Búsquedas asíncronas: POST /jobs devuelve un id al instante y el scrape corre en
+un planificador acotado (workers + cola con prioridades). El cliente consulta el
+progreso por fuente y pagina los resultados, sin depender de timeouts de proxies.
+El scrape de cada job pasa por SEARCH_EXECUTOR con la clave de la búsqueda: comparte
+el tope de navegadores con /search y /search/stream, y un job igual a una búsqueda
+en curso lee ese mismo scrape en vez de lanzar otro.
+"""
+import time
+import uuid
+import queue
+import logging
+import threading
+from itertools import count
+from concurrent.futures import wait
+from typing import Dict, List, Optional
+
+import config
+from cache import SEARCH_CACHE, search_cache_key
+from listing import Listing, dedupe
+from duplicates import DuplicateIndex
+from search_executor import SEARCH_EXECUTOR, Overloaded, SourceFeed
+from store import save_results
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+# Segundos entre reintentos cuando SEARCH_EXECUTOR está lleno (y entre chequeos de cancelación)
+_POLL_INTERVAL = 1.0
+
+
+def scrape_by_source(params: dict, feed: SourceFeed) -> List[Listing]:
+    """
+    Scrape para SEARCH_EXECUTOR.submit_feed: publica cada fuente en `feed` como
+    (nombre, listings, info) y al final guarda en caché y en el almacén el resultado
+    combinado (mismo orden y deduplicación que run_scrapers). Lo usan los jobs y
+    /search/stream.
+    """
+    # 👇 Import perezoso: selenium solo cuando se ejecuta el primer scrape
+    from scraper import iter_scrapers, merge_source_records
+
+    per_source = {}
+    for name, listings, info in iter_scrapers(**params):
+        per_source[name] = listings
+        feed.put((name, listings, info))
+    merged = merge_source_records(per_source)
+    SEARCH_CACHE.set(search_cache_key(**params), merged)
+    save_results(merged, params.get("zona", ""))
+    return merged
+
+
+class Job:
+    def __init__(self, params: dict, priority: int = 0):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.priority = priority
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.progress = {}
+        self.results = []
+        self.from_cache = False
+        self.cancel_event = threading.Event()
+        self._seen = set()
+        self._duplicates = DuplicateIndex.from_config() if config.DEDUP_NEAR else None
+        self._lock = threading.Lock()
+
+    def add_results(self, listings: List[Listing]) -> int:
+        """
+        Agrega anuncios deduplicando por (link, titulo) y juntando el mismo inmueble de
+        otras fuentes; devuelve cuántos eran nuevos.
+        """
+        with self._lock:
+            nuevos = dedupe(listings, self._seen)
+            if self._duplicates is not None:
+                nuevos = self._duplicates.collapse(nuevos)
+            self.results.extend(nuevos)
+        return len(nuevos)
+
+    def page(self, offset: int, limit: int) -> List[Listing]:
+        with self._lock:
+            return self.results[offset:offset + limit]
+
+    def to_dict(self) -> dict:
+        elapsed_end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "segundos": round(elapsed_end - self.started_at, 2) if self.started_at else None,
+            "progress": self.progress,
+            "count": len(self.results),
+            "cache": self.from_cache,
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    def __init__(self, workers: int = 1, max_queue: int = 50, max_retained: int = 200, ttl: float = 3600):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.max_retained = max(1, max_retained)
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._queue = queue.PriorityQueue()
+        self._seq = count()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Los workers se crean al primer job para no levantar hilos al importar
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, daemon=True, name=f"jobs-{i}")
+            t.start()
+            self._threads.append(t)
+
+    def _prune(self):
+        now = time.time()
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED),
+                          key=lambda j: j.finished_at or 0)
+        excess = len(finished) - self.max_retained
+        for i, job in enumerate(finished):
+            if i < excess or now - (job.finished_at or now) > self.ttl:
+                self._jobs.pop(job.id, None)
+
+    def submit(self, params: dict, priority: int = 0) -> Job:
+        """Encola una búsqueda. Mayor `priority` se atiende antes."""
+        job = Job(params, priority)
+        key = search_cache_key(**params)
+        cached, state = SEARCH_CACHE.lookup(key)
+        with self._lock:
+            self._prune()
+            if state == "fresh":
+                # Ya hay un resultado reciente: el job nace terminado
+                job.add_results(cached)
+                job.from_cache = True
+                job.status = DONE
+                job.started_at = job.finished_at = time.time()
+                self._jobs[job.id] = job
+                return job
+            queued = sum(1 for j in self._jobs.values() if j.status == QUEUED)
+            if queued >= self.max_queue:
+                raise Overloaded(config.SEARCH_RETRY_AFTER, "Demasiadas búsquedas en cola, intente nuevamente")
+            self._jobs[job.id] = job
+            self._ensure_workers()
+        self._queue.put((-priority, next(self._seq), job.id))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {"workers": self.workers, "max_queue": self.max_queue, "jobs": by_status}
+
+    def _worker(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            job = self.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.exception(f"Error en job {job.id}")
+                job.error = str(e)
+                job.status = FAILED
+                job.finished_at = time.time()
+
+    def _submit_scrape(self, job: Job):
+        """(future, feed) del scrape del job; si SEARCH_EXECUTOR está lleno espera su turno."""
+        key = search_cache_key(**job.params)
+        while not job.cancel_event.is_set():
+            try:
+                return SEARCH_EXECUTOR.submit_feed(key, lambda feed: scrape_by_source(job.params, feed))
+            except Overloaded:
+                job.cancel_event.wait(_POLL_INTERVAL)
+        return None, None
+
+    def _run(self, job: Job):
+        # 👇 Import perezoso: selenium solo cuando se ejecuta el primer job
+        from scraper import SCRAPERS
+
+        future, feed = self._submit_scrape(job)
+        if future is None:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.progress = {name: {"estado": "pendiente"} for name, _ in SCRAPERS}
+        if feed is not None:
+            # Cancelar deja de leer el feed; el scrape termina igual (puede ser compartido) y queda en caché
+            for name, listings, info in feed:
+                if job.cancel_event.is_set():
+                    break
+                nuevos = job.add_results(listings)
+                # Una fuente que falló queda como "error" (con el mensaje en info["error"])
+                estado = "ok" if info.get("error") is None else "error"
+                job.progress[name] = {"estado": estado, **info, "nuevos": nuevos}
+        else:
+            # Hay un /search con la misma clave en curso: su resultado llega completo al final
+            while not job.cancel_event.is_set() and not wait([future], timeout=_POLL_INTERVAL).done:
+                pass
+        job.finished_at = time.time()
+        if job.cancel_event.is_set():
+            for progress in job.progress.values():
+                if progress.get("estado") == "pendiente":
+                    progress["estado"] = "cancelado"
+            job.status = CANCELLED
+            return
+        # Sin feed el resultado viene del /search; con feed, un error del scrape también sale por aquí
+        merged = future.result()
+        if feed is None:
+            job.add_results(merged)
+            job.progress = {name: {"estado": "compartido"} for name, _ in SCRAPERS}
+        job.status = DONE
+
+
+JOB_SCHEDULER = JobScheduler(
+    workers=config.JOBS_WORKERS,
+    max_queue=config.JOBS_MAX_QUEUE,
+    max_retained=config.JOBS_MAX_RETAINED,
+    ttl=config.JOBS_TTL,
+)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Búsqueda por palabras clave sin tildes ni mayúsculas ("jardín" == "Jardin").
+
+Sintaxis de palabras_clave:
+- palabras separadas por espacios: deben aparecer todas (AND), como siempre;
+- "entre comillas": la frase tal cual ("vista al mar");
+- A OR B (o A | B): basta con una de las dos; se agrupa con lo que tiene al lado:
+  `piscina OR jardin mascotas` = (piscina o jardín) y mascotas.
+
+Cada término se busca como subcadena del texto normalizado (igual que antes:
+"piscina" también encuentra "piscinas"). El texto de cada listado se normaliza
+una sola vez y la consulta entera se evalúa sobre él, cortando en la primera
+cláusula que no se cumple; el almacén guarda ese texto ya normalizado y resuelve
+la misma consulta en SQLite (sql_where).
+"""
+import re
+import functools
+import unicodedata
+from typing import List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_OR_TOKENS = ("OR", "|")
+_AND_TOKENS = ("AND", "&")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_text(text) -> str:
+    """Elimina acentos y pasa a minúsculas"""
+    text = str(text or "").lower()
+    if text.isascii():
+        # Sin tildes no hay nada que descomponer (la mayoría de los textos)
+        return text
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("utf-8")
+
+
+def searchable_text(*parts) -> str:
+    """Texto normalizado de varios campos, con los espacios colapsados (para buscar frases)."""
+    text = normalize_text(" ".join(p if isinstance(p, str) else str(p) for p in parts if p))
+    # Solo se colapsa si hace falta (espacios dobles, saltos/tabs o espacios en los extremos)
+    if "  " in text or not text.isprintable() or text[:1] == " " or text[-1:] == " ":
+        text = " ".join(text.split())
+    return text
+
+
+def _normalize_term(term: str) -> str:
+    return _SPACES_RE.sub(" ", normalize_text(term)).strip()
+
+
+class KeywordQuery:
+    """
+    Consulta ya parseada: `clauses` es una tupla de cláusulas que deben cumplirse
+    todas; cada cláusula es una tupla de términos alternativos (OR).
+    """
+
+    __slots__ = ("clauses",)
+
+    def __init__(self, clauses: Tuple[Tuple[str, ...], ...]):
+        # Las cláusulas más selectivas (términos largos, sin OR) primero: cortan antes
+        self.clauses = tuple(sorted(clauses, key=lambda c: (len(c), -min(len(t) for t in c))))
+
+    def __bool__(self) -> bool:
+        return bool(self.clauses)
+
+    def __repr__(self):
+        return f"KeywordQuery({self.clauses!r})"
+
+    def canonical(self) -> tuple:
+        """Forma canónica (orden indiferente en AND y OR) para claves de caché."""
+        return tuple(sorted(tuple(sorted(set(clause))) for clause in set(self.clauses)))
+
+    def matches(self, text: str) -> bool:
+        """True si el texto normalizado (searchable_text) cumple la consulta."""
+        # `in` sobre str es una búsqueda en C: más rápida que un regex de alternativas
+        # para las pocas palabras de una búsqueda, y sin problemas con términos solapados
+        for clause in self.clauses:
+            for term in clause:
+                if term in text:
+                    break
+            else:
+                return False
+        return True
+
+    def sql_where(self, column: str) -> Tuple[str, list]:
+        """Condición SQL equivalente sobre una columna con el texto ya normalizado."""
+        parts, params = [], []
+        for clause in self.clauses:
+            ors = []
+            for term in clause:
+                ors.append(f"{column} LIKE ? ESCAPE '\\'")
+                params.append("%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            parts.append("(" + " OR ".join(ors) + ")")
+        return " AND ".join(parts), params
+
+
+def _parse(text: str) -> KeywordQuery:
+    clauses: List[List[str]] = []
+    join_next = False
+    for m in _TOKEN_RE.finditer(text or ""):
+        phrase, word = m.group(1), m.group(2)
+        if phrase is None and word in _OR_TOKENS:
+            join_next = bool(clauses)
+            continue
+        if phrase is None and word in _AND_TOKENS:
+            join_next = False
+            continue
+        term = _normalize_term(phrase if phrase is not None else word)
+        if not term:
+            continue
+        if join_next:
+            clauses[-1].append(term)
+        else:
+            clauses.append([term])
+        join_next = False
+    return KeywordQuery(tuple(dict.fromkeys(tuple(dict.fromkeys(c)) for c in clauses)))
+
+
+@functools.lru_cache(maxsize=512)
+def parse_keywords(text: Optional[str]) -> KeywordQuery:
+    """Parsea palabras_clave (cacheado: las mismas búsquedas se repiten mucho)."""
+    return _parse(text or "")
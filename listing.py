@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Registro compacto de un anuncio (__slots__), usado de punta a punta: lo arman los
+scrapers, se filtra, deduplica, cachea y guarda como Listing, y recién se convierte
+a dict al responder (to_dict). No depende de pandas; to_frame/from_frame quedan
+como adaptadores opcionales para análisis o exportar a CSV.
+Los valores numéricos (precio en soles, m², dormitorios, baños) se parsean una
+sola vez por anuncio y los reusan el filtro estricto, el ordenamiento de /search
+y el almacén. Si el mismo inmueble aparece en otras fuentes (duplicates.py), el
+anuncio canónico lleva sus links en `alternates` ("alternativos" en la respuesta).
+El id es estable (listing_id): el mismo anuncio tiene el mismo id en cada scrape.
+"""
+import uuid
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from features import first_int, parse_price
+from keywords import searchable_text
+
+# Claves de la API (las del modelo Property); "baños" se guarda en el atributo `banos`
+FIELDS = ("id", "titulo", "precio", "m2", "dormitorios", "baños", "descripcion", "link",
+          "fuente", "scraped_at", "imagen_url")
+_ATTRS = tuple("banos" if f == "baños" else f for f in FIELDS)
+_ATTR_BY_KEY = dict(zip(FIELDS, _ATTRS), banos="banos", alternativos="alternates")
+
+
+# Espacio de nombres fijo de los ids: no cambiarlo, o cambian todos los ids publicados
+_ID_NAMESPACE = uuid.UUID("ab9ab191-af77-494a-8bc5-d80c4b0ed1de")
+# Parámetros de tracking que algunos portales agregan al link sin cambiar el anuncio:
+# nombres exactos (no "reference" ni "refId", que sí identifican anuncios) y el prefijo utm_
+_TRACKING_PARAMS = frozenset(("fbclid", "gclid", "ref"))
+_TRACKING_PREFIXES = ("utm_",)
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in _TRACKING_PARAMS or param.startswith(_TRACKING_PREFIXES)
+
+
+def normalize_link(link: str) -> str:
+    """
+    Link canónico: esquema y host en minúsculas, sin fragmento, sin parámetros de
+    tracking, con el resto de parámetros ordenados y sin "/" final.
+    """
+    link = (link or "").strip()
+    if not link:
+        return ""
+    parts = urlsplit(link)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not _is_tracking(k))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"),
+                       urlencode(query), ""))
+
+
+def listing_id(fuente: str, link: str) -> str:
+    """Id estable (UUID v5) de fuente + link normalizado: mismo anuncio, mismo id."""
+    return str(uuid.uuid5(_ID_NAMESPACE, f"{(fuente or '').strip().lower()}|{normalize_link(link)}"))
+
+
+def _clean(value) -> str:
+    """Texto sin espacios en los extremos; None/NaN/"None" quedan como ""."""
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        if value != value:  # NaN
+            return ""
+        value = str(value)
+    value = value.strip()
+    return "" if value == "None" else value
+
+
+class Listing:
+    """Un anuncio. Todos los campos son texto ("" si no hay dato), como en la respuesta."""
+
+    __slots__ = _ATTRS + ("alternates", "_text", "_nums")
+
+    def __init__(self, titulo="", precio="", m2="", dormitorios="", banos="", descripcion="",
+                 link="", fuente="", imagen_url="", scraped_at="", id=""):
+        self.id = _clean(id)
+        self.titulo = _clean(titulo)
+        self.precio = _clean(precio)
+        self.m2 = _clean(m2)
+        self.dormitorios = _clean(dormitorios)
+        self.banos = _clean(banos)
+        self.descripcion = _clean(descripcion)
+        self.link = _clean(link)
+        self.fuente = _clean(fuente)
+        self.scraped_at = _clean(scraped_at)
+        self.imagen_url = _clean(imagen_url)
+        self.alternates = ()
+        self._text = None
+        self._nums = None
+
+    @classmethod
+    def from_dict(cls, record: dict) -> "Listing":
+        """Desde un dict con las claves de la API ("baños" o "banos")."""
+        listing = cls.__new__(cls)
+        for key, attr in zip(FIELDS, _ATTRS):
+            value = record.get(key)
+            if value is None and attr != key:
+                value = record.get(attr)
+            setattr(listing, attr, _clean(value))
+        listing.alternates = tuple(record.get("alternativos") or ())
+        listing._text = None
+        listing._nums = None
+        return listing
+
+    @property
+    def key(self) -> tuple:
+        """Clave de deduplicación entre fuentes."""
+        return (self.link, self.titulo)
+
+    @property
+    def text(self) -> str:
+        """Texto normalizado para palabras clave (keywords.searchable_text), calculado una vez."""
+        if self._text is None:
+            self._text = searchable_text(self.titulo, self.descripcion, self.m2, self.dormitorios, self.banos)
+        return self._text
+
+    @property
+    def numbers(self) -> tuple:
+        """(precio en soles, m², dormitorios, baños) como enteros o None, parseados una vez."""
+        if self._nums is None:
+            moneda, precio = parse_price(self.precio)
+            self._nums = (precio if moneda == "S" else None, first_int(self.m2),
+                          first_int(self.dormitorios), first_int(self.banos))
+        return self._nums
+
+    @property
+    def precio_soles(self) -> Optional[int]:
+        return self.numbers[0]
+
+    @property
+    def m2_num(self) -> Optional[int]:
+        return self.numbers[1]
+
+    @property
+    def dorm_num(self) -> Optional[int]:
+        return self.numbers[2]
+
+    @property
+    def banos_num(self) -> Optional[int]:
+        return self.numbers[3]
+
+    @property
+    def precio_m2(self) -> Optional[float]:
+        """Precio en soles por m² (None si falta alguno de los dos)."""
+        precio, m2 = self.numbers[0], self.numbers[1]
+        return precio / m2 if precio is not None and m2 else None
+
+    def get(self, key: str, default=None):
+        """Acceso por clave de la API, como en un dict (para código que aún recibe ambos)."""
+        attr = _ATTR_BY_KEY.get(key)
+        return getattr(self, attr) if attr is not None else default
+
+    def __getitem__(self, key: str):
+        attr = _ATTR_BY_KEY.get(key)
+        if attr is None:
+            raise KeyError(key)
+        return getattr(self, attr)
+
+    def with_alternate(self, other: "Listing") -> "Listing":
+        """
+        Copia con `other` como el mismo inmueble en otra fuente (una vez por link), o
+        self si ya estaba. No modifica este anuncio: puede estar ya enviado (streaming,
+        jobs) o compartido con otra búsqueda.
+        """
+        if other.link == self.link or any(a["link"] == other.link for a in self.alternates):
+            return self
+        copy = Listing.__new__(Listing)
+        for attr in Listing.__slots__:
+            setattr(copy, attr, getattr(self, attr))
+        copy.alternates = self.alternates + ({"fuente": other.fuente, "link": other.link},)
+        return copy
+
+    def to_dict(self) -> dict:
+        # Literal en vez de recorrer FIELDS: se llama una vez por anuncio en cada respuesta
+        record = {"id": self.id, "titulo": self.titulo, "precio": self.precio, "m2": self.m2,
+                  "dormitorios": self.dormitorios, "baños": self.banos, "descripcion": self.descripcion,
+                  "link": self.link, "fuente": self.fuente, "scraped_at": self.scraped_at,
+                  "imagen_url": self.imagen_url}
+        if self.alternates:
+            record["alternativos"] = list(self.alternates)
+        return record
+
+    def __eq__(self, other):
+        if not isinstance(other, Listing):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in _ATTRS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Listing(fuente={self.fuente!r}, titulo={self.titulo[:40]!r}, precio={self.precio!r}, link={self.link!r})"
+
+
+def as_listing(record) -> Listing:
+    """Listing tal cual, o uno nuevo si llega un dict (caché o almacén de una versión anterior)."""
+    return record if isinstance(record, Listing) else Listing.from_dict(record)
+
+
+def to_dicts(listings: Iterable) -> List[dict]:
+    """Lista de dicts para la respuesta (acepta Listing o dicts ya convertidos)."""
+    return [l.to_dict() if isinstance(l, Listing) else l for l in listings]
+
+
+def to_frame(listings: Iterable[Listing]):
+    """DataFrame con una fila por anuncio (adaptador opcional: importa pandas solo aquí)."""
+    import pandas as pd
+
+    return pd.DataFrame([l.to_dict() for l in listings], columns=list(FIELDS))
+
+
+def from_frame(df) -> List[Listing]:
+    """Listings desde un DataFrame con las columnas de la API."""
+    if df is None or len(df) == 0:
+        return []
+    return [Listing.from_dict(record) for record in df.to_dict("records")]
+
+
+# Criterios de orden de /search ("-" delante = descendente)
+SORT_KEYS = {
+    "precio": lambda l: l.precio_soles,
+    "m2": lambda l: l.m2_num,
+    "precio_m2": lambda l: l.precio_m2,
+}
+
+
+def parse_sort(sort: Optional[str]) -> Optional[Tuple[str, bool]]:
+    """(criterio, descendente) de un `sort=` como "precio" o "-m2"; None si no se ordena."""
+    sort = (sort or "").strip()
+    if not sort:
+        return None
+    name = sort.lstrip("-")
+    if name not in SORT_KEYS:
+        raise ValueError(f"Orden desconocido '{sort}' (opciones: {', '.join(SORT_KEYS)}, con '-' para descendente)")
+    return name, sort.startswith("-")
+
+
+def sort_listings(listings: List[Listing], sort: Optional[str]) -> List[Listing]:
+    """
+    Ordena por precio, m2 o precio_m2 (p. ej. "-m2"); los anuncios sin ese dato van
+    al final en ambos sentidos. Sin `sort` se conserva el orden de las fuentes.
+    """
+    parsed = parse_sort(sort)
+    if parsed is None:
+        return listings
+    name, descending = parsed
+    key = SORT_KEYS[name]
+    with_value = [l for l in listings if key(l) is not None]
+    without = [l for l in listings if key(l) is None]
+    with_value.sort(key=key, reverse=descending)
+    return with_value + without
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Campos pedidos en `fields=` ("titulo,precio,link") con su clave de la API; None = todos."""
+    names = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not names:
+        return None
+    unknown = [f for f in names if f not in _ATTR_BY_KEY]
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)} (opciones: {', '.join(FIELDS)}, alternativos)")
+    # "banos" se acepta como alias y se responde con la clave de la API
+    return tuple(dict.fromkeys("baños" if f == "banos" else f for f in names))
+
+
+def project(listings: Iterable[Listing], fields: Optional[Tuple[str, ...]]) -> list:
+    """Solo los campos pedidos de cada anuncio (sin `fields`, los Listing tal cual)."""
+    if not fields:
+        return list(listings)
+    attrs = [(f, _ATTR_BY_KEY[f]) for f in fields]
+    return [{f: getattr(l, attr) for f, attr in attrs} for l in listings]
+
+
+def dedupe(listings: Iterable[Listing], seen: Optional[set] = None) -> List[Listing]:
+    """Primera aparición de cada (link, titulo); `seen` permite deduplicar entre llamadas."""
+    seen = set() if seen is None else seen
+    unique = []
+    for listing in listings:
+        key = listing.key
+        if key not in seen:
+            seen.add(key)
+            unique.append(listing)
+    return unique
@@ -1,15 +1,43 @@
-from fastapi import FastAPI, HTTPException, Query
+# Primero: marca el inicio del proceso para medir cuánto tarda la API en quedar lista
+from startup import STARTUP
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+import time
 import logging
 
+from cache import SEARCH_CACHE, search_cache_key
+from search_executor import SEARCH_EXECUTOR, Overloaded, SourceFeed
+from jobs import JOB_SCHEDULER, scrape_by_source
+from store import get_store, save_results
+from crawler import CRAWLER
+from fetch import FETCHER
+from http_client import HTTP_CLIENT
+from listing import Listing, dedupe, parse_fields, parse_sort, project, sort_listings
+from duplicates import DEDUP_STATS, DuplicateIndex
+from compress import COMPRESSION, CompressionMiddleware
+from serialization import FastJSONResponse, dumps, etag_matches, listings_etag
+import config
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Scraper de Alquileres API", version="2.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up en segundo plano: el servidor ya atiende, /health dice "starting" hasta que termine
+    STARTUP.start()
+    if config.CRAWLER_ENABLED:
+        logger.info("🕷️ Iniciando pre-crawler en segundo plano")
+        CRAWLER.start()
+    yield
+    CRAWLER.stop()
+
+app = FastAPI(title="Scraper de Alquileres API", version="2.1.0", lifespan=lifespan)
 
 # --- Configurar CORS ---
 FRONTEND_ORIGINS = [
@@ -27,7 +55,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Compresión (gzip/br/zstd según Accept-Encoding; el streaming se comprime por evento) ---
+app.add_middleware(CompressionMiddleware, compression=COMPRESSION)
+
 # --- Modelos ---
+class Alternate(BaseModel):
+    fuente: str
+    link: str
+
 class Property(BaseModel):
     id: str
     titulo: str
@@ -40,6 +75,8 @@ class Property(BaseModel):
     fuente: str
     scraped_at: str
     imagen_url: str
+    # El mismo inmueble publicado en otras fuentes (solo si lo hay)
+    alternativos: Optional[List[Alternate]] = None
 
 class SearchRequest(BaseModel):
     zona: str
@@ -49,11 +86,29 @@ class SearchRequest(BaseModel):
     price_max: Optional[int] = None
     palabras_clave: Optional[str] = ""
 
+class SearchPage(BaseModel):
+    """Paginación, orden y proyección de /search (no cambian la clave de caché)."""
+    limit: Optional[int] = Field(None, ge=1)
+    offset: int = Field(0, ge=0)
+    sort: Optional[str] = None
+    fields: Optional[str] = None
+
+class SearchQuery(SearchRequest, SearchPage):
+    pass
+
+class JobRequest(SearchRequest):
+    priority: int = 0
+
 class SearchResponse(BaseModel):
     success: bool
     count: int
     properties: List[Property]
     message: Optional[str] = None
+    # Con limit/offset: total de coincidencias y dónde sigue la página siguiente
+    total: Optional[int] = None
+    offset: int = 0
+    limit: Optional[int] = None
+    next_offset: Optional[int] = None
 
 # --- Rutas básicas ---
 @app.get("/")
@@ -62,6 +117,8 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    if not STARTUP.ready:
+        return JSONResponse(status_code=503, content={"status": "starting", "timestamp": datetime.now().isoformat()})
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.get("/sources")
@@ -69,85 +126,387 @@ async def list_sources():
     sources = ["nestoria", "infocasas", "urbania", "properati", "doomos"]
     return {"sources": sources}
 
+# --- Búsqueda (con caché) ---
+def _scrape(request: SearchRequest) -> List[Listing]:
+    # 👇 Import perezoso para evitar crash al arrancar
+    from scraper import run_scrapers
+
+    properties = run_scrapers(
+        zona=request.zona,
+        dormitorios=request.dormitorios,
+        banos=request.banos,
+        price_min=request.price_min,
+        price_max=request.price_max,
+        palabras_clave=request.palabras_clave or ""
+    )
+    save_results(properties, request.zona)
+    return properties
+
+def _scrape_and_cache(key: tuple, request: SearchRequest) -> List[Listing]:
+    properties = _scrape(request)
+    SEARCH_CACHE.set(key, properties)
+    return properties
+
+def _from_store(key: tuple, request: SearchRequest) -> Optional[List[Listing]]:
+    """Si el pre-crawler recorrió la zona hace poco, responde desde el almacén sin scrapear."""
+    store = get_store()
+    if store is None or config.CRAWLER_FRESHNESS_HOURS <= 0:
+        return None
+    # 👇 Import perezoso
+    from scraper import SCRAPERS
+
+    # Todas las fuentes tienen que estar recorridas: si no, el almacén solo tendría parte de los anuncios
+    crawled_at = store.zone_crawled_at(request.zona, [name for name, _ in SCRAPERS])
+    if crawled_at is None or datetime.now() - crawled_at > timedelta(hours=config.CRAWLER_FRESHNESS_HOURS):
+        return None
+    # Sin tope de antigüedad se servirían para siempre los anuncios ya despublicados
+    properties = store.query(
+        request.zona, request.dormitorios, request.banos,
+        request.price_min, request.price_max, request.palabras_clave or "",
+        max_age_hours=config.CRAWLER_LISTING_MAX_AGE_HOURS
+    )
+    SEARCH_CACHE.set(key, properties)
+    return properties
+
+def _check_page(page: SearchPage):
+    """Valida sort/fields antes de buscar: un parámetro mal escrito es un 400, no un 500."""
+    try:
+        parse_sort(page.sort)
+        parse_fields(page.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _properties_response(properties: List[Listing], found: str, empty: str,
+                         page: Optional[SearchPage] = None, if_none_match: Optional[str] = None) -> Response:
+    """
+    Cuerpo de SearchResponse armado directo: los Listing ya tienen los tipos del modelo
+    Property, así que no se re-validan con pydantic y se serializan de una vez.
+    Con `page` se ordena por los valores numéricos ya parseados de cada Listing y solo
+    se serializa la página pedida (y solo los campos pedidos).
+    La respuesta lleva el ETag de la página; si coincide con If-None-Match se
+    devuelve 304 sin cuerpo (y sin serializar nada).
+    """
+    page = page or SearchPage()
+    total = len(properties)
+    end = total if page.limit is None else min(total, page.offset + page.limit)
+    items = project(sort_listings(properties, page.sort)[page.offset:end], parse_fields(page.fields))
+    next_offset = end if end < total else None
+    etag = listings_etag(items, total, page.offset, page.limit, page.sort, page.fields)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({
+        "success": True,
+        "count": len(items),
+        "properties": items,
+        "message": found.format(n=total) if properties else empty,
+        "total": total,
+        "offset": page.offset,
+        "limit": page.limit,
+        "next_offset": next_offset,
+    }, headers=headers)
+
+async def _search(request: SearchRequest, page: Optional[SearchPage] = None,
+                  if_none_match: Optional[str] = None) -> Response:
+    key = search_cache_key(
+        request.zona, request.dormitorios, request.banos,
+        request.price_min, request.price_max, request.palabras_clave or ""
+    )
+    # El refresco en segundo plano también pasa por el ejecutor (acotado y sin duplicados)
+    refresh = lambda: SEARCH_EXECUTOR.submit(key, lambda: _scrape(request)).result()
+    properties, state = SEARCH_CACHE.lookup(key, refresh)
+    if state is None:
+        properties = _from_store(key, request)
+    if properties is None:
+        # El scrape corre en el ejecutor: el event loop sigue atendiendo /health y demás
+        properties = await SEARCH_EXECUTOR.run(key, lambda: _scrape_and_cache(key, request))
+
+    return _properties_response(
+        properties or [],
+        found="Se encontraron {n} propiedades",
+        empty="No se encontraron propiedades que coincidan con los criterios",
+        page=page,
+        if_none_match=if_none_match,
+    )
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    logger.warning(f"Búsqueda rechazada por carga (Retry-After={e.retry_after}s)")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 # --- Endpoints de búsqueda ---
 @app.post("/search", response_model=SearchResponse)
-async def search_properties(request: SearchRequest):
+async def search_properties(request: SearchQuery):
+    _check_page(request)
     try:
-        # 👇 Import perezoso para evitar crash al arrancar
-        from scraper import run_scrapers
-
-        results = run_scrapers(
-            zona=request.zona,
-            dormitorios=request.dormitorios,
-            banos=request.banos,
-            price_min=request.price_min,
-            price_max=request.price_max,
-            palabras_clave=request.palabras_clave
-        )
-
-        if results.empty:
-            return SearchResponse(
-                success=True,
-                count=0,
-                properties=[],
-                message="No se encontraron propiedades que coincidan con los criterios"
-            )
-
-        properties = results.to_dict("records")
-
-        return SearchResponse(
-            success=True,
-            count=len(properties),
-            properties=properties,
-            message=f"Se encontraron {len(properties)} propiedades"
-        )
-
+        return await _search(request, request)
+    except Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.exception("Error en búsqueda POST")
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
 @app.get("/search", response_model=SearchResponse)
 async def search_properties_get(
+    http_request: Request,
     zona: str = Query(..., description="Zona a buscar (ej: miraflores, san isidro)"),
     dormitorios: str = Query("0", description="Número de dormitorios (0 para cualquier)"),
     banos: str = Query("0", description="Número de baños (0 para cualquier)"),
     price_min: Optional[int] = Query(None, description="Precio mínimo en soles"),
     price_max: Optional[int] = Query(None, description="Precio máximo en soles"),
-    palabras_clave: str = Query("", description="Palabras clave para filtrar (ej: 'piscina mascotas')")
+    palabras_clave: str = Query("", description="Palabras clave para filtrar (ej: 'piscina mascotas')"),
+    limit: Optional[int] = Query(None, ge=1, description="Tamaño de página (sin limit se devuelven todas)"),
+    offset: int = Query(0, ge=0, description="Posición del primer resultado de la página"),
+    sort: Optional[str] = Query(None, description="precio, m2 o precio_m2; con '-' delante para descendente"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (ej: 'titulo,precio,link')")
 ):
+    page = SearchPage(limit=limit, offset=offset, sort=sort, fields=fields)
+    _check_page(page)
     try:
-        # 👇 Import perezoso
-        from scraper import run_scrapers
-
-        results = run_scrapers(
+        return await _search(SearchRequest(
             zona=zona,
             dormitorios=dormitorios,
             banos=banos,
             price_min=price_min,
             price_max=price_max,
             palabras_clave=palabras_clave
-        )
+        ), page, if_none_match=http_request.headers.get("if-none-match"))
+    except Overloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.exception("Error en búsqueda GET")
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
-        if results.empty:
-            return SearchResponse(
-                success=True,
-                count=0,
-                properties=[],
-                message="No se encontraron propiedades que coincidan con los criterios"
-            )
+# --- Búsqueda en streaming (NDJSON) ---
+def _ndjson(event: dict) -> bytes:
+    return dumps(event) + b"\n"
 
-        properties = results.to_dict("records")
+def _start_stream(request: SearchRequest):
+    """
+    Decide antes de abrir el stream de dónde salen los resultados: la caché, un scrape
+    en curso (compartido) o uno nuevo en SEARCH_EXECUTOR. Si el ejecutor está lleno
+    lanza Overloaded, que todavía se puede responder como 503.
+    """
+    params = dict(zona=request.zona, dormitorios=request.dormitorios, banos=request.banos,
+                  price_min=request.price_min, price_max=request.price_max,
+                  palabras_clave=request.palabras_clave or "")
+    key = search_cache_key(**params)
+    cached, state = SEARCH_CACHE.lookup(key)
+    if state == "fresh":
+        return cached, None, None
+    future, feed = SEARCH_EXECUTOR.submit_feed(key, lambda feed: scrape_by_source(params, feed))
+    if feed is None:
+        # Hay un /search con la misma clave en curso: se espera su resultado completo
+        return None, None, future
+    # Scrape nuevo, o el de otro stream o job con la misma búsqueda: se lee su feed
+    return None, feed, None
 
-        return SearchResponse(
-            success=True,
-            count=len(properties),
-            properties=properties,
-            message=f"Se encontraron {len(properties)} propiedades"
-        )
+def _stream_search(cached: Optional[List[Listing]], feed: Optional[SourceFeed], future):
+    """
+    Emite una línea JSON por evento a medida que cada fuente termina:
+    "properties" (anuncios nuevos de esa fuente), "source" (conteos y tiempo),
+    y al final "done". La deduplicación entre fuentes es incremental por (link, titulo).
+    """
+    # 👇 Import perezoso
+    from scraper import SCRAPERS
 
-    except Exception as e:
-        logger.exception("Error en búsqueda GET")
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    start = time.perf_counter()
+    if cached is not None:
+        yield _ndjson({"event": "properties", "fuente": "cache", "count": len(cached), "properties": cached})
+        yield _ndjson({"event": "done", "count": len(cached), "cache": True,
+                       "segundos": round(time.perf_counter() - start, 2)})
+        return
+
+    yield _ndjson({"event": "start", "fuentes": [name for name, _ in SCRAPERS]})
+    if future is not None:
+        try:
+            properties = future.result()
+        except Exception as e:
+            logger.exception("Error en búsqueda streaming")
+            yield _ndjson({"event": "error", "message": f"Error interno del servidor: {str(e)}"})
+            return
+        if properties:
+            yield _ndjson({"event": "properties", "fuente": "search", "count": len(properties),
+                           "properties": properties})
+        yield _ndjson({"event": "done", "count": len(properties), "cache": False,
+                       "segundos": round(time.perf_counter() - start, 2)})
+        return
+
+    seen = set()
+    duplicates = DuplicateIndex.from_config() if config.DEDUP_NEAR else None
+    total = 0
+    for name, listings, info in feed:
+        nuevos = dedupe(listings, seen)
+        if duplicates is not None:
+            # Los ya enviados no reciben los links alternativos; el resultado en caché sí
+            nuevos = duplicates.collapse(nuevos)
+        total += len(nuevos)
+        if nuevos:
+            yield _ndjson({"event": "properties", "fuente": name, "count": len(nuevos), "properties": nuevos})
+        yield _ndjson({"event": "source", **info, "nuevos": len(nuevos),
+                       "t": round(time.perf_counter() - start, 2)})
+    if feed.error is not None:
+        logger.error(f"Error en búsqueda streaming: {feed.error}")
+        yield _ndjson({"event": "error", "message": f"Error interno del servidor: {str(feed.error)}"})
+        return
+    yield _ndjson({"event": "done", "count": total, "cache": False,
+                   "segundos": round(time.perf_counter() - start, 2)})
+
+def _stream_response(request: SearchRequest) -> StreamingResponse:
+    try:
+        source = _start_stream(request)
+    except Overloaded as e:
+        raise _overloaded(e)
+    # El generador es síncrono: Starlette lo itera en su threadpool, sin bloquear el event loop
+    return StreamingResponse(_stream_search(*source), media_type="application/x-ndjson")
+
+@app.get("/search/stream")
+async def search_properties_stream(
+    zona: str = Query(..., description="Zona a buscar (ej: miraflores, san isidro)"),
+    dormitorios: str = Query("0", description="Número de dormitorios (0 para cualquier)"),
+    banos: str = Query("0", description="Número de baños (0 para cualquier)"),
+    price_min: Optional[int] = Query(None, description="Precio mínimo en soles"),
+    price_max: Optional[int] = Query(None, description="Precio máximo en soles"),
+    palabras_clave: str = Query("", description="Palabras clave para filtrar (ej: 'piscina mascotas')")
+):
+    return _stream_response(SearchRequest(
+        zona=zona,
+        dormitorios=dormitorios,
+        banos=banos,
+        price_min=price_min,
+        price_max=price_max,
+        palabras_clave=palabras_clave
+    ))
+
+@app.post("/search/stream")
+async def search_properties_stream_post(request: SearchRequest):
+    return _stream_response(request)
+
+# --- Consulta directa al almacén (sin scrapear) ---
+@app.get("/listings", response_model=SearchResponse)
+def list_stored_properties(
+    http_request: Request,
+    zona: str = Query(..., description="Zona a buscar (ej: miraflores, san isidro)"),
+    dormitorios: str = Query("0", description="Número de dormitorios (0 para cualquier)"),
+    banos: str = Query("0", description="Número de baños (0 para cualquier)"),
+    price_min: Optional[int] = Query(None, description="Precio mínimo en soles"),
+    price_max: Optional[int] = Query(None, description="Precio máximo en soles"),
+    palabras_clave: str = Query("", description="Palabras clave para filtrar (ej: 'piscina mascotas')"),
+    max_age_hours: Optional[float] = Query(None, description="Solo anuncios vistos en las últimas N horas"),
+    limit: Optional[int] = Query(None, ge=1, description="Cantidad máxima de resultados")
+):
+    store = get_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="El almacén de anuncios está deshabilitado")
+    properties = store.query(zona, dormitorios, banos, price_min, price_max, palabras_clave,
+                             max_age_hours=max_age_hours, limit=limit)
+    return _properties_response(
+        properties,
+        found="Se encontraron {n} propiedades guardadas",
+        empty="No hay anuncios guardados que coincidan con los criterios",
+        if_none_match=http_request.headers.get("if-none-match"),
+    )
+
+@app.get("/listings/stats")
+def stored_listings_stats():
+    store = get_store()
+    return store.stats() if store is not None else {"enabled": False}
+
+@app.get("/crawler/stats")
+def crawler_stats():
+    return CRAWLER.stats()
+
+# --- Búsquedas asíncronas (jobs) ---
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    params = request.model_dump(exclude={"priority"})
+    params["palabras_clave"] = params.get("palabras_clave") or ""
+    try:
+        job = JOB_SCHEDULER.submit(params, priority=request.priority)
+    except Overloaded as e:
+        raise _overloaded(e)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "results_url": f"/jobs/{job.id}/results",
+    }
+
+def _get_job_or_404(job_id: str):
+    job = JOB_SCHEDULER.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="Posición del primer resultado"),
+    limit: int = Query(50, ge=1, le=500, description="Cantidad máxima de resultados")
+):
+    job = _get_job_or_404(job_id)
+    properties = job.page(offset, limit)
+    total = len(job.results)
+    next_offset = offset + len(properties)
+    return FastJSONResponse({
+        "job_id": job.id,
+        "status": job.status,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset if next_offset < total else None,
+        "properties": properties,
+    })
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    _get_job_or_404(job_id)
+    return JOB_SCHEDULER.cancel(job_id).to_dict()
+
+@app.get("/jobs")
+async def jobs_stats():
+    return JOB_SCHEDULER.stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return SEARCH_CACHE.stats()
+
+@app.get("/search/stats")
+async def search_stats():
+    return SEARCH_EXECUTOR.stats()
+
+@app.get("/fetch/stats")
+async def fetch_stats():
+    return FETCHER.stats()
+
+@app.get("/http/stats")
+async def http_stats():
+    return HTTP_CLIENT.stats()
+
+@app.get("/startup/stats")
+async def startup_stats():
+    return STARTUP.stats()
+
+@app.get("/compression/stats")
+async def compression_stats():
+    return COMPRESSION.stats()
+
+@app.get("/dedup/stats")
+async def dedup_stats():
+    return DEDUP_STATS.stats()
+
+# --- Imágenes de detalle (modo perezoso) ---
+@app.get("/image")
+def get_image(link: str = Query(..., description="Link del anuncio de Nestoria")):
+    # 👇 Import perezoso
+    from images import fetch_nestoria_image, is_nestoria_link
+
+    if not is_nestoria_link(link):
+        raise HTTPException(status_code=400, detail="Solo se resuelven imágenes de anuncios de Nestoria")
+    return {"link": link, "imagen_url": fetch_nestoria_image(link)}
 
 # --- Ejecución local ---
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Parser HTML intercambiable para los listados.
+La lógica de extracción de cada fuente usa la API de BeautifulSoup (select,
+select_one, get_text, get, find_all). Aquí se elige el backend por config:
+- "html.parser": BeautifulSoup con el parser de la librería estándar (el más lento).
+- "lxml": BeautifulSoup con el árbol construido por lxml.
+- "selectolax": motor lexbor de selectolax detrás de un adaptador con la misma API.
+Si el paquete del backend elegido no está instalado se usa "html.parser".
+"""
+import re
+import logging
+from typing import Callable, List, Optional
+
+from bs4 import BeautifulSoup
+
+import config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    LexborHTMLParser = None
+    HAS_SELECTOLAX = False
+
+# "sel:contains('texto')" de soupsieve: lexbor no lo soporta, se filtra por texto aparte
+_CONTAINS_RE = re.compile(r"^(.*?):(?:-soup-)?contains\((['\"])(.*)\2\)$")
+
+
+class SelectolaxNode:
+    """Subconjunto de la API de bs4.Tag que usan los scrapers, sobre un nodo de selectolax."""
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    @property
+    def attrs(self) -> dict:
+        return dict(self._node.attributes)
+
+    def get(self, key: str, default=None):
+        value = self._node.attributes.get(key, default)
+        return default if value is None and key not in self._node.attributes else value
+
+    def __getitem__(self, key: str):
+        return self._node.attributes[key]
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        if not strip:
+            return self._node.text(deep=True, separator=separator, strip=False)
+        # Igual que bs4: cada texto recortado, sin vacíos, unidos por el separador
+        parts = (t.strip() for t in self._node.text(deep=True, separator="\x00", strip=False).split("\x00"))
+        return separator.join(p for p in parts if p)
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    def select(self, css: str) -> List["SelectolaxNode"]:
+        m = _CONTAINS_RE.match(css.strip())
+        if m:
+            base, needle = m.group(1) or "*", m.group(3)
+            return [n for n in self.select(base) if needle in n.get_text()]
+        return [SelectolaxNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css: str) -> Optional["SelectolaxNode"]:
+        if _CONTAINS_RE.match(css.strip()):
+            found = self.select(css)
+            return found[0] if found else None
+        node = self._node.css_first(css)
+        return SelectolaxNode(node) if node is not None else None
+
+    def find_all(self, name=None, class_: Optional[Callable] = None) -> List["SelectolaxNode"]:
+        names = [name] if isinstance(name, str) else list(name or ["*"])
+        nodes = self.select(", ".join(names))
+        if class_ is None:
+            return nodes
+        return [n for n in nodes if class_(n.get("class"))]
+
+    def __bool__(self) -> bool:
+        return True
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Backend efectivo: el pedido si está disponible, si no "html.parser"."""
+    name = (name or config.HTML_PARSER or "html.parser").lower()
+    if name == "lxml" and HAS_LXML:
+        return name
+    if name == "selectolax" and HAS_SELECTOLAX:
+        return name
+    if name not in ("html.parser",):
+        logger.warning(f"Parser HTML '{name}' no disponible, se usa html.parser")
+    return "html.parser"
+
+
+_BACKEND = None
+
+
+def parse_html(html: str, backend: Optional[str] = None):
+    """Árbol con API estilo BeautifulSoup usando el backend configurado (o `backend`)."""
+    global _BACKEND
+    if backend is None:
+        if _BACKEND is None:
+            _BACKEND = resolve_backend()
+        backend = _BACKEND
+    else:
+        backend = resolve_backend(backend)
+    if backend == "selectolax":
+        return SelectolaxNode(LexborHTMLParser(html or "").root)
+    return BeautifulSoup(html or "", backend)
@@ -2,37 +2,65 @@
 """
 Scraper completo: Nestoria, Infocasas, Urbania, Properati, Doomos
 Filtros opcionales: zona, dormitorios, baños, price_min, price_max, palabras_clave
-Salida: DataFrame combinado (mostrado) + CSV (combined_anuncios_filtrados.csv)
+Salida: lista de Listing combinada (listing.to_frame la convierte a DataFrame / CSV)
 """
 import re
 import time
-import os
 import requests
-import pandas as pd
-from typing import Optional
-from bs4 import BeautifulSoup
+from typing import List, Optional
+from urllib.parse import urljoin
 import logging
 from datetime import datetime
-import uuid
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+import config
+from driver_pool import make_pool
+from images import resolve_images
+from fetch import FETCHER
+from http_client import HTTP_CLIENT
+from parsing import parse_html
+from features import extract_features, extract_tag_features, first_int, parse_price
+from keywords import parse_keywords
+from listing import Listing, as_listing, dedupe, from_frame, listing_id, to_frame
+from duplicates import collapse_duplicates
+from timings import timed, collect as collect_timings, rounded as rounded_timings
+from waits import WAIT_PROFILES, wait_until_ready, wait_for_count_stable, scroll_until_stable
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Selenium (solo para otros scrapers, no para Nestoria)
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+COMMON_UA = config.COMMON_UA
+
+# Errores de la fuente que corre en este hilo (ver _run_source): los scrapers capturan
+# sus excepciones y devuelven lo que tengan, así que el fallo se anota aparte
+_source_errors = threading.local()
 
-COMMON_UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36")
+def _scraper_error(message: str):
+    """Loguea un error que deja a la fuente sin resultados (o incompletos) y lo anota para _run_source."""
+    logger.error(message)
+    errors = getattr(_source_errors, "current", None)
+    if errors is not None:
+        errors.append(message)
 
 # -------------------- Helpers --------------------
+@functools.lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    """Resuelve (y descarga si hace falta) el binario de chromedriver una sola vez por proceso."""
+    # Import perezoso: selenium y webdriver_manager solo se cargan si alguna fuente abre Chrome
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    with timed("driver_install"):
+        return ChromeDriverManager().install()
+
 def create_driver(headless: bool = True):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
     options = Options()
     if headless:
         options.add_argument("--headless=new")
@@ -43,7 +71,7 @@ def create_driver(headless: bool = True):
     options.add_argument("--window-size=1920,1080")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
     try:
         driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
@@ -52,6 +80,33 @@ def create_driver(headless: bool = True):
         pass
     return driver
 
+# Los scrapers piden prestado un Chrome caliente en vez de crear uno por búsqueda
+DRIVER_POOL = make_pool(
+    lambda: create_driver(headless=True),
+    min_size=config.DRIVER_POOL_MIN,
+    max_size=config.DRIVER_POOL_MAX,
+    max_uses=config.DRIVER_MAX_USES,
+    max_rss_mb=config.DRIVER_MAX_RSS_MB,
+    acquire_timeout=config.DRIVER_ACQUIRE_TIMEOUT,
+    enabled=config.DRIVER_POOL_ENABLED,
+)
+
+def _base_url(source: str) -> str:
+    """URL base de una fuente (configurable para apuntar a un servidor de fixtures)."""
+    return config.SOURCE_BASE_URLS[source]
+
+def _absolute_link(source: str, href: str) -> str:
+    if href and href.startswith("/"):
+        return _base_url(source) + href
+    return href or ""
+
+def _mostly_known(links, known_links) -> bool:
+    """True si al menos INCREMENTAL_STOP_RATIO de los links ya se habían visto."""
+    if not links or not known_links:
+        return False
+    known = sum(1 for link in links if link in known_links)
+    return known / len(links) >= config.INCREMENTAL_STOP_RATIO
+
 def slugify_zone(zona: str) -> str:
     if not zona:
         return ""
@@ -64,22 +119,13 @@ def slugify_zone(zona: str) -> str:
     return s
 
 def parse_precio_con_moneda(precio_str):
-    if not precio_str:
-        return (None, None)
-    s = str(precio_str)
-    moneda = None
-    if "S/" in s or s.strip().startswith("S/"):
-        moneda = "S"
-    elif "$" in s:
-        moneda = "USD"
-    nums = re.sub(r"[^\d]", "", s)
-    return (moneda, int(nums)) if nums else (moneda, None)
+    return parse_price(precio_str)
 
 def _extract_m2(s):
     if s is None:
         return None
-    m = re.search(r"(\d{1,4})\s*(m²|m2)", str(s), flags=re.I)
-    return int(m.group(1)) if m else None
+    m2 = extract_features(str(s)).m2
+    return int(m2) if m2 else None
 
 def _parse_price_soles(s):
     moneda, val = parse_precio_con_moneda(str(s))
@@ -87,10 +133,6 @@ def _parse_price_soles(s):
 
 # -------------------- Nestoria (VERSÓN CORREGIDA Y FUNCIONAL CON IMÁGENES) --------------------
 EXCEPCIONES = ["miraflores", "tarapoto", "la molina", "magdalena", "lambayeque", "ventanilla", "la victoria"]
-def normalize_text(text):
-    """Elimina acentos y pasa a minúsculas"""
-    import unicodedata
-    return unicodedata.normalize('NFKD', text.lower()).encode('ASCII','ignore').decode('utf-8')
 
 def build_zona_slug_nestoria(zona_input: str) -> str:
     if not zona_input or not zona_input.strip():
@@ -106,26 +148,78 @@ def _extract_int_from_text(s):
     Extrae el primer número entero de una cadena de texto.
     Es más robusta y maneja espacios, saltos de línea y caracteres especiales.
     """
-    if s is None:
-        return None
-    # Convertir a string y limpiar espacios en blanco alrededor
-    text = str(s).strip()
-    # Reemplazar cualquier espacio en blanco (incluyendo &nbsp;, tabulaciones, saltos de línea) por un espacio normal
-    text = re.sub(r'\s+', ' ', text)
-    # Buscar el primer número entero
-    m = re.search(r'(\d+)', text)
-    return int(m.group(1)) if m else None
+    return first_int(s)
+
+@timed("extract")
+def _parse_nestoria_cards(soup, price_min: Optional[int] = None, price_max: Optional[int] = None) -> list:
+    """Anuncios de una página de resultados de Nestoria (descarta los que no cumplen el precio en soles)."""
+    results = []
+    # Seleccionar los contenedores de anuncios
+    items = soup.select("li.rating__new") or soup.select("ul#main__listing_res > li")
+    if not items:
+        items = [li for li in soup.find_all("li") if li.select_one(".result__details__price")]
+    if not items:
+        items = soup.find_all(["li", "div", "article"], class_=lambda x: x and any(cls in x for cls in ["listing", "result", "property", "item"]))
+    seen_links = set()
+    for i, li in enumerate(items):
+        try:
+            # Extraer link
+            a_tag = li.select_one("a.results__link") or li.select_one("a[href]")
+            if not a_tag:
+                continue
+            link = a_tag.get("data-href") or a_tag.get("href") or ""
+            if link and link.startswith("/"):
+                link = _base_url("nestoria") + link
+            if not link or link in seen_links:
+                continue
+            # Extraer título
+            title_elem = li.select_one(".listing__title__text") or li.select_one(".listing__title") or a_tag
+            title = title_elem.get_text(" ", strip=True) if title_elem else a_tag.get_text(" ", strip=True)[:140]
+            # Extraer precio
+            price_elem = li.select_one(".result__details__price span") or li.select_one(".result__details__price") or li.select_one(".price")
+            price_text = price_elem.get_text(" ", strip=True) if price_elem else ""
+            # Texto de la card una sola vez: dormitorios, baños, m² y precio en una pasada
+            text_content = li.get_text(" ", strip=True)
+            feats = extract_features(text_content, price_text)
+            # Aplicar filtro de precio aquí mismo
+            moneda, precio_val = feats.moneda, feats.precio
+            if price_max is not None and moneda == "S" and precio_val is not None and precio_val > price_max:
+                continue
+            if price_min is not None and moneda == "S" and precio_val is not None and precio_val < price_min:
+                continue
+            if moneda == "USD" and (price_max is not None or price_min is not None):
+                continue
+            # Extraer descripción
+            desc_elem = li.select_one(".listing__description") or li.select_one(".result__summary") or None
+            desc = desc_elem.get_text(" ", strip=True) if desc_elem else text_content[:800]
+            results.append(Listing(
+                titulo=title,
+                precio=price_text,
+                m2=feats.m2,
+                dormitorios=feats.dormitorios,
+                banos=feats.banos,
+                descripcion=desc,
+                link=link,
+                fuente="nestoria",
+                imagen_url="",
+            ))
+            seen_links.add(link)
+        except Exception as e:
+            logger.error(f"Error procesando anuncio en Nestoria: {e}")
+            continue
+    return results
 
 def scrape_nestoria(zona: str = "", dormitorios: str = "0", banos: str = "0",
                     price_min: Optional[int] = None, price_max: Optional[int] = None,
                     palabras_clave: str = "", max_results_per_zone: int = 200):
     """
-    Scraper FINAL para Nestoria. Usa Selenium.
-    Extrae la imagen DEL DETALLE de cada anuncio.
-    Solo entra al detalle para obtener la imagen, no para extraer más datos.
+    Scraper FINAL para Nestoria. Usa Selenium para el listado.
+    La imagen está en el DETALLE de cada anuncio: se resuelve aparte con
+    images.resolve_images (en paralelo y con tiempo límite), o de forma
+    perezosa con GET /image según NESTORIA_IMAGE_MODE.
     """
     zona_slug = build_zona_slug_nestoria(zona)
-    base_url = f"https://www.nestoria.pe/{zona_slug}/inmuebles/alquiler"
+    base_url = f"{_base_url('nestoria')}/{zona_slug}/inmuebles/alquiler"
     if dormitorios and dormitorios != "0":
         base_url += f"/dormitorios-{dormitorios}"
     params = []
@@ -138,173 +232,164 @@ def scrape_nestoria(zona: str = "", dormitorios: str = "0", banos: str = "0",
     if params:
         base_url += "?" + "&".join(params)
     logger.info(f"URL de Nestoria: {base_url}")
-    driver = create_driver(headless=True)
     results = []
     try:
-        driver.get(base_url)
-        time.sleep(3)
-        # Scroll para cargar más resultados
-        for _ in range(5):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        # Seleccionar los contenedores de anuncios
-        items = soup.select("li.rating__new") or soup.select("ul#main__listing_res > li")
-        if not items:
-            items = [li for li in soup.find_all("li") if li.select_one(".result__details__price")]
-        if not items:
-            items = soup.find_all(["li", "div", "article"], class_=lambda x: x and any(cls in x for cls in ["listing", "result", "property", "item"]))
-        seen_links = set()
-        for i, li in enumerate(items):
-            try:
-                # Extraer link
-                a_tag = li.select_one("a.results__link") or li.select_one("a[href]")
-                if not a_tag:
-                    continue
-                link = a_tag.get("data-href") or a_tag.get("href") or ""
-                if link and link.startswith("/"):
-                    link = "https://www.nestoria.pe" + link
-                if not link or link in seen_links:
-                    continue
-                # Extraer título
-                title_elem = li.select_one(".listing__title__text") or li.select_one(".listing__title") or a_tag
-                title = title_elem.get_text(" ", strip=True) if title_elem else a_tag.get_text(" ", strip=True)[:140]
-                # Extraer precio
-                price_elem = li.select_one(".result__details__price span") or li.select_one(".result__details__price") or li.select_one(".price")
-                price_text = price_elem.get_text(" ", strip=True) if price_elem else ""
-                # Aplicar filtro de precio aquí mismo
-                moneda, precio_val = parse_precio_con_moneda(price_text)
-                if price_max is not None and moneda == "S" and precio_val is not None and precio_val > price_max:
-                    continue
-                if price_min is not None and moneda == "S" and precio_val is not None and precio_val < price_min:
-                    continue
-                if moneda == "USD" and (price_max is not None or price_min is not None):
-                    continue
-                # Extraer descripción
-                desc_elem = li.select_one(".listing__description") or li.select_one(".result__summary") or None
-                desc = desc_elem.get_text(" ", strip=True) if desc_elem else li.get_text(" ", strip=True)[:800]
-                # Extraer dormitorios, baños y m2 del texto
-                text_content = li.get_text(" ", strip=True).lower()
-                dormitorios_text = ""
-                dorm_match = re.search(r'(\d+)\s*dormitori', text_content, flags=re.I)
-                if dorm_match:
-                    dormitorios_text = dorm_match.group(1)
-                banos_text = ""
-                banos_match = re.search(r'(\d+)\s*bañ', text_content, flags=re.I)
-                if banos_match:
-                    banos_text = banos_match.group(1)
-                m2_text = ""
-                m2_match = re.search(r'(\d{1,4})\s*(m²|m2)', text_content, flags=re.I)
-                if m2_match:
-                    m2_text = m2_match.group(1)
-                # AHORA: Entrar al detalle para obtener la imagen principal
-                img_url = ""
-                try:
-                    driver.get(link)
-                    time.sleep(1)  # Esperar a que cargue la imagen
-                    detail_soup = BeautifulSoup(driver.page_source, "html.parser")
-                    # Buscar la imagen principal en el detalle
-                    main_img = detail_soup.select_one("img[data-element='main-swiper-slide']")
-                    if main_img:
-                        img_url = main_img.get("src") or main_img.get("data-src") or ""
-                        if img_url and img_url.startswith("//"):
-                            img_url = "https:" + img_url
-                        img_url = img_url.strip()
-                    else:
-                        # Fallback: buscar cualquier img dentro de .photos .swiper-slide
-                        fallback_img = detail_soup.select_one(".photos .swiper-slide img")
-                        if fallback_img:
-                            img_url = fallback_img.get("src") or fallback_img.get("data-src") or ""
-                            if img_url and img_url.startswith("//"):
-                                img_url = "https:" + img_url
-                            img_url = img_url.strip()
-                except Exception as e:
-                    logger.error(f"Error al obtener imagen de detalle en Nestoria para {link}: {e}")
-                    pass
-                results.append({
-                    "titulo": title,
-                    "precio": price_text,
-                    "m2": m2_text,
-                    "dormitorios": dormitorios_text,
-                    "baños": banos_text,
-                    "descripcion": desc,
-                    "link": link,
-                    "fuente": "nestoria",
-                    "imagen_url": img_url,
-                    "scraped_at": datetime.now().isoformat(),
-                    "id": str(uuid.uuid4())
-                })
-                seen_links.add(link)
-            except Exception as e:
-                logger.error(f"Error procesando anuncio en Nestoria: {e}")
-                continue
+        profile = WAIT_PROFILES["nestoria"]
+
+        def _browser_html():
+            with DRIVER_POOL.lease() as driver:
+                with timed("page_load"):
+                    driver.get(base_url)
+                wait_until_ready(driver, profile)
+                # Scroll para cargar más resultados (se corta cuando ya no llega nada nuevo)
+                scroll_until_stable(driver, profile)
+                return driver.page_source
+
+        soup = FETCHER.fetch("nestoria", base_url, profile.ready_selector, _browser_html)
+        results = _parse_nestoria_cards(soup, price_min, price_max)
     except Exception as e:
-        logger.error(f"Error en Nestoria scraper: {e}")
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        _scraper_error(f"Error en Nestoria scraper: {e}")
+    # Las imágenes están solo en el detalle: se resuelven en paralelo fuera del navegador
+    if results and config.NESTORIA_IMAGE_MODE == "deadline":
+        with timed("images"):
+            images = resolve_images([r.link for r in results])
+        for r in results:
+            r.imagen_url = images.get(r.link, "")
     logger.info(f"Procesados {len(results)} anuncios válidos de Nestoria")
-    return pd.DataFrame(results)
+    return results
 
 # -------------------- Infocasas --------------------
+# Primer link de cada card ya cargada (para el modo incremental)
+_INFOCASAS_LINKS_JS = """
+return Array.from(document.querySelectorAll('div.listingCard, article'))
+    .map(n => n.querySelector('a[href]'))
+    .filter(a => a)
+    .map(a => a.getAttribute('href'));
+"""
+# Texto que identifica cada tag de tipología: dormitorios, baños, m²
+_INFOCASAS_TAG_UNITS = ("Dorm", "Baño", "m²")
+
+# Mapeo específico para InfoCasas
+ZONA_MAPEO_INFOCASAS = {
+    "ancón": "ancon",
+    "ate": "ate",
+    "barranco": "barranco",
+    "breña": "breña",
+    "carabayllo": "carabayllo",
+    "chaclacayo": "chaclacayo",
+    "chorrillos": "chorrillos",
+    "cieneguilla": "cieneguilla",
+    "comas": "comas",
+    "el agustino": "el-agustino",
+    "independencia": "independencia",
+    "jesús maría": "jesus-maria",
+    "la molina": "la-molina",
+    "la victoria": "la-victoria",
+    "lima": "lima-cercado",
+    "lince": "lince",
+    "los olivos": "los-olivos",
+    "lurigancho": "lurigancho",
+    "lurín": "lurin",
+    "magdalena del mar": "magdalena-del-mar",
+    "miraflores": "miraflores",
+    "pachacámac": "pachacamac",
+    "pucusana": "pucusana",
+    "pueblo libre": "pueblo-libre",
+    "puente piedra": "puente-piedra",
+    "punta hermosa": "punta-hermosa",
+    "punta negra": "punta-negra",
+    "rímac": "rimac",
+    "san bartolo": "san-bartolo",
+    "san borja": "san-borja",
+    "san isidro": "san-isidro",
+    "san juan de lurigancho": "san-juan-de-lurigancho",
+    "san juan de miraflores": "san-juan-de-miraflores",
+    "san luis": "san-luis",
+    "san martín de porres": "san-martin-de-porres",
+    "san miguel": "san-miguel",
+    "santa anita": "santa-anita",
+    "santa maría del mar": "santa-maria-del-mar",
+    "santa rosa": "santa-rosa",
+    "santiago de surco": "santiago-de-surco",
+    "surquillo": "surquillo",
+    "villa el salvador": "villa-el-salvador",
+    "villa maría del triunfo": "villa-maria-del-triunfo"
+}
+
+@timed("extract")
+def _parse_infocasas_cards(soup) -> list:
+    """Anuncios de una página de resultados de InfoCasas."""
+    results = []
+    # Buscar los contenedores de anuncios específicos de InfoCasas
+    nodes = soup.select("div.listingCard") or soup.select("article")
+    for n in nodes:
+        try:
+            # Verificar que el elemento tiene el atributo href
+            a = n.select_one("a[href]")
+            if not a:
+                continue
+            href = a.get("href") if a else ""
+            # Construir URL completa
+            if href and href.startswith("/"):
+                href = _base_url("infocasas") + href
+            # Extraer título
+            title_elem = n.select_one("h2.lc-title") or n.select_one(".lc-title") or a
+            title = title_elem.get_text(" ", strip=True) if title_elem else n.get_text(" ", strip=True)[:250]
+            # Extraer precio
+            price = ""
+            price_elem = n.select_one(".main-price") or n.select_one(".lc-price p") or n.select_one(".property-price-tag p")
+            if price_elem:
+                price = price_elem.get_text(" ", strip=True)
+            # Extraer ubicación
+            location_elem = n.select_one(".lc-location") or n.select_one("strong")
+            location = location_elem.get_text(" ", strip=True) if location_elem else ""
+            # Dormitorios, baños y m² de los tags (lc-typologyTag__item), cada tag según su unidad
+            feats = extract_tag_features(
+                (item.get_text(" ", strip=True) for item in n.select(".lc-typologyTag__item strong")),
+                _INFOCASAS_TAG_UNITS, price,
+            )
+            # Extraer descripción
+            desc_elem = n.select_one(".lc-description") or n.select_one("p")
+            desc = desc_elem.get_text(" ", strip=True) if desc_elem else n.get_text(" ", strip=True)[:400]
+            # EXTRAER IMAGEN DIRECTAMENTE DEL LISTADO (NO ENTRAR AL DETALLE)
+            img_url = ""
+            img_tag = n.select_one(".cardImageGallery .gallery-image img")
+            if img_tag:
+                img_url = img_tag.get("src") or img_tag.get("data-src") or ""
+                if img_url and img_url.startswith("//"):
+                    img_url = "https:" + img_url
+                img_url = img_url.strip()
+            results.append(Listing(
+                titulo=title,
+                precio=price,
+                m2=feats.m2,
+                dormitorios=feats.dormitorios,
+                banos=feats.banos,
+                descripcion=desc,
+                link=href or "",
+                fuente="infocasas",
+                imagen_url=img_url,
+            ))
+        except Exception as e:
+            logger.error(f"Error procesando anuncio en InfoCasas: {e}")
+            continue
+    return results
+
 def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
                      price_min: Optional[int] = None, price_max: Optional[int] = None,
-                     palabras_clave: str = "", max_scrolls: int = 8):
-    # Mapeo específico para InfoCasas
-    ZONA_MAPEO_INFOCASAS = {
-        "ancón": "ancon",
-        "ate": "ate",
-        "barranco": "barranco",
-        "breña": "breña",
-        "carabayllo": "carabayllo",
-        "chaclacayo": "chaclacayo",
-        "chorrillos": "chorrillos",
-        "cieneguilla": "cieneguilla",
-        "comas": "comas",
-        "el agustino": "el-agustino",
-        "independencia": "independencia",
-        "jesús maría": "jesus-maria",
-        "la molina": "la-molina",
-        "la victoria": "la-victoria",
-        "lima": "lima-cercado",
-        "lince": "lince",
-        "los olivos": "los-olivos",
-        "lurigancho": "lurigancho",
-        "lurín": "lurin",
-        "magdalena del mar": "magdalena-del-mar",
-        "miraflores": "miraflores",
-        "pachacámac": "pachacamac",
-        "pucusana": "pucusana",
-        "pueblo libre": "pueblo-libre",
-        "puente piedra": "puente-piedra",
-        "punta hermosa": "punta-hermosa",
-        "punta negra": "punta-negra",
-        "rímac": "rimac",
-        "san bartolo": "san-bartolo",
-        "san borja": "san-borja",
-        "san isidro": "san-isidro",
-        "san juan de lurigancho": "san-juan-de-lurigancho",
-        "san juan de miraflores": "san-juan-de-miraflores",
-        "san luis": "san-luis",
-        "san martín de porres": "san-martin-de-porres",
-        "san miguel": "san-miguel",
-        "santa anita": "santa-anita",
-        "santa maría del mar": "santa-maria-del-mar",
-        "santa rosa": "santa-rosa",
-        "santiago de surco": "santiago-de-surco",
-        "surquillo": "surquillo",
-        "villa el salvador": "villa-el-salvador",
-        "villa maría del triunfo": "villa-maria-del-triunfo"
-    }
+                     palabras_clave: str = "", max_scrolls: int = 8,
+                     known_links: Optional[set] = None):
+    """
+    Con known_links (modo incremental) deja de hacer scroll cuando los anuncios
+    recién cargados son casi todos ya conocidos.
+    """
     # Construir URL base según la zona
     if zona and zona.strip():
         zona_lower = zona.strip().lower()
         zone_slug = ZONA_MAPEO_INFOCASAS.get(zona_lower, slugify_zone(zona))
-        base = f"https://www.infocasas.com.pe/alquiler/casas-y-departamentos/lima/{zone_slug}"
+        base = f"{_base_url('infocasas')}/alquiler/casas-y-departamentos/lima/{zone_slug}"
     else:
-        base = "https://www.infocasas.com.pe/alquiler/casas-y-departamentos"
+        base = f"{_base_url('infocasas')}/alquiler/casas-y-departamentos"
     # Agregar filtros si están especificados
     if dormitorios and dormitorios != "0" and banos and banos != "0" and price_min is not None and price_max is not None:
         base += f"/{dormitorios}-dormitorio/{banos}-bano/desde-{price_min}/hasta-{price_max}?&IDmoneda=6"
@@ -321,100 +406,198 @@ def scrape_infocasas(zona: str = "", dormitorios: str = "0", banos: str = "0",
         else:
             base += f"?searchstring={requests.utils.quote(palabras_clave.strip())}"
     logger.info(f"URL de InfoCasas: {base}")
-    driver = create_driver(headless=True)
     results = []
     try:
-        driver.get(base)
-        time.sleep(2)  # Esperar a que cargue la página
-        # Hacer scroll para cargar más resultados
-        for _ in range(max_scrolls):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(0.6)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        # Buscar los contenedores de anuncios específicos de InfoCasas
-        nodes = soup.select("div.listingCard") or soup.select("article")
-        for n in nodes:
-            try:
-                # Verificar que el elemento tiene el atributo href
-                a = n.select_one("a[href]")
-                if not a:
-                    continue
-                href = a.get("href") if a else ""
-                # Construir URL completa
-                if href and href.startswith("/"):
-                    href = "https://www.infocasas.com.pe" + href
-                # Extraer título
-                title_elem = n.select_one("h2.lc-title") or n.select_one(".lc-title") or a
-                title = title_elem.get_text(" ", strip=True) if title_elem else n.get_text(" ", strip=True)[:250]
-                # Extraer precio
-                price = ""
-                price_elem = n.select_one(".main-price") or n.select_one(".lc-price p") or n.select_one(".property-price-tag p")
-                if price_elem:
-                    price = price_elem.get_text(" ", strip=True)
-                # Extraer ubicación
-                location_elem = n.select_one(".lc-location") or n.select_one("strong")
-                location = location_elem.get_text(" ", strip=True) if location_elem else ""
-                # Extraer dormitorios, baños y m² de los tags
-                dormitorios_text = ""
-                banos_text = ""
-                m2_text = ""
-                # Buscar en los elementos con clase lc-typologyTag__item
-                typology_items = n.select(".lc-typologyTag__item strong")
-                for item in typology_items:
-                    text = item.get_text().strip()
-                    if "Dorm" in text:
-                        dorm_match = re.search(r'(\d+)', text)
-                        if dorm_match:
-                            dormitorios_text = dorm_match.group(1)
-                    elif "Baños" in text or "Baño" in text:
-                        banos_match = re.search(r'(\d+)', text)
-                        if banos_match:
-                            banos_text = banos_match.group(1)
-                    elif "m²" in text:
-                        m2_match = re.search(r'(\d+)', text)
-                        if m2_match:
-                            m2_text = m2_match.group(1)
-                # Extraer descripción
-                desc_elem = n.select_one(".lc-description") or n.select_one("p")
-                desc = desc_elem.get_text(" ", strip=True) if desc_elem else n.get_text(" ", strip=True)[:400]
-                # EXTRAER IMAGEN DIRECTAMENTE DEL LISTADO (NO ENTRAR AL DETALLE)
-                img_url = ""
-                img_tag = n.select_one(".cardImageGallery .gallery-image img")
-                if img_tag:
-                    img_url = img_tag.get("src") or img_tag.get("data-src") or ""
-                    if img_url and img_url.startswith("//"):
-                        img_url = "https:" + img_url
-                    img_url = img_url.strip()
-                results.append({
-                    "titulo": title, 
-                    "precio": price, 
-                    "m2": m2_text,
-                    "dormitorios": dormitorios_text, 
-                    "baños": banos_text, 
-                    "descripcion": desc,
-                    "link": href or "", 
-                    "fuente": "infocasas",
-                    "imagen_url": img_url,
-                    "scraped_at": datetime.now().isoformat(),
-                    "id": str(uuid.uuid4())
-                })
-            except Exception as e:
-                logger.error(f"Error procesando anuncio en InfoCasas: {e}")
-                continue
+        profile = WAIT_PROFILES["infocasas"].replace(max_scrolls=max_scrolls)
+
+        def _browser_html():
+            with DRIVER_POOL.lease() as driver:
+                with timed("page_load"):
+                    driver.get(base)
+                wait_until_ready(driver, profile)  # Esperar a que cargue la página
+                # Hacer scroll para cargar más resultados
+                loaded = set()
+
+                def _rest_is_known():
+                    if not known_links:
+                        return False
+                    hrefs = driver.execute_script(_INFOCASAS_LINKS_JS) or []
+                    nuevos = [_absolute_link("infocasas", h) for h in hrefs]
+                    nuevos = [h for h in nuevos if h and h not in loaded]
+                    loaded.update(nuevos)
+                    if _mostly_known(nuevos, known_links):
+                        logger.info(f"InfoCasas incremental: {len(loaded)} anuncios cargados, el resto ya es conocido")
+                        return True
+                    return False
+
+                scroll_until_stable(driver, profile, should_stop=_rest_is_known)
+                return driver.page_source
+
+        soup = FETCHER.fetch("infocasas", base, profile.ready_selector, _browser_html)
+        results = _parse_infocasas_cards(soup)
     except Exception as e:
-        logger.error(f"Error en InfoCasas scraper: {e}")
+        _scraper_error(f"Error en InfoCasas scraper: {e}")
         pass
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
-    return pd.DataFrame(results)
+    return results
 
 # -------------------- Urbania --------------------
+# Texto que identifica cada span de características: dormitorios, baños, m²
+_URBANIA_TAG_UNITS = ("dorm.", "baño", "m²")
+
+# Mapeo específico para Urbania
+ZONA_MAPEO_URBANIA = {
+    "ancón": "ancon",
+    "ate": "ate-vitarte",  # Usar ate-vitarte como fallback
+    "barranco": "barranco",
+    "breña": "brena",
+    "carabayllo": "carabayllo",
+    "chaclacayo": "chaclacayo",
+    "chorrillos": "chorrillos",
+    "cieneguilla": "cieneguilla",
+    "comas": "comas",
+    "el agustino": "el-agustino",
+    "independencia": "independencia",
+    "jesús maría": "jesus-maria",
+    "la molina": "la-molina",
+    "la victoria": "la-victoria",
+    "lima": "lima-cercado",
+    "lince": "lince",
+    "los olivos": "los-olivos",
+    "lurigancho": "lurigancho",
+    "lurín": "lurin",
+    "magdalena del mar": "magdalena-del-mar",
+    "miraflores": "miraflores",
+    "pachacámac": "pachacamac",
+    "pucusana": "pucusana",
+    "pueblo libre": "pueblo-libre",
+    "puente piedra": "puente-piedra",
+    "punta hermosa": "punta-hermosa",
+    "punta negra": "punta-negra",
+    "rímac": "rimac",
+    "san bartolo": "san-bartolo",
+    "san borja": "san-borja",
+    "san isidro": "san-isidro",
+    "san juan de lurigancho": "san-juan-de-lurigancho",
+    "san juan de miraflores": "san-juan-de-miraflores",
+    "san luis": "san-luis",
+    "san martín de porres": "san-martin-de-porres",
+    "san miguel": "san-miguel",
+    "santa anita": "santa-anita",
+    "santa maría del mar": "santa-maria-del-mar",
+    "santa rosa": "santa-rosa",
+    "santiago de surco": "santiago-de-surco",
+    "surquillo": "surquillo",
+    "villa el salvador": "villa-el-salvador",
+    "villa maría del triunfo": "villa-maria-del-triunfo"
+}
+
+@timed("extract")
+def _parse_urbania_cards(soup, seen: set) -> list:
+    """Anuncios de una página de resultados de Urbania (omite los links ya vistos)."""
+    # intentar varios selectores
+    card_selectors = [
+        "div[data-qa='posting PROPERTY']",
+        "article",
+        "div.postingCard-module__posting",
+        "div.postingCard",
+        "div.posting-card",
+        "div[class*='postingCard']",
+    ]
+    cards = []
+    for sel in card_selectors:
+        found = soup.select(sel)
+        if found and len(found) > 0:
+            cards = found
+            break
+    if not cards:
+        cards = soup.select("a[href]")[:0]  # vacío
+    results = []
+    for c in cards:
+        try:
+            a_tag = c.select_one("a[href]") or c.select_one("h2 a") or c.select_one("h3 a")
+            link = a_tag.get("href") if a_tag else ""
+            if link and link.startswith("/"):
+                link = _base_url("urbania") + link
+            if not link:
+                continue
+            if link in seen:
+                continue
+            seen.add(link)
+            card_text = c.get_text(" ", strip=True)
+            title = a_tag.get_text(" ", strip=True) if a_tag and a_tag.get_text(strip=True) else card_text[:140]
+            price_el = c.select_one("div.postingPrices-module__price") or c.select_one(".first-price") or c.select_one(".price")
+            price = price_el.get_text(" ", strip=True) if price_el else ""
+            desc = card_text[:400]
+            img = ""
+            img_tag = c.select_one("img")
+            if img_tag:
+                img = img_tag.get("src") or img_tag.get("data-src") or ""
+                if img and img.startswith("//"): img = "https:" + img
+                # Limpiar espacios al final
+                img = img.strip()
+            # Dormitorios, baños y m² de los spans de características, cada span según su unidad
+            feats = extract_tag_features(
+                (span.get_text(" ", strip=True)
+                 for span in c.select(".postingMainFeatures-module__posting-main-features-span")),
+                _URBANIA_TAG_UNITS, price,
+            )
+            # AHORA INCLUIMOS LOS VALORES EXTRAÍDOS
+            results.append(Listing(
+                titulo=title,
+                precio=price,
+                m2=feats.m2,
+                dormitorios=feats.dormitorios,
+                banos=feats.banos,
+                descripcion=desc,
+                link=link,
+                fuente="urbania",
+                imagen_url=img,
+            ))
+        except Exception as e:
+            logger.error(f"Error procesando anuncio en Urbania: {e}")
+            continue
+    return results
+
+_URBANIA_NEXT_SELECTORS = "a[rel='next'], a[aria-label='Siguiente'], a[data-qa='pagination-next'], a.pagination__next, a.next"
+
+def _urbania_next_url(soup, current_url: str) -> str:
+    """Siguiente página en modo HTTP: link "siguiente" del HTML o page=N+1 en la URL."""
+    a = soup.select_one(_URBANIA_NEXT_SELECTORS)
+    if a and a.get("href"):
+        return urljoin(current_url, a.get("href"))
+    m = re.search(r"([?&]page=)(\d+)", current_url)
+    if m:
+        return re.sub(r"([?&]page=)\d+", r"\g<1>{}".format(int(m.group(2)) + 1), current_url)
+    return ""
+
+def _scrape_urbania_http(soup, url: str, max_pages: int, known_links: Optional[set]) -> list:
+    """Paginación por HTTP cuando Urbania sirve las cards en el HTML (sin scroll ni clicks)."""
+    results = []
+    seen = set()
+    page_count = 0
+    while soup is not None and page_count < max_pages:
+        page_count += 1
+        nuevos = _parse_urbania_cards(soup, seen)
+        results.extend(nuevos)
+        if not nuevos:
+            break
+        if known_links and _mostly_known([r.link for r in nuevos], known_links):
+            logger.info(f"Urbania incremental: se detiene en la página {page_count}")
+            break
+        url = _urbania_next_url(soup, url)
+        if not url:
+            break
+        soup = FETCHER.get_soup(url)
+    return results
+
 def scrape_urbania(zona: str = "", dormitorios: str = "0", banos: str = "0",
                    price_min: Optional[int] = None, price_max: Optional[int] = None,
-                   palabras_clave: str = "", max_pages: int = 6, wait_time: float = 1.5):
+                   palabras_clave: str = "", max_pages: int = 6, wait_time: float = 1.5,
+                   known_links: Optional[set] = None):
+    """
+    Con known_links (modo incremental) deja de paginar en cuanto una página trae
+    casi solo anuncios ya conocidos.
+    """
     zona = (zona or "").strip()
     # construir keyword combinando filtros (si el usuario solo pone keyword, la usamos)
     kw_parts = []
@@ -427,57 +610,11 @@ def scrape_urbania(zona: str = "", dormitorios: str = "0", banos: str = "0",
     keyword_value = " ".join(kw_parts).strip()
     # CAMBIO CLAVE: Siempre usar la zona si está especificada, independientemente de las keywords
     if zona:
-        # Mapeo específico para Urbania
-        ZONA_MAPEO_URBANIA = {
-            "ancón": "ancon",
-            "ate": "ate-vitarte",  # Usar ate-vitarte como fallback
-            "barranco": "barranco",
-            "breña": "brena",
-            "carabayllo": "carabayllo",
-            "chaclacayo": "chaclacayo",
-            "chorrillos": "chorrillos",
-            "cieneguilla": "cieneguilla",
-            "comas": "comas",
-            "el agustino": "el-agustino",
-            "independencia": "independencia",
-            "jesús maría": "jesus-maria",
-            "la molina": "la-molina",
-            "la victoria": "la-victoria",
-            "lima": "lima-cercado",
-            "lince": "lince",
-            "los olivos": "los-olivos",
-            "lurigancho": "lurigancho",
-            "lurín": "lurin",
-            "magdalena del mar": "magdalena-del-mar",
-            "miraflores": "miraflores",
-            "pachacámac": "pachacamac",
-            "pucusana": "pucusana",
-            "pueblo libre": "pueblo-libre",
-            "puente piedra": "puente-piedra",
-            "punta hermosa": "punta-hermosa",
-            "punta negra": "punta-negra",
-            "rímac": "rimac",
-            "san bartolo": "san-bartolo",
-            "san borja": "san-borja",
-            "san isidro": "san-isidro",
-            "san juan de lurigancho": "san-juan-de-lurigancho",
-            "san juan de miraflores": "san-juan-de-miraflores",
-            "san luis": "san-luis",
-            "san martín de porres": "san-martin-de-porres",
-            "san miguel": "san-miguel",
-            "santa anita": "santa-anita",
-            "santa maría del mar": "santa-maria-del-mar",
-            "santa rosa": "santa-rosa",
-            "santiago de surco": "santiago-de-surco",
-            "surquillo": "surquillo",
-            "villa el salvador": "villa-el-salvador",
-            "villa maría del triunfo": "villa-maria-del-triunfo"
-        }
         zona_lower = zona.strip().lower()
         zone_slug = ZONA_MAPEO_URBANIA.get(zona_lower, slugify_zone(zona))
-        base = f"https://urbania.pe/buscar/alquiler-de-departamentos-en-{zone_slug}--lima--lima"
+        base = f"{_base_url('urbania')}/buscar/alquiler-de-departamentos-en-{zone_slug}--lima--lima"
     else:
-        base = "https://urbania.pe/buscar/alquiler-de-departamentos"
+        base = f"{_base_url('urbania')}/buscar/alquiler-de-departamentos"
     params = []
     if keyword_value:
         params.append(f"keyword={requests.utils.quote(keyword_value)}")
@@ -493,111 +630,36 @@ def scrape_urbania(zona: str = "", dormitorios: str = "0", banos: str = "0",
         params.append("currencyId=6")  # Soles
     url = base + ("?" + "&".join(params) if params else "")
     logger.info(f"URL de Urbania: {url}")
-    driver = create_driver(headless=True)
+    profile = WAIT_PROFILES["urbania"].replace(scroll_timeout=wait_time)
+    soup = FETCHER.try_http("urbania", url, profile.ready_selector)
+    if soup is not None:
+        try:
+            return _scrape_urbania_http(soup, url, max_pages, known_links)
+        except Exception as e:
+            _scraper_error(f"Error en Urbania scraper: {e}")
+            return []
+    FETCHER.count_browser("urbania")
+    from selenium.webdriver.common.by import By
+
+    driver = DRIVER_POOL.acquire()
     results = []
     seen = set()
     try:
-        driver.get(url)
-        # esperar unos segundos por elementos representativos (no bloquear si timeout)
-        try:
-            WebDriverWait(driver, 12).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "article, div[data-qa='posting PROPERTY'], div.postingCard"))
-            )
-        except:
-            pass
+        with timed("page_load"):
+            driver.get(url)
+        # esperar por elementos representativos (no bloquear si timeout)
+        wait_until_ready(driver, profile)
         page_count = 0
         while page_count < max_pages:
             page_count += 1
-            last_h = driver.execute_script("return document.body.scrollHeight")
-            for _ in range(8):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(wait_time)
-                new_h = driver.execute_script("return document.body.scrollHeight")
-                if new_h == last_h:
-                    break
-                last_h = new_h
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            # intentar varios selectores
-            card_selectors = [
-                "div[data-qa='posting PROPERTY']",
-                "article",
-                "div.postingCard-module__posting",
-                "div.postingCard",
-                "div.posting-card",
-                "div[class*='postingCard']",
-            ]
-            cards = []
-            for sel in card_selectors:
-                found = soup.select(sel)
-                if found and len(found) > 0:
-                    cards = found
-                    break
-            if not cards:
-                cards = soup.select("a[href]")[:0]  # vacío
+            scroll_until_stable(driver, profile)
+            soup = parse_html(driver.page_source)
             prev_len = len(results)
-            for c in cards:
-                try:
-                    a_tag = c.select_one("a[href]") or c.select_one("h2 a") or c.select_one("h3 a")
-                    link = a_tag.get("href") if a_tag else ""
-                    if link and link.startswith("/"):
-                        link = "https://urbania.pe" + link
-                    if not link:
-                        continue
-                    if link in seen:
-                        continue
-                    seen.add(link)
-                    title = a_tag.get_text(" ", strip=True) if a_tag and a_tag.get_text(strip=True) else (c.get_text(" ", strip=True)[:140])
-                    price_el = c.select_one("div.postingPrices-module__price") or c.select_one(".first-price") or c.select_one(".price")
-                    price = price_el.get_text(" ", strip=True) if price_el else ""
-                    desc = c.get_text(" ", strip=True)[:400]
-                    img = ""
-                    img_tag = c.select_one("img")
-                    if img_tag:
-                        img = img_tag.get("src") or img_tag.get("data-src") or ""
-                        if img and img.startswith("//"): img = "https:" + img
-                        # Limpiar espacios al final
-                        img = img.strip()
-                    # EXTRAER DORMITORIOS
-                    dormitorios_text = ""
-                    dorm_elem = c.select_one(".postingMainFeatures-module__posting-main-features-span:contains('dorm.')")
-                    if dorm_elem:
-                        dorm_text = dorm_elem.get_text(" ", strip=True)
-                        dorm_match = re.search(r'(\d+)', dorm_text)
-                        if dorm_match:
-                            dormitorios_text = dorm_match.group(1)
-                    # EXTRAER BAÑOS
-                    banos_text = ""
-                    banos_elem = c.select_one(".postingMainFeatures-module__posting-main-features-span:contains('baño')")
-                    if banos_elem:
-                        banos_text_full = banos_elem.get_text(" ", strip=True)
-                        banos_match = re.search(r'(\d+)', banos_text_full)
-                        if banos_match:
-                            banos_text = banos_match.group(1)
-                    # EXTRAER METROS CUADRADOS
-                    m2_text = ""
-                    m2_elem = c.select_one(".postingMainFeatures-module__posting-main-features-span:contains('m²')")
-                    if m2_elem:
-                        m2_text_full = m2_elem.get_text(" ", strip=True)
-                        m2_match = re.search(r'(\d+)', m2_text_full)
-                        if m2_match:
-                            m2_text = m2_match.group(1)
-                    # AHORA INCLUIMOS LOS VALORES EXTRAÍDOS
-                    results.append({
-                        "titulo": title, 
-                        "precio": price, 
-                        "m2": m2_text,
-                        "dormitorios": dormitorios_text, 
-                        "baños": banos_text,
-                        "descripcion": desc, 
-                        "link": link, 
-                        "fuente": "urbania",
-                        "imagen_url": img,
-                        "scraped_at": datetime.now().isoformat(),
-                        "id": str(uuid.uuid4())
-                    })
-                except Exception as e:
-                    logger.error(f"Error procesando anuncio en Urbania: {e}")
-                    continue
+            results.extend(_parse_urbania_cards(soup, seen))
+            # Modo incremental: si la página es casi toda conocida, lo que sigue también
+            if known_links and _mostly_known([r.link for r in results[prev_len:]], known_links):
+                logger.info(f"Urbania incremental: se detiene en la página {page_count}")
+                break
             # si no hay nuevos resultados intentar paginar/click "cargar más"
             if len(results) == prev_len:
                 clicked = False
@@ -615,7 +677,8 @@ def scrape_urbania(zona: str = "", dormitorios: str = "0", banos: str = "0",
                                     driver.execute_script("arguments[0].scrollIntoView(true);", e)
                                     time.sleep(0.2)
                                     e.click()
-                                    time.sleep(wait_time + 0.5)
+                                    wait_for_count_stable(driver, profile.card_selector, timeout=wait_time + 0.5,
+                                                          stable_for=profile.stable_for)
                                     clicked = True
                                     break
                             except:
@@ -633,80 +696,135 @@ def scrape_urbania(zona: str = "", dormitorios: str = "0", banos: str = "0",
                         next_page = cur_page + 1
                         new_url = re.sub(r"([?&]page=)\d+", r"\1{}".format(next_page), cur)
                         try:
-                            driver.get(new_url)
-                            time.sleep(wait_time + 0.8)
+                            with timed("page_load"):
+                                driver.get(new_url)
+                            wait_until_ready(driver, profile.replace(ready_timeout=wait_time + 0.8))
                             clicked = True
                         except:
                             clicked = False
                 if not clicked:
                     break
-            time.sleep(0.4)
-        return pd.DataFrame(results)
+        return results
     except Exception as e:
-        logger.error(f"Error en Urbania scraper: {e}")
-        return pd.DataFrame()
+        _scraper_error(f"Error en Urbania scraper: {e}")
+        return []
     finally:
-        try:
-            driver.quit()
-        except:
-            pass
+        DRIVER_POOL.release(driver)
 
 # -------------------- Properati --------------------
+# Mapeo específico para Properati
+ZONA_MAPEO_PROPERATI = {
+    "ancón": "ancon",
+    "ate": "ate",
+    "barranco": "barranco",
+    "breña": "brena",
+    "carabayllo": "carabayllo",
+    "chaclacayo": "chaclacayo",
+    "chorrillos": "chorrillos",
+    "cieneguilla": "cieneguilla",
+    "comas": "comas",
+    "el agustino": "el-agustino",
+    "independencia": "independencia",
+    "jesús maría": "jesus-maria",
+    "la molina": "la-molina",
+    "la victoria": "la-victoria",
+    "lima": "lima",
+    "lince": "lince",
+    "los olivos": "los-olivos",
+    "lurigancho": "lurigancho",
+    "lurín": "lurin",
+    "magdalena del mar": "magdalena-del-mar",
+    "miraflores": "miraflores",
+    "pachacámac": "pachacamac",
+    "pucusana": "pucusana",
+    "pueblo libre": "pueblo-libre",
+    "puente piedra": "puente-piedra",
+    "punta hermosa": "punta-hermosa",
+    "punta negra": "punta-negra",
+    "rímac": "rimac",
+    "san bartolo": "san-bartolo",
+    "san borja": "san-borja",
+    "san isidro": "san-isidro",
+    "san juan de lurigancho": "san-juan-de-lurigancho",
+    "san juan de miraflores": "san-juan-de-miraflores",
+    "san luis": "san-luis",
+    "san martín de porres": "san-martin-de-porres",
+    "san miguel": "san-miguel",
+    "santa anita": "santa-anita",
+    "santa maría del mar": "santa-maria-del-mar",
+    "santa rosa": "santa-rosa",
+    "santiago de surco": "santiago-de-surco",
+    "surquillo": "surquillo",
+    "villa el salvador": "villa-el-salvador",
+    "villa maría del triunfo": "villa-maria-del-triunfo"
+}
+
+def _elem_int_text(elem) -> str:
+    n = first_int(elem.get_text(" ", strip=True)) if elem else None
+    return str(n) if n is not None else ""
+
+@timed("extract")
+def _parse_properati_cards(soup) -> list:
+    """Anuncios de una página de resultados de Properati."""
+    cards = soup.select("article") or soup.select("div.posting-card") or soup.select("a[href]")
+    results = []
+    for c in cards:
+        try:
+            a = c.select_one("a[href]") or c.select_one("a.title")
+            href = a.get("href") if a else ""
+            if href and href.startswith("/"):
+                href = _base_url("properati") + href
+            title = a.get_text(" ", strip=True) if a else c.get_text(" ", strip=True)[:140]
+            price = ""
+            price_elem = c.select_one(".price")
+            if price_elem:
+                price = price_elem.get_text(" ", strip=True)
+            # Dormitorios, baños y m² vienen cada uno en su elemento: primer número de cada uno
+            dormitorios_text, banos_text, m2_text = (
+                _elem_int_text(c.select_one(sel))
+                for sel in (".properties__bedrooms", ".properties__bathrooms", ".properties__area")
+            )
+            img = ""
+            img_tag = c.select_one("img")
+            if img_tag:
+                img = img_tag.get("src") or img_tag.get("data-src") or ""
+                # Filtrar imágenes no deseadas: solo aceptar las que comienzan con https://img (no con https://images.proppit)
+                if img and img.startswith("https://img"):
+                    img = img.strip()
+                elif img and img.startswith("//"):
+                    img_full = "https:" + img
+                    if img_full.startswith("https://img"):
+                        img = img_full.strip()
+                    else:
+                        img = ""  # Rechazar otras fuentes
+                else:
+                    img = ""  # Rechazar si no cumple con el criterio
+            # AHORA INCLUIMOS LOS VALORES EXTRAÍDOS
+            results.append(Listing(
+                titulo=title,
+                precio=price,
+                m2=m2_text,
+                dormitorios=dormitorios_text,
+                banos=banos_text,
+                descripcion=title,
+                link=href or "",
+                fuente="properati",
+                imagen_url=img,
+            ))
+        except Exception as e:
+            logger.error(f"Error en Properati al procesar un anuncio: {e}")
+            continue
+    return results
+
 def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
                      price_min: Optional[int] = None, price_max: Optional[int] = None,
                      palabras_clave: str = ""):
     if zona and zona.strip():
-        # Mapeo específico para Properati
-        ZONA_MAPEO_PROPERATI = {
-            "ancón": "ancon",
-            "ate": "ate",
-            "barranco": "barranco",
-            "breña": "brena",
-            "carabayllo": "carabayllo",
-            "chaclacayo": "chaclacayo",
-            "chorrillos": "chorrillos",
-            "cieneguilla": "cieneguilla",
-            "comas": "comas",
-            "el agustino": "el-agustino",
-            "independencia": "independencia",
-            "jesús maría": "jesus-maria",
-            "la molina": "la-molina",
-            "la victoria": "la-victoria",
-            "lima": "lima",
-            "lince": "lince",
-            "los olivos": "los-olivos",
-            "lurigancho": "lurigancho",
-            "lurín": "lurin",
-            "magdalena del mar": "magdalena-del-mar",
-            "miraflores": "miraflores",
-            "pachacámac": "pachacamac",
-            "pucusana": "pucusana",
-            "pueblo libre": "pueblo-libre",
-            "puente piedra": "puente-piedra",
-            "punta hermosa": "punta-hermosa",
-            "punta negra": "punta-negra",
-            "rímac": "rimac",
-            "san bartolo": "san-bartolo",
-            "san borja": "san-borja",
-            "san isidro": "san-isidro",
-            "san juan de lurigancho": "san-juan-de-lurigancho",
-            "san juan de miraflores": "san-juan-de-miraflores",
-            "san luis": "san-luis",
-            "san martín de porres": "san-martin-de-porres",
-            "san miguel": "san-miguel",
-            "santa anita": "santa-anita",
-            "santa maría del mar": "santa-maria-del-mar",
-            "santa rosa": "santa-rosa",
-            "santiago de surco": "santiago-de-surco",
-            "surquillo": "surquillo",
-            "villa el salvador": "villa-el-salvador",
-            "villa maría del triunfo": "villa-maria-del-triunfo"
-        }
         zona_lower = zona.strip().lower()
         zone_slug = ZONA_MAPEO_PROPERATI.get(zona_lower, slugify_zone(zona))
-        base = f"https://www.properati.com.pe/s/{zone_slug}/alquiler?propertyType=apartment%2Chouse"
+        base = f"{_base_url('properati')}/s/{zone_slug}/alquiler?propertyType=apartment%2Chouse"
     else:
-        base = "https://www.properati.com.pe/s/alquiler?propertyType=apartment%2Chouse"
+        base = f"{_base_url('properati')}/s/alquiler?propertyType=apartment%2Chouse"
     # Agregar parámetros de filtros
     params = []
     if dormitorios and dormitorios != "0":
@@ -740,127 +858,114 @@ def scrape_properati(zona: str = "", dormitorios: str = "0", banos: str = "0",
         base += "&" + "&".join(params)
     logger.info(f"URL de Properati: {base}")
     try:
-        r = requests.get(base, headers={"User-Agent": COMMON_UA}, timeout=15)
-        r.raise_for_status()
-    except:
-        return pd.DataFrame()
-    soup = BeautifulSoup(r.text, "html.parser")
-    cards = soup.select("article") or soup.select("div.posting-card") or soup.select("a[href]")
+        with timed("http_fetch"):
+            r = HTTP_CLIENT.get(base)
+    except requests.RequestException as e:
+        _scraper_error(f"Error en Properati scraper: {e}")
+        return []
+    with timed("parse"):
+        soup = parse_html(r.text)
+    results = _parse_properati_cards(soup)
+    return results
+
+# -------------------- Doomos --------------------
+# Mapeo ACTUALIZADO de zonas a sus IDs específicos para Doomos
+ZONA_IDS_DOOMOS = {
+    "ancón": "-336912",
+    "ate": "-337679",
+    "breña": "65645345",
+    "carabayllo": "-339907",
+    "chaclacayo": "-341190",
+    "chorrillos": "-342811",
+    "cieneguilla": "-343329",
+    "comas": "-343903",
+    "el agustino": "-345552",
+    "jesús maría": "348294",
+    "la molina": "-351740",
+    "la victoria": "-352442",
+    "lima": "45343445",  # Cercado de Lima
+    "lince": "-352696",
+    "los olivos": "191126",
+    "lurigancho": "-353648",
+    "lurín": "-353652",
+    "magdalena del mar": "326245",
+    "miraflores": "-354864",
+    "pachacámac": "-356636",
+    "pucusana": "-359672",
+    "pueblo libre": "-359690",
+    "puente piedra": "-359759",
+    "punta hermosa": "-360186",
+    "punta negra": "-360189",
+    "rímac": "-361308",
+    "san bartolo": "-362154",
+    "san borja": "-362170",
+    "san isidro": "-362425",
+    "san luis": "-362738",
+    "san miguel": "-362804",
+    "santiago de surco": "-364705",
+    "surquillo": "-364723"
+}
+
+@timed("extract")
+def _parse_doomos_cards(soup) -> list:
+    """Anuncios de una página de resultados de Doomos."""
     results = []
-    for c in cards:
+    cards = soup.select(".content_result")
+    if not cards:
+        logger.warning("No se encontraron cards en Doomos")
+        return []
+    logger.info(f"Se encontraron {len(cards)} cards en Doomos")
+    for card in cards:
         try:
-            a = c.select_one("a[href]") or c.select_one("a.title")
-            href = a.get("href") if a else ""
+            # Extraer link y título
+            a_tag = card.select_one(".content_result_titulo a")
+            if not a_tag:
+                continue
+            title = a_tag.get_text(" ", strip=True)
+            href = a_tag.get("href") or ""
+            # Construir URL completa si es relativa
             if href and href.startswith("/"):
-                href = "https://www.properati.com.pe" + href
-            title = a.get_text(" ", strip=True) if a else c.get_text(" ", strip=True)[:140]
-            price = ""
-            price_elem = c.select_one(".price")
-            if price_elem:
-                price = price_elem.get_text(" ", strip=True)
-            # EXTRAER DORMITORIOS
-            dormitorios_text = ""
-            dorm_elem = c.select_one(".properties__bedrooms")
-            if dorm_elem:
-                dorm_text = dorm_elem.get_text(" ", strip=True)
-                dorm_match = re.search(r'(\d+)', dorm_text)
-                if dorm_match:
-                    dormitorios_text = dorm_match.group(1)
-            # EXTRAER BAÑOS
-            banos_text = ""
-            banos_elem = c.select_one(".properties__bathrooms")
-            if banos_elem:
-                banos_text_full = banos_elem.get_text(" ", strip=True)
-                banos_match = re.search(r'(\d+)', banos_text_full)
-                if banos_match:
-                    banos_text = banos_match.group(1)
-            # EXTRAER METROS CUADRADOS
-            m2_text = ""
-            m2_elem = c.select_one(".properties__area")
-            if m2_elem:
-                m2_text_full = m2_elem.get_text(" ", strip=True)
-                m2_match = re.search(r'(\d+)', m2_text_full)
-                if m2_match:
-                    m2_text = m2_match.group(1)
-            img = ""
-            img_tag = c.select_one("img")
+                href = _base_url("doomos") + href
+            # Extraer precio
+            price_elem = card.select_one(".content_result_precio")
+            price = price_elem.get_text(" ", strip=True) if price_elem else ""
+            # Extraer descripción
+            desc_elem = card.select_one(".content_result_descripcion")
+            # Texto de la card una sola vez: dormitorios, baños y m² en una pasada
+            text_content = card.get_text(" ", strip=True)
+            desc = desc_elem.get_text(" ", strip=True) if desc_elem else text_content[:400]
+            feats = extract_features(text_content, price)
+            # EXTRAER IMAGEN DIRECTAMENTE DEL LISTADO (NO ENTRAR AL DETALLE)
+            img_url = ""
+            img_tag = card.select_one("img.content_result_image")
             if img_tag:
-                img = img_tag.get("src") or img_tag.get("data-src") or ""
-                # Filtrar imágenes no deseadas: solo aceptar las que comienzan con https://img (no con https://images.proppit)
-                if img and img.startswith("https://img"):
-                    img = img.strip()
-                elif img and img.startswith("//"):
-                    img_full = "https:" + img
-                    if img_full.startswith("https://img"):
-                        img = img_full.strip()
-                    else:
-                        img = ""  # Rechazar otras fuentes
-                else:
-                    img = ""  # Rechazar si no cumple con el criterio
-            # AHORA INCLUIMOS LOS VALORES EXTRAÍDOS
-            results.append({
-                "titulo": title, 
-                "precio": price, 
-                "m2": m2_text,
-                "dormitorios": dormitorios_text, 
-                "baños": banos_text,
-                "descripcion": title, 
-                "link": href or "", 
-                "fuente": "properati",
-                "imagen_url": img,
-                "scraped_at": datetime.now().isoformat(),
-                "id": str(uuid.uuid4())
-            })
+                img_url = img_tag.get("src") or img_tag.get("data-src") or ""
+                if img_url and img_url.startswith("//"):
+                    img_url = "https:" + img_url
+                img_url = img_url.strip()
+            results.append(Listing(
+                titulo=title,
+                precio=price,
+                m2=feats.m2,
+                dormitorios=feats.dormitorios,
+                banos=feats.banos,
+                descripcion=desc,
+                link=href,
+                fuente="doomos",
+                imagen_url=img_url,
+            ))
         except Exception as e:
-            logger.error(f"Error en Properati al procesar un anuncio: {e}")
+            logger.error(f"Error procesando card en Doomos: {e}")
             continue
-    return pd.DataFrame(results)
+    return results
 
-# -------------------- Doomos --------------------
 def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
                   price_min: Optional[int] = None, price_max: Optional[int] = None,
                   palabras_clave: str = ""):
-    driver = create_driver(headless=True)
     results = []
     try:
-        # Mapeo ACTUALIZADO de zonas a sus IDs específicos para Doomos
-        ZONA_IDS_CORRECTOS = {
-            "ancón": "-336912",
-            "ate": "-337679",
-            "breña": "65645345",
-            "carabayllo": "-339907",
-            "chaclacayo": "-341190",
-            "chorrillos": "-342811",
-            "cieneguilla": "-343329",
-            "comas": "-343903",
-            "el agustino": "-345552",
-            "jesús maría": "348294",
-            "la molina": "-351740",
-            "la victoria": "-352442",
-            "lima": "45343445",  # Cercado de Lima
-            "lince": "-352696",
-            "los olivos": "191126",
-            "lurigancho": "-353648",
-            "lurín": "-353652",
-            "magdalena del mar": "326245",
-            "miraflores": "-354864",
-            "pachacámac": "-356636",
-            "pucusana": "-359672",
-            "pueblo libre": "-359690",
-            "puente piedra": "-359759",
-            "punta hermosa": "-360186",
-            "punta negra": "-360189",
-            "rímac": "-361308",
-            "san bartolo": "-362154",
-            "san borja": "-362170",
-            "san isidro": "-362425",
-            "san luis": "-362738",
-            "san miguel": "-362804",
-            "santiago de surco": "-364705",
-            "surquillo": "-364723"
-        }
         # Construir URL base CORRECTA para Doomos
-        base_url = "http://www.doomos.com.pe/search/"
+        base_url = f"{_base_url('doomos')}/search/"
         # Parámetros base
         params = {
             "clase": "1",           # Departamentos
@@ -874,7 +979,7 @@ def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
             params["loc_id"] = "-352647"  # ← ¡¡¡ESTA ES LA LÍNEA CORREGIDA!!!
         else:
             zona_lower = zona.strip().lower()
-            loc_id = ZONA_IDS_CORRECTOS.get(zona_lower, "")
+            loc_id = ZONA_IDS_DOOMOS.get(zona_lower, "")
             zona_formateada = f"{zona.strip()} (Región de Lima)"
             params["loc_name"] = zona_formateada
             if loc_id:
@@ -893,81 +998,26 @@ def scrape_doomos(zona: str = "", dormitorios: str = "0", banos: str = "0",
         # Construir URL completa
         url = base_url + "?" + "&".join(f"{k}={requests.utils.quote(str(v))}" for k,v in params.items())
         logger.info(f"URL de Doomos: {url}")
-        driver.get(url)
-        time.sleep(3)
-        # Scroll para cargar más resultados
-        for _ in range(3):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        cards = soup.select(".content_result")
-        if not cards:
-            logger.warning("No se encontraron cards en Doomos")
-            return pd.DataFrame()
-        logger.info(f"Se encontraron {len(cards)} cards en Doomos")
-        for card in cards:
-            try:
-                # Extraer link y título
-                a_tag = card.select_one(".content_result_titulo a")
-                if not a_tag:
-                    continue
-                title = a_tag.get_text(" ", strip=True)
-                href = a_tag.get("href") or ""
-                # Construir URL completa si es relativa
-                if href and href.startswith("/"):
-                    href = "http://www.doomos.com.pe" + href
-                # Extraer precio
-                price_elem = card.select_one(".content_result_precio")
-                price = price_elem.get_text(" ", strip=True) if price_elem else ""
-                # Extraer descripción
-                desc_elem = card.select_one(".content_result_descripcion")
-                desc = desc_elem.get_text(" ", strip=True) if desc_elem else card.get_text(" ", strip=True)[:400]
-                # Extraer dormitorios, baños, m2 del texto
-                dormitorios_text = ""
-                banos_text = ""
-                m2_text = ""
-                text_content = card.get_text(" ", strip=True).lower()
-                dorm_match = re.search(r'(\d+)\s*dormitorio', text_content)
-                if dorm_match:
-                    dormitorios_text = dorm_match.group(1)
-                banos_match = re.search(r'(\d+)\s*baño', text_content)
-                if banos_match:
-                    banos_text = banos_match.group(1)
-                m2_match = re.search(r'(\d+)\s*m2', text_content)
-                if m2_match:
-                    m2_text = m2_match.group(1)
-                # EXTRAER IMAGEN DIRECTAMENTE DEL LISTADO (NO ENTRAR AL DETALLE)
-                img_url = ""
-                img_tag = card.select_one("img.content_result_image")
-                if img_tag:
-                    img_url = img_tag.get("src") or img_tag.get("data-src") or ""
-                    if img_url and img_url.startswith("//"):
-                        img_url = "https:" + img_url
-                    img_url = img_url.strip()
-                results.append({
-                    "titulo": title,
-                    "precio": price,
-                    "m2": m2_text,
-                    "dormitorios": dormitorios_text,
-                    "baños": banos_text,
-                    "descripcion": desc,
-                    "link": href,
-                    "fuente": "doomos",
-                    "imagen_url": img_url,
-                    "scraped_at": datetime.now().isoformat(),
-                    "id": str(uuid.uuid4())
-                })
-            except Exception as e:
-                logger.error(f"Error procesando card en Doomos: {e}")
-                continue
+        profile = WAIT_PROFILES["doomos"]
+
+        def _browser_html():
+            with DRIVER_POOL.lease() as driver:
+                with timed("page_load"):
+                    driver.get(url)
+                wait_until_ready(driver, profile)
+                # Scroll para cargar más resultados
+                scroll_until_stable(driver, profile)
+                return driver.page_source
+
+        soup = FETCHER.fetch("doomos", url, profile.ready_selector, _browser_html)
+        results = _parse_doomos_cards(soup)
     except Exception as e:
-        logger.error(f"Error en Doomos scraper: {e}")
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
-    return pd.DataFrame(results)
+        _scraper_error(f"Error en Doomos scraper: {e}")
+    return results
+
+# Distritos de Lima que cubrimos (los mapas de zonas de cada fuente)
+KNOWN_DISTRICTS = sorted(set(ZONA_MAPEO_INFOCASAS) | set(ZONA_MAPEO_URBANIA)
+                         | set(ZONA_MAPEO_PROPERATI) | set(ZONA_IDS_DOOMOS))
 
 # -------------------- Filtrado y Unificación --------------------
 SCRAPERS = [
@@ -978,101 +1028,224 @@ SCRAPERS = [
     ("doomos", scrape_doomos),
 ]
 
-def _filter_df_strict(df, dormitorios_req, banos_req, price_min, price_max):
-    if df is None or df.empty:
-        return pd.DataFrame()
-    dfc = df.copy().reset_index(drop=True)
-    dfc["_precio_soles"] = dfc["precio"].apply(_parse_price_soles)
-    dfc["_dorm_num"] = dfc["dormitorios"].apply(_extract_int_from_text)
-    dfc["_banos_num"] = dfc["baños"].apply(_extract_int_from_text)
-    mask = pd.Series(True, index=dfc.index)
-    # only require dorm/banos if user requested them
+def _requested_count(value) -> Optional[int]:
+    """Dormitorios/baños pedidos como entero; None si no se filtra por ellos ("", "0", inválido)."""
+    if value is None:
+        return None
+    s = str(value).strip()
+    if s == "" or s == "0":
+        return None
     try:
-        if dormitorios_req is not None and str(dormitorios_req).strip() != "" and str(dormitorios_req) != "0":
-            dorm_req_int = int(dormitorios_req)
-            mask &= (dfc["_dorm_num"].notnull()) & (dfc["_dorm_num"] == dorm_req_int)
-    except:
-        pass
+        return int(s)
+    except ValueError:
+        return None
+
+def _filter_strict(listings: List[Listing], dormitorios_req, banos_req, price_min, price_max) -> List[Listing]:
+    """
+    Filtro estricto sobre los Listing de una fuente: dormitorios y baños exactos (primer
+    entero del texto) y precio en soles dentro del rango. Usa los valores numéricos del
+    Listing (Listing.numbers), que se parsean una sola vez y luego sirven para ordenar.
+    """
+    dorm_req = _requested_count(dormitorios_req)
+    banos_req_int = _requested_count(banos_req)
+    by_price = (price_min is not None) or (price_max is not None)
+    if dorm_req is None and banos_req_int is None and not by_price:
+        return list(listings)
+    lo = int(price_min) if price_min is not None else None
+    hi = int(price_max) if price_max is not None else None
+    kept = []
+    for listing in listings:
+        if dorm_req is not None and listing.dorm_num != dorm_req:
+            continue
+        if banos_req_int is not None and listing.banos_num != banos_req_int:
+            continue
+        if by_price:
+            precio = listing.precio_soles
+            if precio is None or (lo is not None and precio < lo) or (hi is not None and precio > hi):
+                continue
+        kept.append(listing)
+    return kept
+
+def _filter_by_keywords(listings: List[Listing], palabras_clave: str) -> List[Listing]:
+    """
+    Filtra por palabras clave (AND, OR y "frases", sin tildes; ver keywords.py).
+    El texto de cada anuncio se normaliza una vez (Listing.text) y se evalúan todos los términos en una pasada.
+    """
+    query = parse_keywords(palabras_clave)
+    if not listings or not query:
+        return listings
+    return [listing for listing in listings if query.matches(listing.text)]
+
+def _as_listings(result) -> List[Listing]:
+    """Salida de un scraper como lista de Listing (acepta también dicts o un DataFrame)."""
+    if result is None:
+        return []
+    if hasattr(result, "to_dict") and not isinstance(result, (list, tuple)):
+        return from_frame(result)
+    return [as_listing(r) for r in result]
+
+def _run_source(name, func, zona, dormitorios, banos, price_min, price_max, **options):
+    """
+    Ejecuta un scraper y nunca lanza excepción: ante error devuelve una lista vacía.
+    `options` se pasan solo si el scraper los acepta (p. ej. known_links).
+    Devuelve (listings, segundos, tiempos por etapa, error); error es None si la fuente
+    terminó bien, o el mensaje del fallo (también si el scraper lo capturó por su cuenta).
+    """
+    if options:
+        accepted = inspect.signature(func).parameters
+        options = {k: v for k, v in options.items() if k in accepted}
+    start = time.perf_counter()
+    previous = getattr(_source_errors, "current", None)
+    errors = _source_errors.current = []
+    with collect_timings() as stage_times:
+        try:
+            listings = _as_listings(func(zona, dormitorios, banos, price_min, price_max, **options))
+        except Exception as e:
+            _scraper_error(f"❌ Error en {name}: {e}")
+            listings = []
+        finally:
+            _source_errors.current = previous
+    if stage_times:
+        logger.info(f"Tiempos {name}: {rounded_timings(stage_times, 2)}")
+    error = "; ".join(errors) if errors else None
+    return listings, time.perf_counter() - start, rounded_timings(stage_times), error
+
+def _process_source(name, listings, dormitorios, banos, price_min, price_max, palabras_clave,
+                    stage_times: Optional[dict] = None):
+    """
+    Filtra el resultado de una fuente y sella scraped_at e id (estable, de fuente + link)
+    en los que quedan; el tiempo del filtrado se anota en `stage_times` ("filter").
+    Devuelve (listings_filtrados, total_raw).
+    """
+    start = time.perf_counter()
+    total_raw = len(listings)
+    logger.info(f"Fuente: {name} -> encontrados: {total_raw}")
+    # Aplicar filtro estricto
+    filtered = _filter_strict(listings, dormitorios, banos, price_min, price_max)
+    # Aplicar filtro por palabras clave
+    if palabras_clave.strip():
+        filtered = _filter_by_keywords(filtered, palabras_clave)
+    if filtered:
+        scraped_at = datetime.now().isoformat()
+        for listing in filtered:
+            listing.scraped_at = scraped_at
+            # Sin link (raro) el título hace de identificador dentro de la fuente
+            listing.id = listing_id(listing.fuente or name, listing.link or listing.titulo)
+    if stage_times is not None:
+        stage_times["filter"] = round(time.perf_counter() - start, 3)
+    return filtered, total_raw
+
+def scrape_source(name, zona="", dormitorios="0", banos="0", price_min=None, price_max=None, palabras_clave="",
+                  **options):
+    """
+    Ejecuta una sola fuente del registro y devuelve (listings_filtrados, info), igual que
+    cada paso de iter_scrapers. Útil para el pre-crawler (options: known_links).
+    """
+    func = dict(SCRAPERS)[name]
+    listings, elapsed, stage_times, error = _run_source(name, func, zona, dormitorios, banos, price_min, price_max,
+                                                       **options)
+    filtered, total_raw = _process_source(
+        name, listings, dormitorios, banos, price_min, price_max, palabras_clave or "", stage_times
+    )
+    info = {"fuente": name, "encontrados": total_raw, "filtrados": len(filtered),
+            "segundos": round(elapsed, 2), "tiempos": stage_times, "error": error}
+    return filtered, info
+
+def _run_source_in_process(name, func, zona, dormitorios, banos, price_min, price_max):
+    """
+    _run_source dentro de un proceso del ProcessPoolExecutor. Cada proceso tiene su
+    propio DRIVER_POOL y los workers salen con os._exit (sin atexit): los Chrome
+    libres se cierran al terminar cada fuente para no dejarlos huérfanos.
+    """
     try:
-        if banos_req is not None and str(banos_req).strip() != "" and str(banos_req) != "0":
-            banos_req_int = int(banos_req)
-            mask &= (dfc["_banos_num"].notnull()) & (dfc["_banos_num"] == banos_req_int)
-    except:
-        pass
-    if (price_min is not None) or (price_max is not None):
-        if price_min is None:
-            price_min = -10**12
-        if price_max is None:
-            price_max = 10**12
-        mask &= dfc["_precio_soles"].notnull()
-        mask &= (dfc["_precio_soles"] >= int(price_min)) & (dfc["_precio_soles"] <= int(price_max))
-    df_filtered = dfc.loc[mask].copy().reset_index(drop=True)
-    df_filtered.drop(columns=["_precio_soles","_dorm_num","_banos_num"], errors="ignore", inplace=True)
-    return df_filtered
-
-def _filter_by_keywords(df, palabras_clave: str):
-    if df is None or df.empty or not palabras_clave or not palabras_clave.strip():
-        return df
-    palabras = palabras_clave.lower().split()
-    dfc = df.copy()
-    dfc["texto_completo"] = (
-        dfc["titulo"].astype(str) + " " +
-        dfc.get("descripcion", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("m2", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("dormitorios", pd.Series([""]*len(dfc))).astype(str) + " " +
-        dfc.get("baños", pd.Series([""]*len(dfc))).astype(str)
-    ).str.lower()
-    for p in palabras:
-        dfc = dfc[dfc["texto_completo"].str.contains(re.escape(p), na=False, case=False)]
-    dfc.drop(columns=["texto_completo"], errors="ignore", inplace=True)
-    return dfc
-
-def run_scrapers(zona="", dormitorios="0", banos="0", price_min=None, price_max=None, palabras_clave=""):
+        return _run_source(name, func, zona, dormitorios, banos, price_min, price_max)
+    finally:
+        DRIVER_POOL.drain()
+
+def _create_executor(n_sources: int):
+    workers = config.SCRAPER_MAX_WORKERS or n_sources
+    workers = max(1, min(workers, n_sources))
+    if config.SCRAPER_EXECUTOR == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper")
+
+def iter_scrapers(zona="", dormitorios="0", banos="0", price_min=None, price_max=None, palabras_clave="",
+                  parallel: Optional[bool] = None):
     """
-    Ejecuta todos los scrapers y devuelve los resultados combinados.
+    Ejecuta los scrapers y va entregando cada fuente apenas termina (ya filtrada).
+    Genera tuplas (nombre, listings_filtrados, info) donde info tiene fuente, encontrados,
+    filtrados, segundos y error (None si la fuente terminó bien).
+    En modo paralelo el orden es el de finalización.
     Si no se especifica una zona, se usará "Lima" por defecto.
     """
     # Si no se especifica una zona, usar "Lima" por defecto
     if not zona or not zona.strip():
         zona = "Lima"
+    if parallel is None:
+        parallel = config.SCRAPER_PARALLEL
+    palabras_clave = palabras_clave or ""
+
+    def _result(name, listings, elapsed, stage_times, error):
+        filtered, total_raw = _process_source(
+            name, listings, dormitorios, banos, price_min, price_max, palabras_clave, stage_times
+        )
+        info = {"fuente": name, "encontrados": total_raw, "filtrados": len(filtered),
+                "segundos": round(elapsed, 2), "tiempos": stage_times, "error": error}
+        return name, filtered, info
 
-    frames = []
-    counts = {}
     logger.info(f"🔎 Buscando en {zona} | dorms={dormitorios} | baños={banos} | precio={price_min}-{price_max} | palabras_clave='{palabras_clave}'")
-    for name, func in SCRAPERS:
+    if parallel and len(SCRAPERS) > 1:
+        executor = _create_executor(len(SCRAPERS))
         try:
-            df = func(zona, dormitorios, banos, price_min, price_max)
-        except Exception as e:
-            logger.error(f"❌ Error en {name}: {e}")
-            df = pd.DataFrame()
-        if df is None:
-            df = pd.DataFrame()
-        # Asegurar que todas las columnas requeridas existan
-        required_columns = ["titulo","precio","m2","dormitorios","baños","descripcion","link","fuente","imagen_url"]
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = ""
-        total_raw = len(df)
-        counts[name] = total_raw
-        logger.info(f"Fuente: {name} -> encontrados: {total_raw}")
-        df = df.fillna("").astype(object)
-        for col in required_columns:
-            df[col] = df[col].astype(str).str.strip().replace({None: "", "None": ""})
-        # Aplicar filtro estricto
-        df_filtered = _filter_df_strict(df, dormitorios, banos, price_min, price_max)
-        # Aplicar filtro por palabras clave
-        if palabras_clave.strip():
-            df_filtered = _filter_by_keywords(df_filtered, palabras_clave)
-        if len(df_filtered) > 0:
-            df_filtered = df_filtered.copy()
-            df_filtered["scraped_at"] = datetime.now().isoformat()
-            df_filtered["id"] = [str(uuid.uuid4()) for _ in range(len(df_filtered))]
-            frames.append(df_filtered)
-    if not frames:
+            run = _run_source_in_process if isinstance(executor, ProcessPoolExecutor) else _run_source
+            futures = {
+                executor.submit(run, name, func, zona, dormitorios, banos, price_min, price_max): name
+                for name, func in SCRAPERS
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    listings, elapsed, stage_times, error = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Error en {name}: {e}")
+                    listings, elapsed, stage_times, error = [], 0.0, {}, str(e)
+                yield _result(name, listings, elapsed, stage_times, error)
+        finally:
+            # Si el consumidor corta antes (p. ej. cliente desconectado) no se espera al resto
+            executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for name, func in SCRAPERS:
+            yield _result(name, *_run_source(name, func, zona, dormitorios, banos, price_min, price_max))
+
+def merge_source_records(per_source: dict) -> List[Listing]:
+    """
+    Une los anuncios de cada fuente (dict nombre -> lista de Listing) en el orden del
+    registro SCRAPERS, deduplica por (link, titulo) y junta el mismo inmueble
+    publicado en varias fuentes (duplicates.py), igual que run_scrapers.
+    """
+    seen = set()
+    merged = []
+    for name, _ in SCRAPERS:
+        merged.extend(dedupe(per_source.get(name) or [], seen))
+    return collapse_duplicates(merged)
+
+def run_scrapers(zona="", dormitorios="0", banos="0", price_min=None, price_max=None, palabras_clave="",
+                 parallel: Optional[bool] = None) -> List[Listing]:
+    """
+    Ejecuta todos los scrapers y devuelve los anuncios combinados (lista de Listing;
+    listing.to_frame los pasa a DataFrame si hace falta).
+    Si no se especifica una zona, se usará "Lima" por defecto.
+    Con parallel=True (o SCRAPER_PARALLEL) las fuentes corren a la vez y cada una
+    se filtra apenas termina; el resultado final es el mismo que en modo secuencial.
+    """
+    filtered = {}
+    for name, listings, _ in iter_scrapers(zona, dormitorios, banos, price_min, price_max,
+                                           palabras_clave, parallel=parallel):
+        filtered[name] = listings
+    # Unir en el orden del registro para que la deduplicación sea determinista
+    combined = merge_source_records(filtered)
+    if not combined:
         logger.warning("⚠️ Ninguna fuente devolvió anuncios")
-        return pd.DataFrame()
-    combined = pd.concat(frames, ignore_index=True, sort=False)
-    combined = combined.drop_duplicates(subset=["link","titulo"], keep="first").reset_index(drop=True)
     return combined
 
 # Para uso como módulo
@@ -1080,4 +1253,5 @@ if __name__ == "__main__":
     # Ejemplo de uso directo
     resultados = run_scrapers("miraflores", "2", "1", 1000, 2000, "piscina")
     print(f"Se encontraron {len(resultados)} propiedades")
-    print(resultados.head())
\ No newline at end of file
+    # run_scrapers devuelve List[Listing]; to_frame solo para mostrarlos en tabla
+    print(to_frame(resultados).head())
\ No newline at end of file
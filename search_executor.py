@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecutor acotado para los scrapes, fuera del event loop de uvicorn.
+- single-flight: búsquedas idénticas concurrentes comparten un único scrape.
+- backpressure: si hay demasiados scrapes en cola se rechaza con Overloaded
+  (que la API traduce a 503 + Retry-After) en vez de lanzar más navegadores.
+- feeds: un scrape por fuentes (submit_feed) publica cada fuente en un SourceFeed
+  que comparten los streams y jobs con la misma búsqueda.
+"""
+import math
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int, message: str = "Servidor ocupado, intente nuevamente"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SourceFeed:
+    """
+    Resultados por fuente de un scrape en curso: cada lector recorre los items desde
+    el principio (aunque llegue tarde) y espera los que faltan hasta close().
+    """
+
+    def __init__(self):
+        self.items = []
+        self.error = None
+        self.done = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self.items.append(item)
+            self._cond.notify_all()
+
+    def close(self, error: Optional[Exception] = None):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.items) and not self.done:
+                    self._cond.wait()
+                batch = self.items[i:]
+                if not batch:
+                    return
+            i += len(batch)
+            yield from batch
+
+
+class SearchExecutor:
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, retry_after: int = 30):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="search")
+        self._inflight = {}
+        self._feeds = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self._avg_duration = None
+        self._stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _estimate_retry_after(self, pending: int) -> int:
+        if not self._avg_duration:
+            return self.retry_after
+        return max(1, math.ceil(self._avg_duration * pending / self.max_workers))
+
+    def _wrap(self, key: Hashable, fn: Callable):
+        def task():
+            with self._lock:
+                self._running += 1
+            start = time.perf_counter()
+            try:
+                result = fn()
+                self._stats["completed"] += 1
+                return result
+            except Exception:
+                self._stats["failed"] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self._running -= 1
+                    self._inflight.pop(key, None)
+                    self._feeds.pop(key, None)
+                    # Media móvil del tiempo de scrape para estimar Retry-After
+                    self._avg_duration = elapsed if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * elapsed
+        return task
+
+    def submit(self, key: Hashable, fn: Callable) -> Future:
+        """Encola fn() salvo que ya haya uno en curso con la misma clave; en ese caso se comparte."""
+        return self.submit_or_join(key, fn)[0]
+
+    def submit_or_join(self, key: Hashable, fn: Callable) -> Tuple[Future, bool]:
+        """Como submit(), pero indica si se encoló fn (True) o se compartió el que estaba en curso (False)."""
+        future, created, _ = self._submit(key, fn)
+        return future, created
+
+    def submit_feed(self, key: Hashable, fn: Callable) -> Tuple[Future, Optional[SourceFeed]]:
+        """
+        Como submit(), para scrapes que publican cada fuente: fn(feed) recibe un
+        SourceFeed y devuelve el resultado completo. Devuelve el future y el feed del
+        scrape (nuevo o en curso); el feed es None si se comparte un scrape sin feed
+        (un /search), cuyo resultado llega recién al final.
+        """
+        feed = SourceFeed()
+
+        def run():
+            try:
+                result = fn(feed)
+            except Exception as e:
+                feed.close(e)
+                raise
+            feed.close()
+            return result
+
+        future, created, current = self._submit(key, run, feed)
+        return future, (feed if created else current)
+
+    def _submit(self, key: Hashable, fn: Callable, feed: Optional[SourceFeed] = None):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False, self._feeds.get(key)
+            pending = len(self._inflight)
+            if pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise Overloaded(self._estimate_retry_after(pending))
+            future = self._executor.submit(self._wrap(key, fn))
+            self._inflight[key] = future
+            if feed is not None:
+                self._feeds[key] = feed
+            self._stats["submitted"] += 1
+            return future, True, feed
+
+    async def run(self, key: Hashable, fn: Callable):
+        """Versión awaitable de submit(): el event loop queda libre mientras corre el scrape."""
+        future = self.submit(key, fn)
+        # shield: si un cliente se desconecta no se cancela el scrape que comparten los demás
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(0, len(self._inflight) - self._running),
+                "avg_duration": round(self._avg_duration, 2) if self._avg_duration else None,
+                **self._stats,
+            }
+
+
+SEARCH_EXECUTOR = SearchExecutor(
+    max_workers=config.SEARCH_MAX_CONCURRENCY,
+    max_queue=config.SEARCH_MAX_QUEUE,
+    retry_after=config.SEARCH_RETRY_AFTER,
+)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Serialización rápida de respuestas JSON.
+Los Listing ya son registros confiables (todos sus campos son texto), así que
+/search y /listings no los vuelven a validar con pydantic: se devuelve una
+FastJSONResponse y el encoder los escribe directo a bytes. JSON_ENCODER elige el
+encoder: "orjson" (por defecto), "pydantic" (pydantic_core.to_json, viene con
+FastAPI) o "json" de la librería estándar; si el pedido no está instalado se usa
+el siguiente de esa lista. El modelo SearchResponse se mantiene solo para
+documentar la API.
+Las respuestas de resultados llevan un ETag débil (listings_etag) para que el
+cliente revalide con If-None-Match y reciba 304 si nada cambió.
+"""
+import json
+import hashlib
+import logging
+from datetime import date, datetime
+from typing import Any, Optional
+
+from starlette.responses import Response
+
+import config
+from listing import Listing
+
+logger = logging.getLogger(__name__)
+
+ENCODERS = ("orjson", "pydantic", "json")
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    import pydantic_core
+    HAS_PYDANTIC_CORE = True
+except ImportError:
+    pydantic_core = None
+    HAS_PYDANTIC_CORE = False
+
+
+def _default(obj):
+    """Tipos que el encoder no conoce: Listing como dict y el resto como texto."""
+    if isinstance(obj, Listing):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _plain(obj):
+    """Listing anidados como dict (para los encoders cuyo `default` es lento por elemento)."""
+    if isinstance(obj, Listing):
+        return obj.to_dict()
+    if isinstance(obj, dict):
+        return {k: _plain(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    return obj
+
+
+def resolve_encoder(name: Optional[str] = None) -> str:
+    """Encoder efectivo: el pedido si está disponible, si no el siguiente de ENCODERS."""
+    name = (name or config.JSON_ENCODER or "json").lower()
+    available = {"orjson": HAS_ORJSON, "pydantic": HAS_PYDANTIC_CORE, "json": True}
+    candidates = ENCODERS[ENCODERS.index(name):] if name in ENCODERS else ("json",)
+    resolved = next(c for c in candidates if available[c])
+    if resolved != name:
+        logger.warning(f"Encoder JSON '{name}' no disponible, se usa {resolved}")
+    return resolved
+
+
+_ENCODER = None
+
+
+def dumps(obj: Any, encoder: Optional[str] = None) -> bytes:
+    """JSON en UTF-8 (sin escapar tildes) con el encoder configurado (o `encoder`)."""
+    global _ENCODER
+    if encoder is None:
+        if _ENCODER is None:
+            _ENCODER = resolve_encoder()
+        encoder = _ENCODER
+    if encoder == "orjson":
+        return orjson.dumps(obj, default=_default)
+    if encoder == "pydantic":
+        return pydantic_core.to_json(_plain(obj), fallback=_default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _etag_record(item):
+    if isinstance(item, Listing):
+        return (item.id, item.titulo, item.precio, item.m2, item.dormitorios, item.banos, item.descripcion,
+                item.link, item.fuente, item.imagen_url, item.alternates)
+    return [v for k, v in item.items() if k != "scraped_at"]
+
+
+def listings_etag(items, *extra) -> str:
+    """
+    ETag débil de una página de resultados: id y contenido de cada anuncio más `extra`
+    (total, orden, campos...). scraped_at no cuenta: cambia en cada scrape aunque el
+    anuncio sea el mismo, y por eso el ETag es débil (W/).
+    """
+    # Un solo dumps de la página (en C con orjson) en vez de un hash por anuncio
+    payload = dumps([extra, [_etag_record(item) for item in items]])
+    return f'W/"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True si algún ETag de If-None-Match coincide con `etag` (comparación débil, acepta "*")."""
+    if not if_none_match:
+        return False
+    tag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == tag:
+            return True
+    return False
+
+
+class FastJSONResponse(Response):
+    """Respuesta JSON que serializa el contenido tal cual, sin pasar por jsonable_encoder."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Arranque en frío de la API.
+- Las dependencias pesadas se importan de forma perezosa: main.py no importa
+  scraper hasta la primera búsqueda, y scraper solo importa selenium /
+  webdriver_manager cuando una fuente realmente abre Chrome (las que responden
+  por HTTP nunca lo cargan).
+- Warm-up opcional (STARTUP_WARMUP) en el lifespan de FastAPI: importa los
+  scrapers, resuelve el binario de chromedriver y levanta navegadores en el pool
+  en un hilo aparte; mientras tanto /health responde 503 ("starting").
+- Perfil de imports: cuánto cuesta importar cada módulo, medido en un proceso
+  limpio con `python -X importtime`.
+
+Uso como CLI:
+    python startup.py                      # perfil de imports de main y scraper
+    python startup.py --top 30 selenium pandas
+    python startup.py --warmup             # corre el warm-up y muestra los tiempos
+"""
+import sys
+import time
+import logging
+import argparse
+import importlib
+import threading
+import subprocess
+from datetime import datetime
+from typing import List, Optional
+
+import config
+from timings import timed, collect as collect_timings, rounded as rounded_timings
+
+logger = logging.getLogger(__name__)
+
+# Referencia para medir cuánto tarda el proceso en quedar listo (startup se importa primero)
+_PROCESS_START = time.perf_counter()
+
+DISABLED, STARTING, READY = "disabled", "starting", "ready"
+# Módulos que importa el warm-up: lo que pagaría la primera búsqueda
+WARM_MODULES = ("scraper",)
+
+
+def profile_imports(modules: List[str], top: int = 15) -> List[dict]:
+    """
+    Importa `modules` en un subproceso limpio con `-X importtime` y devuelve los `top`
+    módulos más caros por tiempo acumulado (incluye lo que cada uno importa).
+    """
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+            rows.append({"modulo": name, "propio_ms": int(self_us) / 1000, "acumulado_ms": int(cumulative_us) / 1000})
+        except ValueError:
+            continue
+    if proc.returncode != 0:
+        logger.warning(f"El perfil de imports terminó con error: {proc.stderr.strip().splitlines()[-1:]}")
+    rows.sort(key=lambda r: r["acumulado_ms"], reverse=True)
+    return rows[:top]
+
+
+class Startup:
+    """
+    Estado del arranque. ready es True cuando el warm-up terminó (bien o con errores),
+    cuando se venció su tope de tiempo o si está deshabilitado.
+    """
+
+    def __init__(self, enabled: bool = False, resolve_driver: bool = True, browsers: int = 0,
+                 timeout: float = 120):
+        self.enabled = enabled
+        self.resolve_driver = resolve_driver
+        self.browsers = max(0, browsers)
+        self.timeout = timeout
+        self.state = STARTING if enabled else DISABLED
+        self.started_at = None
+        self.finished_at = None
+        self.ready_after = None
+        self.steps = {}
+        self.errors = []
+        self._done = threading.Event()
+        self._thread = None
+        if not enabled:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        if self._done.is_set():
+            return True
+        # Un warm-up colgado (p. ej. descarga de chromedriver) no deja la API sin servir
+        return self.started_at is not None and time.time() - self.started_at > self.timeout
+
+    def _step(self, name: str, fn):
+        try:
+            with timed(name):
+                fn()
+        except Exception as e:
+            logger.error(f"Warm-up: falló '{name}': {e}")
+            self.errors.append(f"{name}: {e}")
+
+    def run(self) -> dict:
+        """Corre el warm-up completo en el hilo actual y devuelve los tiempos por paso."""
+        self.started_at = time.time()
+        start = time.perf_counter()
+        with collect_timings() as steps:
+            for module in WARM_MODULES:
+                self._step(f"import:{module}", lambda: importlib.import_module(module))
+            scraper = sys.modules.get("scraper")
+            if scraper is not None and self.resolve_driver:
+                self._step("driver_binary", scraper.chromedriver_path)
+            if scraper is not None and self.browsers:
+                self._step("browsers", lambda: scraper.DRIVER_POOL.warm(self.browsers))
+        self.steps = rounded_timings(steps)
+        self.finished_at = time.time()
+        self.ready_after = round(time.perf_counter() - _PROCESS_START, 3)
+        self.state = READY
+        self._done.set()
+        logger.info(f"🔥 Warm-up terminado en {time.perf_counter() - start:.1f}s: {self.steps}")
+        return self.steps
+
+    def start(self):
+        """Lanza el warm-up en segundo plano (no bloquea el arranque del servidor)."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, daemon=True, name="warmup")
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(self.timeout if timeout is None else timeout)
+
+    def stats(self) -> dict:
+        scraper = sys.modules.get("scraper")
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "ready": self.ready,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finished_at": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            "listo_tras_segundos": self.ready_after,
+            "pasos": self.steps,
+            "errores": self.errors,
+            # Qué dependencias pesadas ya están cargadas en el proceso
+            "modulos": {m: m in sys.modules for m in ("scraper", "selenium", "webdriver_manager", "pandas")},
+            "driver_pool": scraper.DRIVER_POOL.stats() if scraper is not None else None,
+        }
+
+
+STARTUP = Startup(
+    enabled=config.STARTUP_WARMUP,
+    resolve_driver=config.STARTUP_RESOLVE_DRIVER,
+    browsers=config.STARTUP_WARM_BROWSERS,
+    timeout=config.STARTUP_WARMUP_TIMEOUT,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de imports y warm-up del arranque")
+    parser.add_argument("modules", nargs="*", default=["main", "scraper"], help="Módulos a perfilar")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--warmup", action="store_true", help="Correr el warm-up en este proceso")
+    args = parser.parse_args()
+
+    if args.warmup:
+        startup = Startup(enabled=True, resolve_driver=config.STARTUP_RESOLVE_DRIVER,
+                          browsers=config.STARTUP_WARM_BROWSERS, timeout=config.STARTUP_WARMUP_TIMEOUT)
+        for step, seconds in startup.run().items():
+            print(f"{step:<24} {seconds:>8.3f}s")
+        for error in startup.errors:
+            print(f"error: {error}")
+        return
+    print(f"{'módulo':<48} {'propio ms':>10} {'acumulado ms':>13}")
+    for row in profile_imports(args.modules, args.top):
+        print(f"{row['modulo']:<48} {row['propio_ms']:>10.1f} {row['acumulado_ms']:>13.1f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
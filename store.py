@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén persistente de anuncios (SQLite), indexado por link.
+Guarda columnas tipadas (precio en soles, m2, dormitorios, baños) además del
+texto original, para que /listings responda los mismos filtros que /search
+directamente desde disco, sin abrir ningún navegador.
+"""
+import json
+import sqlite3
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+import config
+from keywords import parse_keywords, searchable_text
+from listing import Listing, as_listing
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    link         TEXT PRIMARY KEY,
+    id           TEXT,
+    titulo       TEXT,
+    precio       TEXT,
+    precio_soles INTEGER,
+    m2           TEXT,
+    m2_num       INTEGER,
+    dormitorios  TEXT,
+    dorm_num     INTEGER,
+    banos        TEXT,
+    banos_num    INTEGER,
+    descripcion  TEXT,
+    fuente       TEXT,
+    zona         TEXT,
+    imagen_url   TEXT,
+    scraped_at   TEXT,
+    first_seen   TEXT NOT NULL,
+    last_seen    TEXT NOT NULL,
+    texto_norm   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_listings_precio ON listings (precio_soles);
+CREATE INDEX IF NOT EXISTS idx_listings_dorm ON listings (dorm_num);
+CREATE INDEX IF NOT EXISTS idx_listings_last_seen ON listings (last_seen);
+-- Un anuncio aparece en las búsquedas de varias zonas (p. ej. "miraflores" y "lima"):
+-- la pertenencia se guarda aparte para que la última búsqueda no lo saque de las demás
+CREATE TABLE IF NOT EXISTS listing_zones (
+    zona       TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    PRIMARY KEY (zona, link)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawl_status (
+    fuente      TEXT NOT NULL,
+    zona        TEXT NOT NULL,
+    crawled_at  TEXT NOT NULL,
+    encontrados INTEGER NOT NULL,
+    ok          INTEGER NOT NULL,
+    full_at     TEXT,
+    PRIMARY KEY (fuente, zona)
+);
+CREATE TABLE IF NOT EXISTS seen_links (
+    fuente     TEXT NOT NULL,
+    zona       TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    PRIMARY KEY (fuente, zona, link)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    tareas      INTEGER NOT NULL,
+    errores     INTEGER NOT NULL,
+    anuncios    INTEGER NOT NULL,
+    segundos    REAL NOT NULL,
+    detalle     TEXT
+);
+"""
+
+_UPSERT = """
+INSERT INTO listings (link, id, titulo, precio, precio_soles, m2, m2_num, dormitorios, dorm_num,
+                      banos, banos_num, descripcion, fuente, zona, imagen_url, scraped_at,
+                      first_seen, last_seen, texto_norm)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(link) DO UPDATE SET
+    titulo = excluded.titulo,
+    precio = excluded.precio,
+    precio_soles = excluded.precio_soles,
+    m2 = excluded.m2,
+    m2_num = excluded.m2_num,
+    dormitorios = excluded.dormitorios,
+    dorm_num = excluded.dorm_num,
+    banos = excluded.banos,
+    banos_num = excluded.banos_num,
+    descripcion = excluded.descripcion,
+    fuente = excluded.fuente,
+    imagen_url = CASE WHEN excluded.imagen_url != '' THEN excluded.imagen_url ELSE listings.imagen_url END,
+    scraped_at = excluded.scraped_at,
+    last_seen = excluded.last_seen,
+    texto_norm = excluded.texto_norm
+"""
+
+_ZONE_INSERT = "INSERT OR IGNORE INTO listing_zones (zona, link, first_seen) VALUES (?, ?, ?)"
+
+_COLUMNS = ("id", "titulo", "precio", "m2", "dormitorios", "banos", "descripcion", "link",
+            "fuente", "scraped_at", "imagen_url")
+
+
+def normalize_zona(zona: str) -> str:
+    """Misma zona escrita distinto -> misma clave ("Jesús María" == "jesus maria")."""
+    text = unicodedata.normalize("NFKD", (zona or "").lower()).encode("ASCII", "ignore").decode("utf-8")
+    return " ".join(text.split()) or "lima"
+
+
+class ListingStore:
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """
+        Bases creadas antes de texto_norm: se agrega la columna y se completa en lotes.
+        Bases creadas antes de listing_zones: la zona de cada anuncio pasa a esa tabla.
+        Bases creadas antes de full_at: ningún recorrido cuenta como completo.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(listings)")}
+        if "texto_norm" not in columns:
+            self._conn.execute("ALTER TABLE listings ADD COLUMN texto_norm TEXT")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(crawl_status)")}
+        if "full_at" not in columns:
+            self._conn.execute("ALTER TABLE crawl_status ADD COLUMN full_at TEXT")
+        if self._conn.execute("SELECT 1 FROM listing_zones LIMIT 1").fetchone() is None:
+            self._conn.execute("INSERT OR IGNORE INTO listing_zones (zona, link, first_seen) "
+                               "SELECT zona, link, first_seen FROM listings WHERE zona IS NOT NULL")
+            self._conn.execute("DROP INDEX IF EXISTS idx_listings_zona_precio")
+            self._conn.execute("DROP INDEX IF EXISTS idx_listings_zona_dorm")
+        while True:
+            rows = self._conn.execute(
+                "SELECT link, titulo, descripcion, m2, dormitorios, banos FROM listings "
+                "WHERE texto_norm IS NULL LIMIT ?", (self.batch_size,)).fetchall()
+            if not rows:
+                break
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE listings SET texto_norm = ? WHERE link = ?",
+                                   [(searchable_text(*row[1:]), row[0]) for row in rows])
+            self._conn.execute("COMMIT")
+
+    def _row(self, r: Listing, zona: str, now: str) -> tuple:
+        precio_soles, m2_num, dorm_num, banos_num = r.numbers
+        return (
+            r.link, r.id, r.titulo, r.precio, precio_soles, r.m2, m2_num,
+            r.dormitorios, dorm_num, r.banos, banos_num,
+            r.descripcion, r.fuente, zona, r.imagen_url, r.scraped_at or now, now, now,
+            # Texto normalizado (el mismo que usó el filtro de la búsqueda), para filtrar en SQL
+            r.text,
+        )
+
+    def upsert(self, records: Iterable[Listing], zona: str) -> int:
+        """Inserta/actualiza anuncios (Listing o dicts) en lotes de `batch_size` filas por transacción."""
+        zona_key = normalize_zona(zona)
+        now = datetime.now().isoformat()
+        batch, total = [], 0
+        with self._lock:
+            for r in records:
+                r = as_listing(r)
+                if not r.link:
+                    continue
+                batch.append(self._row(r, zona_key, now))
+                if len(batch) >= self.batch_size:
+                    total += self._flush(batch, zona_key, now)
+                    batch = []
+            if batch:
+                total += self._flush(batch, zona_key, now)
+        return total
+
+    def _flush(self, batch: List[tuple], zona_key: str, now: str) -> int:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(_UPSERT, batch)
+            self._conn.executemany(_ZONE_INSERT, [(zona_key, row[0], now) for row in batch])
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return len(batch)
+
+    def query(self, zona: str = "", dormitorios: str = "0", banos: str = "0",
+              price_min: Optional[int] = None, price_max: Optional[int] = None,
+              palabras_clave: str = "", max_age_hours: Optional[float] = None,
+              limit: Optional[int] = None) -> List[Listing]:
+        """Mismos filtros que run_scrapers, resueltos con los índices de la tabla."""
+        where, params = ["z.zona = ?"], [normalize_zona(zona)]
+        if dormitorios and str(dormitorios).strip().isdigit() and str(dormitorios) != "0":
+            where.append("dorm_num = ?")
+            params.append(int(dormitorios))
+        if banos and str(banos).strip().isdigit() and str(banos) != "0":
+            where.append("banos_num = ?")
+            params.append(int(banos))
+        if price_min is not None:
+            where.append("precio_soles >= ?")
+            params.append(int(price_min))
+        if price_max is not None:
+            where.append("precio_soles <= ?")
+            params.append(int(price_max))
+        if max_age_hours:
+            where.append("l.last_seen >= ?")
+            params.append((datetime.now() - timedelta(hours=float(max_age_hours))).isoformat())
+        keywords = parse_keywords(palabras_clave)
+        if keywords:
+            # Las palabras clave se resuelven en SQLite sobre el texto ya normalizado
+            keyword_sql, keyword_params = keywords.sql_where("l.texto_norm")
+            where.append(keyword_sql)
+            params.extend(keyword_params)
+        sql = (f"SELECT {', '.join('l.' + c for c in _COLUMNS)} FROM listing_zones z "
+               f"JOIN listings l ON l.link = z.link WHERE {' AND '.join(where)} ORDER BY l.last_seen DESC")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [Listing(**dict(row)) for row in rows]
+
+    # -------------------- Pre-crawler --------------------
+    def record_crawl(self, fuente: str, zona: str, encontrados: int, ok: bool = True, full: bool = True):
+        """
+        Marca cuándo se recorrió por última vez una fuente en una zona. Un recorrido
+        completo (`full`) y exitoso también renueva full_at: el incremental se detiene
+        en los anuncios conocidos y no les actualiza last_seen.
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawl_status (fuente, zona, crawled_at, encontrados, ok, full_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(fuente, zona) DO UPDATE SET crawled_at = excluded.crawled_at, "
+                "encontrados = excluded.encontrados, ok = excluded.ok, "
+                "full_at = COALESCE(excluded.full_at, crawl_status.full_at)",
+                (fuente, normalize_zona(zona), now, int(encontrados), int(bool(ok)), now if ok and full else None),
+            )
+
+    def full_crawled_at(self, fuente: str, zona: str) -> Optional[datetime]:
+        """Último recorrido completo y exitoso de una fuente en una zona (None si nunca)."""
+        with self._lock:
+            row = self._conn.execute("SELECT full_at FROM crawl_status WHERE fuente = ? AND zona = ?",
+                                     (fuente, normalize_zona(zona))).fetchone()
+        return datetime.fromisoformat(row[0]) if row is not None and row[0] else None
+
+    def known_links(self, fuente: str, zona: str) -> set:
+        """Marca de agua del modo incremental: links ya vistos de una fuente en una zona."""
+        with self._lock:
+            rows = self._conn.execute("SELECT link FROM seen_links WHERE fuente = ? AND zona = ?",
+                                      (fuente, normalize_zona(zona))).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_seen(self, fuente: str, zona: str, links: Iterable[str]) -> int:
+        zona_key = normalize_zona(zona)
+        now = datetime.now().isoformat()
+        rows = [(fuente, zona_key, link, now) for link in dict.fromkeys(links) if link]
+        with self._lock:
+            for i in range(0, len(rows), self.batch_size):
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO seen_links (fuente, zona, link, first_seen) VALUES (?, ?, ?, ?)",
+                        rows[i:i + self.batch_size])
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        return len(rows)
+
+    def zone_crawled_at(self, zona: str, sources: Iterable[str]) -> Optional[datetime]:
+        """
+        Momento del recorrido exitoso más antiguo entre las fuentes de una zona (None si
+        alguna de `sources` no tiene registro o su último recorrido falló): una zona
+        recorrida a medias no alcanza para responder sin scrapear.
+        """
+        sources = set(sources)
+        if not sources:
+            return None
+        with self._lock:
+            rows = self._conn.execute("SELECT fuente, crawled_at, ok FROM crawl_status WHERE zona = ?",
+                                      (normalize_zona(zona),)).fetchall()
+        rows = [row for row in rows if row["fuente"] in sources]
+        if len(rows) < len(sources) or any(not row["ok"] for row in rows):
+            return None
+        return datetime.fromisoformat(min(row["crawled_at"] for row in rows))
+
+    def record_run(self, stats: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO crawl_runs (started_at, finished_at, tareas, errores, anuncios, segundos, detalle) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (stats["started_at"], stats["finished_at"], stats["tareas"], stats["errores"],
+                 stats["anuncios"], stats["segundos"], json.dumps(stats.get("fuentes", {}), ensure_ascii=False)),
+            )
+
+    def recent_runs(self, limit: int = 10) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM crawl_runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        runs = []
+        for row in rows:
+            run = dict(row)
+            run["fuentes"] = json.loads(run.pop("detalle") or "{}")
+            runs.append(run)
+        return runs
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_source = {row[0]: row[1] for row in
+                         self._conn.execute("SELECT fuente, COUNT(*) FROM listings GROUP BY fuente")}
+            zonas = self._conn.execute("SELECT COUNT(DISTINCT zona) FROM listing_zones").fetchone()[0]
+        return {"path": self.path, "listings": sum(by_source.values()), "zonas": zonas, "fuentes": by_source}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def save_results(records: List[Listing], zona: str) -> int:
+    """Guarda el resultado de una búsqueda en el almacén; nunca rompe la búsqueda."""
+    store = get_store()
+    if store is None or not records:
+        return 0
+    try:
+        return store.upsert(records, zona)
+    except Exception as e:
+        logger.error(f"Error guardando anuncios en el almacén: {e}")
+        return 0
+
+
+def get_store() -> Optional[ListingStore]:
+    """Almacén compartido del proceso (None si STORE_ENABLED=0)."""
+    global _store
+    if not config.STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ListingStore(config.STORE_PATH, batch_size=config.STORE_BATCH_SIZE)
+        return _store
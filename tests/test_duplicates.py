@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Qué tiene que juntar (y qué no) la deduplicación entre fuentes, y qué links
+comparten id estable. Fija el comportamiento de duplicates.py y listing.py para
+que un ajuste de umbrales o de normalización no lo cambie sin que se note.
+
+    python -m pytest tests
+"""
+import pytest
+
+from duplicates import DuplicateIndex
+from listing import Listing, listing_id, normalize_link
+
+GENERIC = "Departamento en alquiler en Miraflores"
+
+
+def _listing(fuente, titulo, descripcion="", precio="S/ 2,000", m2="80 m²", dormitorios="2", link=None):
+    return Listing(titulo=titulo, precio=precio, m2=m2, dormitorios=dormitorios, descripcion=descripcion,
+                   link=link or f"https://{fuente}.test/{abs(hash((titulo, descripcion, precio)))}",
+                   fuente=fuente)
+
+
+def _collapse(*listings):
+    return DuplicateIndex().collapse(list(listings))
+
+
+# -------------------- Se juntan --------------------
+def test_same_apartment_with_reworded_title_is_merged():
+    a = _listing("urbania", "Depa 2 dorm con terraza en Av. Larco 1234 Miraflores")
+    b = _listing("properati", "ALQUILER DEPARTAMENTO 2 DORM. CON TERRAZA - AV. LARCO 1234 MIRAFLORES",
+                 precio="S/ 2,030", m2="81 m²")
+    unique = _collapse(a, b)
+    assert len(unique) == 1
+    assert unique[0].link == a.link
+    assert unique[0].alternates == ({"fuente": "properati", "link": b.link},)
+
+
+def test_generic_titles_merge_when_one_description_is_a_truncated_copy():
+    full = "Frente al parque Kennedy, piscina, gimnasio, cochera techada y lavandería."
+    a = _listing("urbania", GENERIC, full)
+    b = _listing("properati", GENERIC, "Frente al parque Kennedy, piscina, gimnasio, cochera", precio="S/ 2,030")
+    assert len(_collapse(a, b)) == 1
+
+
+def test_merge_keeps_order_and_never_mutates_the_inputs():
+    a = _listing("urbania", "Depa con terraza en Av. Larco 1234")
+    other = _listing("urbania", "Casa con jardín en Calle Los Pinos 456", precio="S/ 5,000", m2="200 m²")
+    b = _listing("infocasas", "Departamento con terraza Av. Larco 1234")
+    unique = _collapse(a, other, b)
+    assert [l.titulo for l in unique] == [a.titulo, other.titulo]
+    # El canónico con alternativos es una copia: lo ya entregado (streaming, jobs) no cambia
+    assert unique[0] is not a and a.alternates == ()
+
+
+def test_incremental_index_does_not_touch_listings_already_returned():
+    index = DuplicateIndex()
+    a = _listing("nestoria", "Depa con terraza en Av. Larco 1234")
+    assert index.collapse([a]) == [a]
+    assert index.collapse([_listing("infocasas", "Departamento con terraza Av. Larco 1234")]) == []
+    assert a.alternates == ()
+
+
+# -------------------- No se juntan --------------------
+def test_generic_titles_with_different_descriptions_stay_separate():
+    a = _listing("urbania", GENERIC, "Frente al parque Kennedy, piscina, gimnasio y cochera.")
+    b = _listing("properati", GENERIC, "Cerca a Larcomar, terraza amplia y vista al mar, sin cochera.",
+                 precio="S/ 2,030", m2="81 m²")
+    assert len(_collapse(a, b)) == 2
+
+
+def test_generic_titles_without_descriptions_stay_separate():
+    assert len(_collapse(_listing("urbania", GENERIC), _listing("properati", GENERIC))) == 2
+
+
+def test_titles_sharing_only_the_district_stay_separate():
+    a = _listing("urbania", "Departamento amplio en San Borja")
+    b = _listing("properati", "Flat moderno en San Borja")
+    assert len(_collapse(a, b)) == 2
+
+
+def test_conflicting_street_numbers_stay_separate():
+    a = _listing("urbania", "Depa con terraza en Av. Larco 1234")
+    b = _listing("properati", "Depa con terraza en Av. Larco 1450")
+    assert len(_collapse(a, b)) == 2
+
+
+def test_same_source_is_never_merged():
+    a = _listing("urbania", "Depa con terraza en Av. Larco 1234")
+    b = _listing("urbania", "Depa con terraza en Av. Larco 1234", link="https://urbania.test/otro")
+    assert len(_collapse(a, b)) == 2
+
+
+@pytest.mark.parametrize("changes", [
+    {"precio": "S/ 2,400"},       # fuera de la tolerancia de precio
+    {"m2": "95 m²"},              # fuera de la tolerancia de m²
+    {"dormitorios": "3"},         # otra clave de bloqueo
+    {"precio": "US$ 2,000"},      # otra moneda
+])
+def test_different_numbers_stay_separate(changes):
+    a = _listing("urbania", "Depa con terraza en Av. Larco 1234")
+    b = _listing("properati", "Depa con terraza en Av. Larco 1234", **changes)
+    assert len(_collapse(a, b)) == 2
+
+
+def test_listings_without_price_or_m2_are_not_compared():
+    a = _listing("urbania", "Depa con terraza en Av. Larco 1234", m2="")
+    b = _listing("properati", "Depa con terraza en Av. Larco 1234", m2="")
+    assert len(_collapse(a, b)) == 2
+
+
+# -------------------- Ids estables --------------------
+BASE = "https://urbania.pe/inmueble/depa-123?a=1&b=2"
+
+
+@pytest.mark.parametrize("variant", [
+    "HTTPS://Urbania.PE/inmueble/depa-123/?b=2&a=1",
+    BASE + "#fotos",
+    BASE + "&utm_source=fb&utm_campaign=x",
+    BASE + "&UTM_Medium=mail",
+    BASE + "&fbclid=abc",
+    BASE + "&gclid=abc",
+    BASE + "&ref=home",
+])
+def test_tracking_and_formatting_variants_share_the_id(variant):
+    assert normalize_link(variant) == normalize_link(BASE)
+    assert listing_id("urbania", variant) == listing_id("urbania", BASE)
+
+
+@pytest.mark.parametrize("param", ["reference", "refId", "referencia", "id"])
+def test_params_that_identify_the_listing_change_the_id(param):
+    assert listing_id("urbania", f"{BASE}&{param}=7") != listing_id("urbania", BASE)
+
+
+def test_id_depends_on_the_source_but_not_its_spelling():
+    assert listing_id(" Urbania ", BASE) == listing_id("urbania", BASE)
+    assert listing_id("properati", BASE) != listing_id("urbania", BASE)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Medición de tiempos por etapa (esperas, carga de página, parseo...) de un scrape.
+Cada hilo acumula en su propio colector, así las fuentes que corren en paralelo
+no se mezclan:
+
+    with collect() as t:
+        with timed("parse"):
+            ...
+    t  # {"parse": 0.12}
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_local = threading.local()
+
+
+def _current() -> Optional[Dict[str, float]]:
+    return getattr(_local, "timings", None)
+
+
+def record(stage: str, seconds: float):
+    """Suma `seconds` a la etapa en el colector activo del hilo (si lo hay)."""
+    timings = _current()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect():
+    """Activa un colector en el hilo actual y lo entrega como dict etapa -> segundos."""
+    previous = _current()
+    timings: Dict[str, float] = {}
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+        if previous is not None:
+            for stage, seconds in timings.items():
+                previous[stage] = previous.get(stage, 0.0) + seconds
+
+
+def rounded(timings: Dict[str, float], ndigits: int = 3) -> Dict[str, float]:
+    return {stage: round(seconds, ndigits) for stage, seconds in sorted(timings.items())}
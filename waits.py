@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Esperas por eventos del DOM en lugar de time.sleep fijos.
+Cada espera termina apenas se cumple su condición (cards presentes, cantidad de
+cards estable, scrollHeight sin cambios, red inactiva) y usa el sleep antiguo
+solo como tope. El tiempo de cada espera se registra en timings ("wait:<nombre>").
+"""
+import time
+import logging
+from typing import Callable, Optional
+
+import timings
+
+logger = logging.getLogger(__name__)
+
+_COUNT_JS = "return document.querySelectorAll(arguments[0]).length;"
+_HEIGHT_JS = "return document.body ? document.body.scrollHeight : 0;"
+# "Red inactiva": documento cargado y sin recursos nuevos en Resource Timing
+_NETWORK_JS = ("return [document.readyState, "
+               "(performance.getEntriesByType ? performance.getEntriesByType('resource').length : 0)];")
+
+
+class WaitProfile:
+    """
+    Parámetros de espera ajustados por fuente.
+    - ready_selector: CSS que indica que el listado ya se pintó.
+    - card_selector: CSS de las cards (para medir si el scroll trajo más).
+    - ready_timeout: tope para la carga inicial.
+    - max_scrolls / scroll_timeout: scrolls como máximo y tope de espera tras cada uno
+      (el antiguo sleep fijo).
+    - stable_for: tiempo sin cambios para considerar la página estable.
+    - network_idle: tope (segundos) para esperar, tras la carga inicial, a que el
+      navegador deje de pedir recursos (precios e imágenes que llegan por XHR); 0 = no se espera.
+    - height_stable: tras cada scroll que trajo cards, esperar además a que deje de
+      crecer la página (imágenes perezosas y placeholders que empujan el fondo).
+    """
+
+    __slots__ = ("ready_selector", "card_selector", "ready_timeout", "max_scrolls",
+                 "scroll_timeout", "stable_for", "poll", "network_idle", "height_stable")
+
+    def __init__(self, ready_selector: str, card_selector: str, ready_timeout: float = 10,
+                 max_scrolls: int = 5, scroll_timeout: float = 1.0, stable_for: float = 0.3,
+                 poll: float = 0.1, network_idle: float = 0.0, height_stable: bool = False):
+        self.ready_selector = ready_selector
+        self.card_selector = card_selector
+        self.ready_timeout = ready_timeout
+        self.max_scrolls = max_scrolls
+        self.scroll_timeout = scroll_timeout
+        self.stable_for = stable_for
+        self.poll = poll
+        self.network_idle = network_idle
+        self.height_stable = height_stable
+
+    def replace(self, **changes) -> "WaitProfile":
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return WaitProfile(**values)
+
+
+WAIT_PROFILES = {
+    "nestoria": WaitProfile(
+        ready_selector="li.rating__new, ul#main__listing_res > li, .result__details__price",
+        card_selector="li.rating__new, ul#main__listing_res > li",
+        ready_timeout=8, max_scrolls=5, scroll_timeout=1.0, height_stable=True,
+    ),
+    # InfoCasas y Urbania pintan las cards y después completan precios e imágenes por XHR
+    "infocasas": WaitProfile(
+        ready_selector="div.listingCard, article",
+        card_selector="div.listingCard, article",
+        ready_timeout=6, max_scrolls=8, scroll_timeout=0.6, network_idle=1.5, height_stable=True,
+    ),
+    "urbania": WaitProfile(
+        ready_selector="article, div[data-qa='posting PROPERTY'], div.postingCard",
+        card_selector="div[data-qa='posting PROPERTY'], article, div[class*='postingCard']",
+        ready_timeout=12, max_scrolls=8, scroll_timeout=1.5, network_idle=2.0, height_stable=True,
+    ),
+    "doomos": WaitProfile(
+        ready_selector=".content_result",
+        card_selector=".content_result",
+        ready_timeout=8, max_scrolls=3, scroll_timeout=1.0,
+    ),
+}
+
+
+def _poll_until(name: str, check: Callable[[], bool], timeout: float, poll: float) -> bool:
+    start = time.perf_counter()
+    deadline = start + max(0.0, timeout)
+    ok = False
+    try:
+        while True:
+            try:
+                if check():
+                    ok = True
+                    break
+            except Exception:
+                pass
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(poll)
+    finally:
+        timings.record(f"wait:{name}", time.perf_counter() - start)
+    return ok
+
+
+def _count(driver, css: str) -> int:
+    return int(driver.execute_script(_COUNT_JS, css) or 0)
+
+
+def _height(driver) -> int:
+    return int(driver.execute_script(_HEIGHT_JS) or 0)
+
+
+def wait_for_selector(driver, css: str, timeout: float = 10, poll: float = 0.1) -> bool:
+    """Espera hasta que exista al menos un elemento que cumpla `css`."""
+    return _poll_until("selector", lambda: _count(driver, css) > 0, timeout, poll)
+
+
+def wait_for_count_stable(driver, css: str, timeout: float = 5, stable_for: float = 0.3,
+                          poll: float = 0.1) -> int:
+    """Espera a que la cantidad de elementos `css` no cambie durante `stable_for` segundos."""
+    state = {"count": -1, "since": time.perf_counter()}
+
+    def check():
+        n = _count(driver, css)
+        now = time.perf_counter()
+        if n != state["count"]:
+            state["count"], state["since"] = n, now
+            return False
+        return n > 0 and now - state["since"] >= stable_for
+
+    _poll_until("count_stable", check, timeout, poll)
+    return max(state["count"], 0)
+
+
+def wait_for_scroll_height_stable(driver, timeout: float = 5, stable_for: float = 0.3,
+                                  poll: float = 0.1) -> int:
+    """Espera a que document.body.scrollHeight no cambie durante `stable_for` segundos."""
+    state = {"height": -1, "since": time.perf_counter()}
+
+    def check():
+        h = _height(driver)
+        now = time.perf_counter()
+        if h != state["height"]:
+            state["height"], state["since"] = h, now
+            return False
+        return now - state["since"] >= stable_for
+
+    _poll_until("height_stable", check, timeout, poll)
+    return max(state["height"], 0)
+
+
+def wait_for_network_idle(driver, timeout: float = 5, idle_for: float = 0.5, poll: float = 0.1) -> bool:
+    """
+    Espera a que el documento esté cargado y no aparezcan recursos nuevos durante `idle_for`.
+    Usa la Resource Timing API del navegador (mismo dato que expone CDP Network, sin listeners).
+    """
+    state = {"resources": -1, "since": time.perf_counter()}
+
+    def check():
+        ready, resources = driver.execute_script(_NETWORK_JS)
+        now = time.perf_counter()
+        if resources != state["resources"]:
+            state["resources"], state["since"] = resources, now
+            return False
+        return ready == "complete" and now - state["since"] >= idle_for
+
+    return _poll_until("network_idle", check, timeout, poll)
+
+
+def wait_until_ready(driver, profile: WaitProfile) -> int:
+    """
+    Carga inicial: aparecen las cards, su cantidad se estabiliza y, si el perfil lo
+    pide, la red queda inactiva. Devuelve cuántas cards hay.
+    """
+    if not wait_for_selector(driver, profile.ready_selector, profile.ready_timeout, profile.poll):
+        logger.warning(f"No aparecieron elementos '{profile.ready_selector}' en {profile.ready_timeout}s")
+        return 0
+    count = wait_for_count_stable(driver, profile.card_selector, timeout=profile.ready_timeout,
+                                  stable_for=profile.stable_for, poll=profile.poll)
+    if profile.network_idle > 0:
+        wait_for_network_idle(driver, timeout=profile.network_idle, poll=profile.poll)
+    return count
+
+
+def scroll_until_stable(driver, profile: WaitProfile, should_stop: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Hace scroll al fondo hasta `max_scrolls` veces. Tras cada scroll espera como
+    máximo `scroll_timeout` a que lleguen más cards o crezca la página; si no
+    cambia nada, el listado se terminó y se deja de hacer scroll.
+    `should_stop` se consulta antes de cada scroll (p. ej. modo incremental).
+    Devuelve la cantidad de scrolls hechos.
+    """
+    scrolls = 0
+    for _ in range(profile.max_scrolls):
+        if should_stop is not None and should_stop():
+            break
+        before_count = _count(driver, profile.card_selector)
+        before_height = _height(driver)
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        scrolls += 1
+        changed = _poll_until(
+            "scroll",
+            lambda: _count(driver, profile.card_selector) != before_count or _height(driver) != before_height,
+            profile.scroll_timeout, profile.poll,
+        )
+        if not changed:
+            break
+        # Llegó contenido nuevo: dejar que termine de pintarse antes del siguiente scroll
+        wait_for_count_stable(driver, profile.card_selector, timeout=profile.scroll_timeout,
+                              stable_for=profile.stable_for, poll=profile.poll)
+        if profile.height_stable:
+            wait_for_scroll_height_stable(driver, timeout=profile.scroll_timeout,
+                                          stable_for=profile.stable_for, poll=profile.poll)
+    return scrolls